@@ -10,6 +10,26 @@ from flask import Flask, render_template, request, jsonify, send_from_directory
 from flask_cors import CORS
 from device_profiles import get_manufacturers, get_models, get_device_profile
 from modbus_scanner import ModbusScanner, NetworkScanner
+from async_scanner import (
+    AsyncNetworkScanner, AsyncRegisterScanner, ConnectionLimiter, adopt_template, detect_device_types,
+    fingerprint_device, run_ordered, scan_device_cached, scan_loop,
+    DEFAULT_MAX_CONCURRENCY, DEFAULT_PER_HOST_CONNECTIONS, DEFAULT_DEVICE_DEADLINE
+)
+from discovery_plan import plan_compiler, TABLE_KEYS
+from discovery_cache import discovery_cache, fingerprint_hash
+from register_map import IntervalSet, register_map_from_json
+from register_profiler import (
+    RegisterProfiler, profile_report, scan_interval_recommendations,
+    NUMPY_AVAILABLE, DEFAULT_SAMPLES, DEFAULT_SAMPLE_INTERVAL, MAX_SAMPLES, MAX_PROFILE_DURATION
+)
+from register_types import register_types_report
+from bulk_writer import BulkWriter
+from config_verifier import load_hubs, verify_hub, unverified_hub
+from host_health import host_health
+from modbus_exceptions import (
+    HostUnavailableError, ModbusConnectionError, ModbusWriteError, ConfigurationError, CaptureFormatError,
+    create_error_response
+)
 from config_generator import ModbusConfigGenerator
 from network_detector import NetworkDetector
 from manufacturer_database import (
@@ -20,6 +40,11 @@ from manufacturer_database import (
 from auto_scanner import auto_scanner
 from scan_progress import scan_progress
 from ping_scanner import PingScanner, get_vendor_from_mac, quick_ping_scan
+from protocol_scanner import (
+    ProtocolScanner, ProtocolType, DEFAULT_PROBE_RATE, DEFAULT_TCP_CONCURRENCY
+)
+from broadcast_discovery import DEFAULT_DISCOVERY_WINDOW
+from pcap_inventory import PassiveInventory, device_to_json
 
 # Configure logging FIRST - ensure logs go to stderr, not stdout (prevents mixing with HTTP responses)
 logging.basicConfig(
@@ -39,15 +64,19 @@ except ImportError as e:
 
 # Try to import S7 scanner (for LOGO! v7 detection)
 try:
-    from s7_scanner import S7Scanner
+    from s7_scanner import S7Scanner, AsyncS7Scanner, DEFAULT_TSAP_PARALLEL
     from s7_client import S7Client, SNAP7_AVAILABLE
+    from s7_session_pool import s7_session_pool
     S7_SCANNER_AVAILABLE = True
 except ImportError as e:
     logger.warning(f"S7 scanner not available: {e}")
     S7_SCANNER_AVAILABLE = False
     S7Scanner = None
+    AsyncS7Scanner = None
+    DEFAULT_TSAP_PARALLEL = 4
     S7Client = None
     SNAP7_AVAILABLE = False
+    s7_session_pool = None
 
 app = Flask(__name__)
 CORS(app)
@@ -74,6 +103,8 @@ else:
     DEFAULT_MODBUS_PATH = os.path.abspath('./modbus.yaml')
 
 MODBUS_CONFIG_PATH = os.environ.get('MODBUS_CONFIG_PATH', DEFAULT_MODBUS_PATH)
+# Packet captures for the passive inventory are only read from here (mapped read-only)
+CAPTURE_ROOT = os.path.realpath(os.environ.get('CAPTURE_ROOT', '/share'))
 logger.info(f"Modbus config will be saved to: {MODBUS_CONFIG_PATH}")
 logger.info(f"Device storage path: {DEVICES_PATH}")
 
@@ -180,6 +211,14 @@ def save_config():
         logger.error(f"Error saving devices: {e}", exc_info=True)
 
 
+def host_unavailable_response(error: HostUnavailableError):
+    """503 response for a host whose circuit breaker is open"""
+    response = create_error_response(error)
+    response['error'] = (f"Gerät {error.details.get('host')} antwortet nicht, "
+                         f"erneuter Versuch in {error.details.get('retry_in')} s")
+    return jsonify(response), 503
+
+
 @app.route('/')
 def index():
     """Serve main page"""
@@ -374,6 +413,9 @@ def api_scan_device():
             'total': total
         })
 
+    except HostUnavailableError as e:
+        logger.warning(str(e))
+        return host_unavailable_response(e)
     except Exception as e:
         logger.error(f"Error scanning device: {e}")
         return jsonify({'error': str(e)}), 500
@@ -416,6 +458,7 @@ def api_scan_network():
         ports = data.get('ports', [502, 510])
         auto_detect = data.get('auto_detect', True)  # Auto-detect device type
         auto_add = data.get('auto_add', True)  # Automatically add to device list
+        use_async = data.get('use_async', True)  # Probe all hosts concurrently
 
         # Auto-detect network if not provided
         if not network:
@@ -435,7 +478,11 @@ def api_scan_network():
             if found_device:
                 scan_progress.add_found_device(found_device)
 
-        found_devices = NetworkScanner.scan_network(network, ports, timeout=1, auto_detect=auto_detect, progress_callback=progress_callback)
+        if use_async:
+            found_devices = scan_loop.run(AsyncNetworkScanner.scan_network(
+                network, ports, timeout=1, auto_detect=auto_detect, progress_callback=progress_callback))
+        else:
+            found_devices = NetworkScanner.scan_network(network, ports, timeout=1, auto_detect=auto_detect, progress_callback=progress_callback)
 
         # Automatically add detected devices if requested
         added_count = 0
@@ -916,6 +963,110 @@ def api_scan_network_nmap():
         return jsonify({'error': str(e), 'scan_method': 'nmap'}), 500
 
 
+@app.route('/api/scan-protocols', methods=['POST'])
+def api_scan_protocols():
+    """
+    Multi-protocol inventory of a network
+    Probes Modbus TCP/UDP, S7comm, KNX/IP, PROFINET and BACnet ports of all
+    hosts in one concurrent sweep; detections appear in /api/scan-progress
+    as they are found. With 'broadcast', KNX/IP and BACnet devices are found
+    by one multicast search / Who-Is instead of per-host probes.
+    """
+    try:
+        data = request.json or {}
+        network = data.get('network')  # Optional, e.g. "192.168.1.0/24"
+        timeout = float(data.get('timeout', 2))
+        rate = float(data.get('rate', DEFAULT_PROBE_RATE))  # Probes per second
+        try:
+            protocols = [ProtocolType(name) for name in data.get('protocols', [
+                'modbus_tcp', 'modbus_udp', 's7comm', 'knx_ip', 'profinet', 'bacnet'
+            ])]
+        except ValueError as e:
+            return jsonify({'success': False, 'error': f'Unbekanntes Protokoll: {e}'}), 400
+
+        # Auto-detect network if not provided
+        if not network:
+            detector = NetworkDetector()
+            network_info = detector.get_network_info()
+            network = network_info.get('scan_range', '192.168.1.0/24')
+            logger.info(f"Auto-detected network: {network}")
+
+        scan_progress.start_scan(network, 'protocols')
+
+        found = []
+        sweep = ProtocolScanner(timeout).scan_network_async(
+            network, protocols, rate, int(data.get('tcp_concurrency', DEFAULT_TCP_CONCURRENCY)),
+            broadcast=bool(data.get('broadcast', False)),  # KNX/BACnet by multicast/broadcast
+            window=float(data.get('window', DEFAULT_DISCOVERY_WINDOW))
+        )
+        for result in scan_loop.iterate(sweep):
+            found.append(result)
+            scan_progress.add_found_device(result)
+
+        scan_progress.finish_scan()
+
+        return jsonify({
+            'success': True,
+            'devices': found,
+            'total': len(found),
+            'protocols': [protocol.value for protocol in protocols],
+            'network': network
+        })
+
+    except Exception as e:
+        scan_progress.set_error(str(e))
+        logger.error(f"Error during protocol scan: {e}", exc_info=True)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/pcap-inventory', methods=['POST'])
+def api_pcap_inventory():
+    """
+    Passive inventory from packet captures
+    Reads pcap/pcapng files recorded on a mirror port from /share (paths
+    absolute or relative to it) and reports the Modbus, S7comm, KNX/IP and BACnet devices, their masters and
+    the register ranges in use - without sending anything to the network.
+    """
+    try:
+        data = request.json or {}
+        requested = data.get('paths') or [data.get('path')]
+        if not all(isinstance(path, str) and path for path in requested):
+            return jsonify({'success': False, 'error': 'Kein Mitschnitt angegeben'}), 400
+
+        # Relative paths are taken from CAPTURE_ROOT; nothing outside it is opened
+        paths = [os.path.realpath(os.path.join(CAPTURE_ROOT, path)) for path in requested]
+        for path, name in zip(paths, requested):
+            if os.path.commonpath([path, CAPTURE_ROOT]) != CAPTURE_ROOT:
+                return jsonify({
+                    'success': False,
+                    'error': f'Mitschnitte können nur aus {CAPTURE_ROOT} gelesen werden: {name}'
+                }), 403
+        missing = [name for path, name in zip(paths, requested) if not os.path.isfile(path)]
+        if missing:
+            return jsonify({'success': False, 'error': f'Mitschnitt nicht gefunden: {missing[0]}'}), 404
+
+        inventory = PassiveInventory(
+            modbus_ports=data.get('modbus_ports', [502]),
+            s7_ports=data.get('s7_ports', [102])
+        )
+        for path in paths:
+            inventory.ingest(path)
+        devices = [device_to_json(device) for device in inventory.devices()]
+
+        return jsonify({
+            'success': True,
+            'devices': devices,
+            'total': len(devices),
+            'stats': inventory.stats
+        })
+
+    except CaptureFormatError as e:
+        return jsonify({'success': False, 'error': f'Ungültiger Mitschnitt: {e.message}'}), 400
+    except Exception as e:
+        logger.error(f"Error reading capture: {e}", exc_info=True)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 @app.route('/api/scan-s7', methods=['POST'])
 def api_scan_s7():
     """
@@ -937,14 +1088,18 @@ def api_scan_s7():
         dst_tsap = data.get('dst_tsap')  # Optional, e.g., 0x2000
         timeout = data.get('timeout', 5)
         auto_add = data.get('auto_add', True)  # Automatically add to device list (default: True)
+        sweep = data.get('sweep', False)  # Try rack/slot combinations instead of one TSAP pair
 
         if not host:
             return jsonify({'error': 'Host is required'}), 400
 
         logger.info(f"Scanning {host}:{port} for S7 protocol...")
 
-        scanner = S7Scanner(host, port=port, timeout=timeout)
-        result = scanner.detect_s7_device(src_tsap=src_tsap, dst_tsap=dst_tsap)
+        scanner = AsyncS7Scanner(host, port=port, timeout=timeout)
+        if sweep:
+            result = scan_loop.run(scanner.sweep_tsaps(max_parallel=data.get('max_parallel', DEFAULT_TSAP_PARALLEL)))
+        else:
+            result = scan_loop.run(scanner.detect_s7_device(src_tsap=src_tsap, dst_tsap=dst_tsap))
 
         if result['success']:
             logger.info(f"S7 device detected: {host} - {result['device_type']}")
@@ -1016,7 +1171,7 @@ def api_scan_network_s7():
         logger.info(f"Starting S7 network scan on {network} (timeout: {timeout}s per host)...")
 
         # Perform S7 network scan
-        found_devices = S7Scanner.scan_network_for_s7(network, timeout=timeout)
+        found_devices = scan_loop.run(AsyncS7Scanner.scan_network(network, timeout=timeout))
 
         # Automatically add detected devices if requested
         added_count = 0
@@ -1065,6 +1220,60 @@ def api_scan_network_s7():
         }), 500
 
 
+@app.route('/api/s7/read', methods=['POST'])
+def api_s7_read():
+    """
+    Read LOGO! VM addresses (e.g. "V10", "VW12", "V10.3") over a pooled S7 session
+    Repeated calls reuse the established session instead of a new handshake.
+    """
+    if not SNAP7_AVAILABLE:
+        return jsonify({
+            'success': False,
+            'error': 'python-snap7 ist nicht installiert'
+        }), 501
+
+    try:
+        data = request.json or {}
+        host = data.get('host')
+        port = data.get('port', 102)
+        addresses = data.get('addresses') or []
+
+        if not host:
+            return jsonify({'success': False, 'error': 'Host is required'}), 400
+        if not addresses:
+            return jsonify({'success': False, 'error': 'Keine Adressen angegeben'}), 400
+
+        with s7_session_pool.acquire(host, port, data.get('tsap_src', 0x0100), data.get('tsap_dst', 0x2000)) as client:
+            values = client.read_multiple(addresses)
+            if not client.connected:
+                # Session dropped during the read; the pool reconnects on the next request
+                raise ModbusConnectionError(f'S7 session to {host}:{port} lost', {'host': host, 'port': port})
+
+        return jsonify({
+            'success': True,
+            'host': host,
+            'port': port,
+            'values': values,
+            'missing': [address for address in addresses if address not in values]
+        })
+
+    except ModbusConnectionError as e:
+        logger.warning(str(e))
+        return jsonify({
+            'success': False,
+            'error': f'S7-Verbindung zu {host}:{port} fehlgeschlagen'
+        }), 400
+    except Exception as e:
+        logger.error(f"Error reading S7 addresses: {e}", exc_info=True)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/s7/sessions', methods=['GET'])
+def api_s7_sessions():
+    """Get pooled S7 sessions"""
+    return jsonify({'success': True, 'sessions': s7_session_pool.stats() if S7_SCANNER_AVAILABLE else {}})
+
+
 @app.route('/api/detect-modbus-ports', methods=['POST'])
 def api_detect_modbus_ports():
     """
@@ -1131,6 +1340,9 @@ def api_scan_logo8():
             'total': total
         })
 
+    except HostUnavailableError as e:
+        logger.warning(str(e))
+        return host_unavailable_response(e)
     except Exception as e:
         logger.error(f"Error scanning LOGO! 8 device: {e}")
         return jsonify({'error': str(e)}), 500
@@ -1162,6 +1374,9 @@ def api_scan_logo0ba7():
             'total': total
         })
 
+    except HostUnavailableError as e:
+        logger.warning(str(e))
+        return host_unavailable_response(e)
     except Exception as e:
         logger.error(f"Error scanning LOGO! 0BA7 device: {e}")
         return jsonify({'error': str(e)}), 500
@@ -1194,6 +1409,9 @@ def api_scan_addresses():
             'total': len(results)
         })
 
+    except HostUnavailableError as e:
+        logger.warning(str(e))
+        return host_unavailable_response(e)
     except Exception as e:
         logger.error(f"Error scanning addresses: {e}")
         return jsonify({'error': str(e)}), 500
@@ -1220,11 +1438,38 @@ def api_test_connection():
             logger.warning(f"Connection test failed: {host}:{port}")
             return jsonify({'success': False, 'message': 'Connection failed'}), 400
 
+    except HostUnavailableError as e:
+        logger.warning(str(e))
+        return host_unavailable_response(e)
     except Exception as e:
         logger.error(f"Error testing connection: {e}")
         return jsonify({'error': str(e)}), 500
 
 
+# Function codes reported by register discovery: (result key, name)
+DISCOVERY_FUNCTIONS = [
+    ('discrete_inputs', 'Read Discrete Inputs (FC2)'),
+    ('coils', 'Read Coils (FC1)'),
+    ('input_registers', 'Read Input Registers (FC4)'),
+    ('holding_registers', 'Read Holding Registers (FC3)'),
+]
+
+
+def compile_discovery_plan(data, device_type):
+    """
+    Discovery plan for a request and the discovery cache scope of its register map
+
+    The plan comes from the request's manufacturer/model, else from the
+    detected device type.
+    """
+    manufacturer = data.get('manufacturer')
+    model = data.get('model')
+    if not (manufacturer and model) and device_type in DEVICE_TYPE_MAP:
+        manufacturer, model = DEVICE_TYPE_MAP[device_type]
+    plan = plan_compiler.compile(manufacturer, model)
+    return plan, f"discovery:{fingerprint_hash([list(block) for block in plan])}"
+
+
 @app.route('/api/discover-registers', methods=['POST'])
 def api_discover_registers():
     """
@@ -1242,178 +1487,259 @@ def api_discover_registers():
 
         logger.info(f"Starting register discovery on {host}:{port} (slave {slave_id})")
 
-        scanner = ModbusScanner(host, port)
+        refresh = data.get('refresh', False)
+        analysis = scan_loop.run(fingerprint_device(host, port, slave_id, refresh=refresh, mac=data.get('mac')))
+        if 'error' in analysis:
+            return host_unavailable_response(HostUnavailableError(analysis['error']['message'],
+                                                                  analysis['error']['details']))
+        if analysis['connection'] != 'success':
+            return jsonify({
+                'success': False,
+                'error': f'Verbindung zu {host}:{port} fehlgeschlagen'
+            }), 400
+
+        device_type = analysis['device_type']
+        detected_device = {
+            'LOGO_8': 'Siemens LOGO! 8',
+            'LOGO_0BA7': 'Siemens LOGO! 0BA7',
+            'GENERIC': 'Generic Modbus TCP'
+        }.get(device_type, 'Generic Modbus TCP')
+
+        # Test supported functions
+        supported_functions = []
+        register_ranges = {
+            'discrete_inputs': [],
+            'coils': [],
+            'input_registers': [],
+            'holding_registers': []
+        }
+        recommendations = []
+
+        # Recommendations based on device type
+        if device_type == 'LOGO_8':
+            recommendations.append('LOGO! 8 erkannt - Verwenden Sie Port 510 für Modbus TCP')
+            recommendations.append('Digital I/O: Register ab 8192 (DI) und 8256 (DO)')
+        elif device_type == 'LOGO_0BA7':
+            recommendations.append('LOGO! 0BA7 erkannt - Nur über S7comm unterstützt')
+        else:
+            recommendations.append('Standard Modbus-Gerät - Prüfen Sie die Dokumentation für Register-Adressen')
+
+        plan, scope = compile_discovery_plan(data, device_type)
+
+        # Probes are interleaved across function codes so an "illegal function"
+        # answer cancels the rest of that function code early
+        by_table = {table: [block for block in plan if block.table == table] for table in TABLE_KEYS}
+        probes = []
+        for round_index in range(max(len(blocks) for blocks in by_table.values())):
+            for blocks in by_table.values():
+                if round_index < len(blocks):
+                    probes.append(blocks[round_index])
+
+        # Reuse the register map of an unchanged device discovered with the same plan
+        identity = analysis['identity']
+        cached_map = None if refresh else discovery_cache.get_register_map(identity, port, slave_id, scope)
+        template_used = False
+        if cached_map is None and not refresh and data.get('reuse_template', False):
+            # Identical, already mapped device: verify its map at the boundaries only
+            cached_map = scan_loop.run(adopt_template(host, port, slave_id, analysis, scope))
+            template_used = cached_map is not None
+
+        if cached_map is not None:
+            results = [
+                (cached_map.get(block.table, IntervalSet()).covers(block.start, block.start + block.count), None)
+                for block in probes
+            ]
+        else:
+            # Probe all ranges as one pipelined batch
+            outcomes = scan_loop.run(AsyncRegisterScanner(host, port, slave_id).probe_ranges(
+                [(block.function_code, block.start, block.count) for block in probes]))
+            if outcomes is None:
+                return jsonify({
+                    'success': False,
+                    'error': f'Verbindung zu {host}:{port} fehlgeschlagen'
+                }), 400
+
+            results = []
+            register_map = {table: IntervalSet() for table in TABLE_KEYS}
+            for block, outcome in zip(probes, outcomes):
+                supported = outcome.data is not None
+                if outcome.exception_code is not None:
+                    error = f'Modbus exception 0x{outcome.exception_code:02X}'
+                elif not supported:
+                    error = 'Keine Antwort'
+                else:
+                    error = None
+                    register_map[block.table].add_range(block.start, block.start + block.count)
+                results.append((supported, error))
+            discovery_cache.put_register_map(identity, port, slave_id, scope, register_map)
+
+        for block, (supported, error) in zip(probes, results):
+            register_ranges[TABLE_KEYS[block.table]].append({
+                'range': f'{block.start}-{block.start + block.count - 1}',
+                'start': block.start,
+                'count': block.count,
+                'supported': supported,
+                'note': block.note if supported else 'Nicht lesbar',
+                'error': error
+            })
 
-        if not scanner.connect():
+        for key, function_name in DISCOVERY_FUNCTIONS:
+            if any(entry['supported'] for entry in register_ranges[key]):
+                supported_functions.append(function_name)
+
+        logger.info(f"Register discovery complete: {detected_device}, functions: {supported_functions}")
+
+        return jsonify({
+            'success': True,
+            'host': host,
+            'port': port,
+            'slave_id': slave_id,
+            'detected_device': detected_device,
+            'supported_functions': supported_functions,
+            'register_ranges': register_ranges,
+            'recommendations': recommendations,
+            'cached': cached_map is not None,
+            'template': template_used
+        })
+
+    except Exception as e:
+        logger.error(f"Error during register discovery: {e}", exc_info=True)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/profile-registers', methods=['POST'])
+def api_profile_registers():
+    """
+    Sample discovered registers, recommend a scan_interval per register and
+    infer register data types from the same samples
+    Uses the request's register_map ({table: [[start, end], ...]}) or the map
+    cached by /api/discover-registers. Pass the returned scan_intervals and
+    register_types in a device's config to /api/generate to apply them.
+    """
+    if not NUMPY_AVAILABLE:
+        return jsonify({'success': False, 'error': 'NumPy ist nicht installiert'}), 501
+
+    try:
+        data = request.json or {}
+        host = data.get('host')
+        port = data.get('port', 502)
+        slave_id = data.get('slave_id', 1)
+        samples = max(2, min(int(data.get('samples', DEFAULT_SAMPLES)), MAX_SAMPLES))
+        # Bound the whole run so a request cannot hold a worker for hours
+        interval = max(0.1, min(float(data.get('interval', DEFAULT_SAMPLE_INTERVAL)),
+                                MAX_PROFILE_DURATION / (samples - 1)))
+
+        if not host:
+            return jsonify({'success': False, 'error': 'Host is required'}), 400
+
+        if data.get('register_map'):
+            register_map = register_map_from_json(data['register_map'])
+        else:
+            analysis = scan_loop.run(fingerprint_device(host, port, slave_id, mac=data.get('mac')))
+            if 'error' in analysis:
+                return host_unavailable_response(HostUnavailableError(analysis['error']['message'],
+                                                                      analysis['error']['details']))
+            if analysis['connection'] != 'success':
+                return jsonify({
+                    'success': False,
+                    'error': f'Verbindung zu {host}:{port} fehlgeschlagen'
+                }), 400
+            _, scope = compile_discovery_plan(data, analysis['device_type'])
+            register_map = discovery_cache.get_register_map(analysis['identity'], port, slave_id, scope)
+            if not register_map or not any(register_map.values()):
+                return jsonify({
+                    'success': False,
+                    'error': 'Keine erkannten Register - bitte zuerst die Register-Erkennung ausführen'
+                }), 400
+
+        logger.info(f"Profiling registers on {host}:{port} ({samples} samples, {interval}s)")
+        sampled = RegisterProfiler(host, port, slave_id).sample(register_map, samples, interval)
+        if sampled is None:
             return jsonify({
                 'success': False,
                 'error': f'Verbindung zu {host}:{port} fehlgeschlagen'
             }), 400
 
-        try:
-            # Detect device type
-            device_type = scanner.detect_device_type(slave_id)
-            detected_device = {
-                'LOGO_8': 'Siemens LOGO! 8',
-                'LOGO_0BA7': 'Siemens LOGO! 0BA7',
-                'GENERIC': 'Generic Modbus TCP'
-            }.get(device_type, 'Generic Modbus TCP')
-
-            # Test supported functions
-            supported_functions = []
-            register_ranges = {
-                'discrete_inputs': [],
-                'coils': [],
-                'input_registers': [],
-                'holding_registers': []
+        report = profile_report(sampled)
+        scan_intervals = scan_interval_recommendations(report)
+        register_types = register_types_report(sampled)
+        return jsonify({
+            'success': True,
+            'host': host,
+            'port': port,
+            'slave_id': slave_id,
+            'samples': samples,
+            'interval': interval,
+            'profile': {
+                table: {str(address): entry for address, entry in entries.items()}
+                for table, entries in report.items()
+            },
+            'scan_intervals': {
+                table: {str(address): seconds for address, seconds in intervals.items()}
+                for table, intervals in scan_intervals.items()
+            },
+            'register_types': {
+                table: {str(address): typed for address, typed in types.items()}
+                for table, types in register_types.items()
             }
-            recommendations = []
-
-            # Define test ranges based on device type
-            if device_type == 'LOGO_8':
-                test_ranges = {
-                    'discrete_inputs': [(8192, 64, 'DI 1-64 (LOGO! 8)')],
-                    'coils': [(8256, 64, 'DO 1-64 (LOGO! 8)')],
-                    'input_registers': [(0, 50, 'AI 1-8 + AM (LOGO! 8)'), (528, 32, 'NAI/NAO (LOGO! 8)')],
-                    'holding_registers': [(0, 50, 'AQ + VM (LOGO! 8)'), (528, 32, 'NAQ (LOGO! 8)')]
-                }
-                recommendations.append('LOGO! 8 erkannt - Verwenden Sie Port 510 für Modbus TCP')
-                recommendations.append('Digital I/O: Register ab 8192 (DI) und 8256 (DO)')
-            elif device_type == 'LOGO_0BA7':
-                test_ranges = {
-                    'discrete_inputs': [(0, 24, 'I1-I24 (LOGO! 0BA7)')],
-                    'coils': [(0, 16, 'Q1-Q16 (LOGO! 0BA7)'), (16, 8, 'M1-M8 (LOGO! 0BA7)')],
-                    'input_registers': [(0, 8, 'AI1-AI8 (LOGO! 0BA7)')],
-                    'holding_registers': [(0, 8, 'AQ1-AQ2 + AM (LOGO! 0BA7)')]
-                }
-                recommendations.append('LOGO! 0BA7 erkannt - Nur über S7comm unterstützt')
-            else:
-                test_ranges = {
-                    'discrete_inputs': [(0, 100, 'Standard DI 0-99'), (1000, 100, 'Extended DI 1000-1099')],
-                    'coils': [(0, 100, 'Standard Coils 0-99'), (1000, 100, 'Extended Coils 1000-1099')],
-                    'input_registers': [(0, 100, 'Standard IR 0-99'), (1000, 100, 'Extended IR 1000-1099')],
-                    'holding_registers': [(0, 100, 'Standard HR 0-99'), (1000, 100, 'Extended HR 1000-1099')]
-                }
-                recommendations.append('Standard Modbus-Gerät - Prüfen Sie die Dokumentation für Register-Adressen')
+        })
 
-            # Test Discrete Inputs (Function Code 2)
-            for start, count, note in test_ranges['discrete_inputs']:
-                try:
-                    result = scanner.scan_discrete_inputs(start, min(count, 100), slave_id)
-                    supported = result is not None and len(result) > 0
-                    if supported and 'Read Discrete Inputs (FC2)' not in supported_functions:
-                        supported_functions.append('Read Discrete Inputs (FC2)')
-                    register_ranges['discrete_inputs'].append({
-                        'range': f'{start}-{start+count-1}',
-                        'start': start,
-                        'count': count,
-                        'supported': supported,
-                        'note': note if supported else 'Nicht lesbar',
-                        'error': None
-                    })
-                except Exception as e:
-                    register_ranges['discrete_inputs'].append({
-                        'range': f'{start}-{start+count-1}',
-                        'start': start,
-                        'count': count,
-                        'supported': False,
-                        'note': note,
-                        'error': str(e)
-                    })
-
-            # Test Coils (Function Code 1)
-            for start, count, note in test_ranges['coils']:
-                try:
-                    result = scanner.scan_coils(start, min(count, 100), slave_id)
-                    supported = result is not None and len(result) > 0
-                    if supported and 'Read Coils (FC1)' not in supported_functions:
-                        supported_functions.append('Read Coils (FC1)')
-                    register_ranges['coils'].append({
-                        'range': f'{start}-{start+count-1}',
-                        'start': start,
-                        'count': count,
-                        'supported': supported,
-                        'note': note if supported else 'Nicht lesbar',
-                        'error': None
-                    })
-                except Exception as e:
-                    register_ranges['coils'].append({
-                        'range': f'{start}-{start+count-1}',
-                        'start': start,
-                        'count': count,
-                        'supported': False,
-                        'note': note,
-                        'error': str(e)
-                    })
-
-            # Test Input Registers (Function Code 4)
-            for start, count, note in test_ranges['input_registers']:
-                try:
-                    result = scanner.scan_input_registers(start, min(count, 100), slave_id)
-                    supported = result is not None and len(result) > 0
-                    if supported and 'Read Input Registers (FC4)' not in supported_functions:
-                        supported_functions.append('Read Input Registers (FC4)')
-                    register_ranges['input_registers'].append({
-                        'range': f'{start}-{start+count-1}',
-                        'start': start,
-                        'count': count,
-                        'supported': supported,
-                        'note': note if supported else 'Nicht lesbar',
-                        'error': None
-                    })
-                except Exception as e:
-                    register_ranges['input_registers'].append({
-                        'range': f'{start}-{start+count-1}',
-                        'start': start,
-                        'count': count,
-                        'supported': False,
-                        'note': note,
-                        'error': str(e)
-                    })
-
-            # Test Holding Registers (Function Code 3)
-            for start, count, note in test_ranges['holding_registers']:
-                try:
-                    result = scanner.scan_holding_registers(start, min(count, 100), slave_id)
-                    supported = result is not None and len(result) > 0
-                    if supported and 'Read Holding Registers (FC3)' not in supported_functions:
-                        supported_functions.append('Read Holding Registers (FC3)')
-                    register_ranges['holding_registers'].append({
-                        'range': f'{start}-{start+count-1}',
-                        'start': start,
-                        'count': count,
-                        'supported': supported,
-                        'note': note if supported else 'Nicht lesbar',
-                        'error': None
-                    })
-                except Exception as e:
-                    register_ranges['holding_registers'].append({
-                        'range': f'{start}-{start+count-1}',
-                        'start': start,
-                        'count': count,
-                        'supported': False,
-                        'note': note,
-                        'error': str(e)
-                    })
+    except HostUnavailableError as e:
+        logger.warning(str(e))
+        return host_unavailable_response(e)
+    except Exception as e:
+        logger.error(f"Error profiling registers: {e}", exc_info=True)
+        return jsonify({'success': False, 'error': str(e)}), 500
 
-            logger.info(f"Register discovery complete: {detected_device}, functions: {supported_functions}")
 
-            return jsonify({
-                'success': True,
-                'host': host,
-                'port': port,
-                'slave_id': slave_id,
-                'detected_device': detected_device,
-                'supported_functions': supported_functions,
-                'register_ranges': register_ranges,
-                'recommendations': recommendations
-            })
+@app.route('/api/write-batch', methods=['POST'])
+def api_write_batch():
+    """
+    Write many coils and holding registers of one device
+    Contiguous addresses are sent as Write Multiple Coils/Registers requests
+    over the pooled connection. Body: {host, port, slave_id, verify,
+    writes: [{table: 'coil'|'holding', address, value}]}
+    """
+    try:
+        data = request.json or {}
+        host = data.get('host')
+        port = data.get('port', 502)
+        slave_id = data.get('slave_id', 1)
+        writes = data.get('writes') or []
+
+        if not host:
+            return jsonify({'success': False, 'error': 'Host is required'}), 400
+        if not writes:
+            return jsonify({'success': False, 'error': 'Keine Schreibvorgänge angegeben'}), 400
 
-        finally:
-            scanner.disconnect()
+        writer = BulkWriter(host, port, slave_id, timeout=float(data.get('timeout', 2)))
+        results = writer.write(writes, verify=bool(data.get('verify', False)))
+        failed = [result for result in results if not result['success'] or result['verified'] is False]
+        return jsonify({
+            'success': not failed,
+            'host': host,
+            'port': port,
+            'slave_id': slave_id,
+            'written': sum(1 for result in results if result['success']),
+            'failed': len(failed),
+            'results': results
+        })
 
+    except HostUnavailableError as e:
+        logger.warning(str(e))
+        return host_unavailable_response(e)
+    except ModbusWriteError as e:
+        response = create_error_response(e)
+        response['error'] = f'Ungültiger Schreibauftrag: {e.message}'
+        return jsonify(response), 400
+    except ModbusConnectionError as e:
+        logger.warning(str(e))
+        return jsonify({
+            'success': False,
+            'error': f'Verbindung zu {host}:{port} fehlgeschlagen'
+        }), 400
     except Exception as e:
-        logger.error(f"Error during register discovery: {e}", exc_info=True)
+        logger.error(f"Error writing batch: {e}", exc_info=True)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
@@ -1438,29 +1764,33 @@ def api_generate_config():
 
         # Add all devices
         added_count = 0
-        for device in devices:
-            scan_results = None
-
-            # Optionally scan device
-            if include_scan:
-                try:
-                    manufacturer = device.get('manufacturer')
-                    model = device.get('model')
-                    profile = get_device_profile(manufacturer, model)
-
-                    scanner = ModbusScanner(
-                        device['host'],
-                        device.get('port', 502)
-                    )
-                    scan_results = scanner.scan_device(
-                        profile,
-                        device.get('slave_id', 1)
-                    )
-                except Exception as e:
-                    logger.warning(f"Scan failed for {device['name']}: {e}")
-
-            if config_generator.add_device(device, scan_results):
-                added_count += 1
+        if include_scan:
+            # Scan all devices concurrently; results arrive in device order
+            limiter = ConnectionLimiter(
+                data.get('max_concurrency', DEFAULT_MAX_CONCURRENCY),
+                data.get('per_host_connections', DEFAULT_PER_HOST_CONNECTIONS)
+            )
+            deadline = data.get('scan_deadline', DEFAULT_DEVICE_DEADLINE)
+            refresh = data.get('refresh', False)
+            reuse_template = data.get('reuse_template', False)
+
+            async def scan(device):
+                manufacturer, model = device.get('manufacturer'), device.get('model')
+                return await scan_device_cached(
+                    device['host'], device.get('port', 502), device.get('slave_id', 1),
+                    get_device_profile(manufacturer, model), f"scan:{manufacturer}/{model}",
+                    refresh=refresh, mac=device.get('mac'), reuse_template=reuse_template)
+
+            scans = run_ordered(list(devices), scan, lambda d: d['host'], limiter, deadline)
+            for device, scan_results in scan_loop.iterate(scans):
+                if scan_results is None:
+                    logger.warning(f"Scan failed for {device['name']}")
+                if config_generator.add_device(device, scan_results):
+                    added_count += 1
+        else:
+            for device in devices:
+                if config_generator.add_device(device, None):
+                    added_count += 1
 
         if added_count == 0:
             return jsonify({
@@ -1520,6 +1850,59 @@ def api_get_config():
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/verify-config', methods=['POST'])
+def api_verify_config():
+    """
+    Check that every entity of the generated configuration responds
+    Reads the config at MODBUS_CONFIG_PATH (or the request's 'config' YAML),
+    verifies all hubs concurrently with coalesced block reads and reports
+    each entity as readable, out_of_range, error or dead.
+    """
+    try:
+        data = request.json or {}
+        if data.get('config'):
+            text = data['config']
+        elif os.path.exists(MODBUS_CONFIG_PATH):
+            with open(MODBUS_CONFIG_PATH, 'r') as f:
+                text = f.read()
+        else:
+            return jsonify({
+                'success': False,
+                'error': 'Keine Konfiguration gefunden. Bitte zuerst generieren.'
+            }), 404
+
+        hubs = load_hubs(text)
+        timeout = float(data.get('timeout', 2))
+        limiter = ConnectionLimiter(
+            data.get('max_concurrency', DEFAULT_MAX_CONCURRENCY),
+            data.get('per_host_connections', DEFAULT_PER_HOST_CONNECTIONS)
+        )
+        deadline = data.get('deadline', DEFAULT_DEVICE_DEADLINE)
+
+        reports = []
+        verifications = run_ordered(hubs, lambda hub: verify_hub(hub, timeout), lambda hub: hub['host'],
+                                    limiter, deadline)
+        for hub, report in scan_loop.iterate(verifications):
+            reports.append(report if report is not None else unverified_hub(hub))
+
+        summary = {}
+        for report in reports:
+            for status, count in report['summary'].items():
+                summary[status] = summary.get(status, 0) + count
+
+        return jsonify({
+            'success': True,
+            'summary': summary,
+            'hubs': reports
+        })
+
+    except ConfigurationError as e:
+        return jsonify({'success': False, 'error': f'Ungültige Konfiguration: {e.message}'}), 400
+    except Exception as e:
+        logger.error(f"Error verifying config: {e}", exc_info=True)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 @app.route('/api/check-devices-in-config', methods=['GET'])
 def api_check_devices_in_config():
     """Check which devices are present in the generated configuration"""
@@ -1604,29 +1987,22 @@ def api_auto_scanner_configure():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
-def detect_device_type_for_host(host, port, slave_id=1):
-    """Detect device type for a specific host using ModbusScanner"""
-    try:
-        scanner = ModbusScanner(host, port, timeout=3)
-        if scanner.connect():
-            device_type = scanner.detect_device_type(slave_id)
-            scanner.disconnect()
-
-            # Map device type to manufacturer/model
-            type_map = {
-                'LOGO_8': ('Siemens', 'LOGO! 8'),
-                'LOGO_0BA7': ('Siemens', 'LOGO! 0BA7'),
-                'S7': ('Siemens', 'S7 PLC'),
-            }
+# Map detected device type to manufacturer/model
+DEVICE_TYPE_MAP = {
+    'LOGO_8': ('Siemens', 'LOGO! 8'),
+    'LOGO_0BA7': ('Siemens', 'LOGO! 0BA7'),
+    'S7': ('Siemens', 'S7 PLC'),
+}
 
-            if device_type in type_map:
-                return {
-                    'device_type': device_type,
-                    'manufacturer': type_map[device_type][0],
-                    'model': type_map[device_type][1]
-                }
-    except Exception as e:
-        logger.debug(f"Device detection failed for {host}:{port}: {e}")
+
+def describe_detected_type(device_type):
+    """Build the detection result for a device type string"""
+    if device_type in DEVICE_TYPE_MAP:
+        return {
+            'device_type': device_type,
+            'manufacturer': DEVICE_TYPE_MAP[device_type][0],
+            'model': DEVICE_TYPE_MAP[device_type][1]
+        }
 
     return {
         'device_type': 'GENERIC',
@@ -1635,10 +2011,22 @@ def detect_device_type_for_host(host, port, slave_id=1):
     }
 
 
-def perform_network_scan(network=None, port_range='502,510', use_nmap=False, auto_add=True):
+def detect_device_type_for_host(host, port, slave_id=1):
+    """Detect device type for a specific host using ModbusScanner"""
+    try:
+        scanner = ModbusScanner(host, port, timeout=3)
+        return describe_detected_type(scanner.detect_device_type(slave_id))
+    except Exception as e:
+        logger.debug(f"Device detection failed for {host}:{port}: {e}")
+
+    return describe_detected_type('GENERIC')
+
+
+def perform_network_scan(network=None, port_range='502,510', use_nmap=False, auto_add=True, use_async=True):
     """
     Unified scan function for auto-scanner with device detection.
     Used by both auto-scanner start and manual trigger endpoints.
+    With use_async the port sweep and device detection run concurrently on the scan loop.
     """
     found_devices = []
 
@@ -1669,16 +2057,22 @@ def perform_network_scan(network=None, port_range='502,510', use_nmap=False, aut
         )
     else:
         ports = [int(p) for p in port_range.split(',') if p.isdigit()][:5]
-        found_devices = NetworkScanner.scan_network(network, ports, timeout=1)
+        if use_async:
+            found_devices = scan_loop.run(AsyncNetworkScanner.scan_network(network, ports, timeout=1, auto_detect=False))
+        else:
+            found_devices = NetworkScanner.scan_network(network, ports, timeout=1, auto_detect=False)
 
     # Detect device types for all found devices
-    for device in found_devices:
+    targets = [(d.get('ip'), d.get('port', 502), d.get('slave_id', 1)) for d in found_devices]
+    if use_async:
+        detections = [describe_detected_type(t) for t in scan_loop.run(detect_device_types(targets))]
+    else:
+        detections = [detect_device_type_for_host(host, port, slave_id) for host, port, slave_id in targets]
+
+    for device, detection in zip(found_devices, detections):
         host = device.get('ip')
         port = device.get('port', 502)
-        slave_id = device.get('slave_id', 1)
 
-        # Try to detect device type
-        detection = detect_device_type_for_host(host, port, slave_id)
         device['device_type'] = detection['device_type']
         device['manufacturer'] = detection['manufacturer']
         device['model'] = detection['model']
@@ -1753,6 +2147,25 @@ def api_auto_scanner_trigger():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@app.route('/api/host-health', methods=['GET'])
+def api_host_health():
+    """Get circuit breaker state of hosts with recent timeouts"""
+    return jsonify({
+        'success': True,
+        'hosts': host_health.snapshot(),
+        'failure_threshold': host_health.failure_threshold,
+        'reset_timeout': host_health.reset_timeout
+    })
+
+
+@app.route('/api/host-health/reset', methods=['POST'])
+def api_host_health_reset():
+    """Close the circuit of one host (or all hosts) so it is probed again"""
+    host = (request.json or {}).get('host') if request.is_json else None
+    host_health.reset(host)
+    return jsonify({'success': True, 'host': host})
+
+
 # ============================================================================
 # Manufacturer Database API Endpoints
 # ============================================================================
@@ -1829,32 +2242,38 @@ def api_auto_generate_all():
             'errors': []
         }
 
-        # Process each configured device
-        for device in devices:
+        # Analysis stage: fingerprint all devices concurrently (one connection each)
+        refresh = data.get('refresh', False)
+        limiter = ConnectionLimiter(
+            data.get('max_concurrency', DEFAULT_MAX_CONCURRENCY),
+            data.get('per_host_connections', DEFAULT_PER_HOST_CONNECTIONS)
+        )
+        deadline = data.get('scan_deadline', DEFAULT_DEVICE_DEADLINE)
+
+        async def analyze(device):
+            return await fingerprint_device(
+                device['host'], device.get('port', 502), device.get('slave_id', 1), refresh=refresh)
+
+        analyses = run_ordered(list(devices), analyze, lambda d: d['host'], limiter, deadline)
+        for device, analysis in scan_loop.iterate(analyses):
             device_result = {
                 'name': device.get('name'),
                 'host': device.get('host'),
                 'port': device.get('port', 502)
             }
 
-            try:
-                # Test connection and analyze registers
-                scanner = ModbusScanner(device['host'], device.get('port', 502))
-                if scanner.connect():
-                    try:
-                        device_type = scanner.detect_device_type(device.get('slave_id', 1))
-                        device_result['device_type'] = device_type
-                        device_result['connection'] = 'success'
-                        results['scanned_devices'].append(device_result)
-                    finally:
-                        scanner.disconnect()
-                else:
-                    device_result['connection'] = 'failed'
-                    results['errors'].append(f"Could not connect to {device['host']}")
-
-            except Exception as e:
-                device_result['error'] = str(e)
-                results['errors'].append(f"Error scanning {device['host']}: {e}")
+            if analysis is None:
+                device_result['connection'] = 'timeout'
+                device_result['error'] = f"No answer within {deadline}s"
+                results['errors'].append(f"Timeout scanning {device['host']}")
+            elif analysis['connection'] == 'success':
+                device_result['device_type'] = analysis['device_type']
+                device_result['connection'] = 'success'
+                device_result['cached'] = analysis['cached']
+                results['scanned_devices'].append(device_result)
+            else:
+                device_result['connection'] = 'failed'
+                results['errors'].append(f"Could not connect to {device['host']}")
 
         # Generate Modbus config if devices exist and option enabled
         if generate_modbus and devices:
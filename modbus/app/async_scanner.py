@@ -0,0 +1,831 @@
+"""
+Asyncio Modbus discovery backend
+Async variants of ModbusScanner, RegisterScanner and NetworkScanner that return
+the same result structures, so one event loop can fingerprint and map
+registers on hundreds of devices at once.
+
+Synchronous callers (Flask endpoints, AutoScanner) drive the coroutines through
+the dedicated loop thread in `scan_loop`.
+"""
+
+import asyncio
+import ipaddress
+import logging
+import queue
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+from modbus_codec import (
+    AsyncNativeModbusClient, ReadOutcome, function_limit, DEFAULT_MAX_IN_FLIGHT, MAX_PIPELINE_DEPTH,
+    READ_COILS, READ_DISCRETE_INPUTS, READ_HOLDING_REGISTERS, READ_INPUT_REGISTERS
+)
+from register_scanner import RegisterType
+from discovery_cache import DiscoveryCache, discovery_cache, fingerprint_hash
+from register_map import (
+    IntervalSet, RegisterStatus, RegisterStatusMap, boundary_probes, register_map_from_scan
+)
+from discovery_plan import TABLE_FUNCTIONS
+from ping_scanner import get_mac_from_ip
+from host_health import GuardedClient, host_health
+from modbus_exceptions import HostUnavailableError
+
+logger = logging.getLogger(__name__)
+
+# Default cap on simultaneously open connections for network-wide scans
+DEFAULT_MAX_CONCURRENCY = 128
+
+# Simultaneous connections per host (small PLCs such as LOGO! only accept a few)
+DEFAULT_PER_HOST_CONNECTIONS = 1
+
+# Upper bound for one device scan so an unreachable device cannot stall a batch
+DEFAULT_DEVICE_DEADLINE = 15
+
+# Cheap verification read per device type: (register type, address, count)
+VERIFY_READS = {
+    'LOGO_8': ('coil', 8192, 1),
+    'LOGO_0BA7': ('coil', 8192, 1),
+    'GENERIC': ('holding_register', 0, 1),
+}
+
+
+class AsyncLoopThread:
+    """
+    Runs one asyncio event loop in a daemon thread
+
+    Thread-safe entry point for synchronous code; the loop is started lazily
+    on first use and lives for the lifetime of the process.
+    """
+
+    def __init__(self, name: str = 'modbus-scan-loop'):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """Get the event loop, starting the thread if needed"""
+        with self._lock:
+            if self._loop is None or not self._thread.is_alive():
+                ready = threading.Event()
+
+                def run():
+                    self._loop = asyncio.new_event_loop()
+                    asyncio.set_event_loop(self._loop)
+                    ready.set()
+                    self._loop.run_forever()
+
+                self._thread = threading.Thread(target=run, name=self.name, daemon=True)
+                self._thread.start()
+                ready.wait()
+                logger.info(f"Started async scan loop thread '{self.name}'")
+            return self._loop
+
+    def submit(self, coro):
+        """Schedule a coroutine and return a concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout: Optional[float] = None):
+        """Run a coroutine on the loop thread and block until it finishes"""
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except Exception:
+            future.cancel()
+            raise
+
+    def iterate(self, agen: AsyncIterator) -> Iterator:
+        """Consume an async generator on the loop thread, yielding its items synchronously"""
+        items = queue.Queue()
+        done = object()
+
+        async def pump():
+            try:
+                async for item in agen:
+                    items.put(item)
+            finally:
+                items.put(done)
+
+        future = self.submit(pump())
+        while True:
+            item = items.get()
+            if item is done:
+                break
+            yield item
+        # Re-raise errors from the generator
+        future.result()
+
+
+class ConnectionLimiter:
+    """Global concurrency cap combined with a per-host connection limit"""
+
+    def __init__(self, max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 per_host: int = DEFAULT_PER_HOST_CONNECTIONS):
+        self.per_host = max(1, per_host)
+        self._global = asyncio.Semaphore(max(1, max_concurrency))
+        self._hosts: Dict[str, asyncio.Semaphore] = {}
+
+    @asynccontextmanager
+    async def slot(self, host: str):
+        """Hold one global and one per-host slot"""
+        host_semaphore = self._hosts.setdefault(host, asyncio.Semaphore(self.per_host))
+        async with host_semaphore:
+            async with self._global:
+                yield
+
+
+async def run_ordered(items: List, scan: Callable[[Dict], Awaitable], host_key: Callable[[Dict], str],
+                      limiter: Optional[ConnectionLimiter] = None,
+                      deadline: float = DEFAULT_DEVICE_DEADLINE) -> AsyncIterator[Tuple[Dict, Optional[object]]]:
+    """
+    Run scan(item) for all items concurrently and yield (item, result) in input order
+
+    Each item is streamed as soon as it and all items before it are finished.
+    Failed or timed out scans yield None instead of stalling the batch.
+
+    Args:
+        items: Devices to scan
+        scan: Coroutine function taking one item
+        host_key: Returns the host an item connects to (for the per-host limit)
+        limiter: Connection limiter, a default one is created if None
+        deadline: Seconds allowed per item once it holds a connection slot
+    """
+    limiter = limiter or ConnectionLimiter()
+
+    async def run_one(item):
+        try:
+            async with limiter.slot(host_key(item)):
+                return await asyncio.wait_for(scan(item), deadline)
+        except asyncio.TimeoutError:
+            logger.warning(f"Scan of {host_key(item)} exceeded {deadline}s deadline")
+        except Exception as e:
+            logger.warning(f"Scan of {host_key(item)} failed: {e}")
+        return None
+
+    tasks = [asyncio.ensure_future(run_one(item)) for item in items]
+    try:
+        for item, task in zip(items, tasks):
+            yield item, await task
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def gather_limited(coros, max_concurrency: int = DEFAULT_MAX_CONCURRENCY) -> List:
+    """Await coroutines with at most max_concurrency running at once (results in order)"""
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def limited(coro):
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(*(limited(c) for c in coros))
+
+
+class AsyncModbusScanner:
+    """Async counterpart of ModbusScanner built on pymodbus AsyncModbusTcpClient"""
+
+    def __init__(self, host, port=502, timeout=3):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.client = None
+
+    @staticmethod
+    def lg8add(logo_modbustcp_address: int) -> int:
+        """LOGO! 8 uses a +1 Modbus TCP address offset"""
+        return logo_modbustcp_address - 1
+
+    async def connect(self):
+        """
+        Connect to Modbus device
+
+        Raises:
+            HostUnavailableError: the host's circuit breaker is open
+        """
+        host_health.check(self.host)
+        try:
+            from pymodbus.client import AsyncModbusTcpClient
+
+            # No automatic reconnects or retries: discovery wants fast answers
+            client = AsyncModbusTcpClient(
+                self.host,
+                port=self.port,
+                timeout=self.timeout,
+                retries=0,
+                reconnect_delay=0
+            )
+            started = time.monotonic()
+            connected = await client.connect()
+            self.client = GuardedClient(client, self.host, host_health)
+            if connected:
+                host_health.record_connect(self.host)
+                logger.info(f"Connected to {self.host}:{self.port}")
+                return True
+            logger.error(f"Failed to connect to {self.host}:{self.port}")
+            if time.monotonic() - started >= self.timeout:
+                host_health.record_failure(self.host, 'connect timeout')
+            return False
+        except Exception as e:
+            logger.error(f"Connection error: {e}")
+            return False
+
+    async def disconnect(self):
+        """Disconnect from Modbus device"""
+        if self.client:
+            try:
+                self.client.close()
+                logger.info(f"Disconnected from {self.host}:{self.port}")
+            except Exception:
+                pass
+
+    async def _read(self, reg_type: str, address: int, count: int, slave: int):
+        """Issue one read; returns the bits/registers list or None on error"""
+        method, attr = {
+            'coil': ('read_coils', 'bits'),
+            'discrete_input': ('read_discrete_inputs', 'bits'),
+            'holding_register': ('read_holding_registers', 'registers'),
+            'input_register': ('read_input_registers', 'registers'),
+        }[reg_type]
+        try:
+            result = await getattr(self.client, method)(address, count, slave=slave)
+            if not result.isError() and hasattr(result, attr):
+                return getattr(result, attr)[:count]
+        except Exception as e:
+            logger.debug(f"Error reading {reg_type} at {address} from {self.host}: {e}")
+        return None
+
+    async def read_identification(self, slave: int = 1) -> Dict[str, str]:
+        """
+        Read basic device identification (FC43/14)
+
+        Returns:
+            Dict with vendor, product_code and revision; empty if unsupported
+        """
+        try:
+            result = await self.client.read_device_information(slave=slave)
+            information = getattr(result, 'information', None)
+            if result.isError() or not information:
+                return {}
+        except Exception as e:
+            logger.debug(f"Device identification not available on {self.host}: {e}")
+            return {}
+
+        def text(object_id):
+            value = information.get(object_id, b'')
+            return value.decode('ascii', 'replace') if isinstance(value, bytes) else str(value)
+
+        return {'vendor': text(0), 'product_code': text(1), 'revision': text(2)}
+
+    async def _scan(self, reg_type: str, start_address: int, count: int, slave: int) -> List[Dict]:
+        values = await self._read(reg_type, start_address, count, slave)
+        if values is None:
+            return []
+        logger.info(f"Found {len(values)} {reg_type}s starting at {start_address}")
+        return [
+            {'address': start_address + i, 'value': value, 'type': reg_type}
+            for i, value in enumerate(values)
+        ]
+
+    async def scan_coils(self, start_address=0, count=100, slave=1):
+        """Scan coils (digital outputs)"""
+        return await self._scan('coil', start_address, count, slave)
+
+    async def scan_discrete_inputs(self, start_address=0, count=100, slave=1):
+        """Scan discrete inputs (digital inputs)"""
+        return await self._scan('discrete_input', start_address, count, slave)
+
+    async def scan_holding_registers(self, start_address=0, count=100, slave=1):
+        """Scan holding registers"""
+        return await self._scan('holding_register', start_address, count, slave)
+
+    async def scan_input_registers(self, start_address=0, count=100, slave=1):
+        """Scan input registers"""
+        return await self._scan('input_register', start_address, count, slave)
+
+    async def scan_device(self, profile=None, slave=1):
+        """Scan device based on profile or generic scan (same result as ModbusScanner.scan_device)"""
+        results = {
+            'coils': [],
+            'discrete_inputs': [],
+            'holding_registers': [],
+            'input_registers': []
+        }
+
+        if not await self.connect():
+            return results
+
+        try:
+            if profile and 'registers' in profile:
+                registers = profile['registers']
+                reads = {}
+
+                if 'digital_outputs' in registers:
+                    reg = registers['digital_outputs']
+                    reads['coils'] = self.scan_coils(reg.get('start_address', 0), reg.get('count', 20), slave)
+                if 'digital_inputs' in registers:
+                    reg = registers['digital_inputs']
+                    reads['discrete_inputs'] = self.scan_discrete_inputs(
+                        reg.get('start_address', 0), reg.get('count', 24), slave)
+                if 'analog_outputs' in registers or 'holding_registers' in registers:
+                    reg = registers['analog_outputs' if 'analog_outputs' in registers else 'holding_registers']
+                    reads['holding_registers'] = self.scan_holding_registers(
+                        reg.get('start_address', 0), reg.get('count', 10), slave)
+                if 'analog_inputs' in registers or 'input_registers' in registers:
+                    reg = registers['analog_inputs' if 'analog_inputs' in registers else 'input_registers']
+                    reads['input_registers'] = self.scan_input_registers(
+                        reg.get('start_address', 0), reg.get('count', 10), slave)
+
+                # pymodbus matches replies by transaction id, so the reads share one connection
+                for key, value in zip(reads.keys(), await asyncio.gather(*reads.values())):
+                    results[key] = value
+            else:
+                (results['coils'], results['discrete_inputs'],
+                 results['holding_registers'], results['input_registers']) = await asyncio.gather(
+                    self.scan_coils(0, 100, slave),
+                    self.scan_discrete_inputs(0, 100, slave),
+                    self.scan_holding_registers(0, 100, slave),
+                    self.scan_input_registers(0, 100, slave)
+                )
+
+                # Try Siemens LOGO! specific addresses if nothing found
+                if not any(results.values()):
+                    logger.info("Trying Siemens LOGO! specific addresses...")
+                    (results['discrete_inputs'], results['input_registers'], results['coils']) = await asyncio.gather(
+                        self.scan_discrete_inputs(1, 24, slave),
+                        self.scan_input_registers(1, 8, slave),
+                        self.scan_coils(8193, 20, slave)  # 0x2001
+                    )
+        finally:
+            await self.disconnect()
+
+        return results
+
+    async def detect_device_type(self, slave=1, connected=False):
+        """
+        Automatically detect device type by testing specific addresses
+        Returns: 'LOGO_8', 'LOGO_0BA7', 'GENERIC' or 'UNKNOWN'
+
+        Args:
+            slave: Unit id
+            connected: Reuse the current connection instead of opening one
+        """
+        if not connected and not await self.connect():
+            return 'UNKNOWN'
+
+        try:
+            lg = self.lg8add
+            # All signature reads are independent, so issue them together
+            q1, vm, am, marker, q16, hr0 = await asyncio.gather(
+                self._read('coil', lg(8193), 1, slave),
+                self._read('holding_register', lg(1), 1, slave),
+                self._read('holding_register', lg(529), 1, slave),
+                self._read('coil', lg(8255), 1, slave),
+                self._read('coil', lg(8209), 1, slave),
+                self._read('holding_register', 0, 1, slave)
+            )
+
+            if q1 is not None and vm is not None:
+                if am is not None:
+                    logger.info("Device detected as: LOGO! 8")
+                    return 'LOGO_8'
+                if marker is not None and q16 is not None:
+                    logger.info("Device detected as: LOGO! 0BA7")
+                    return 'LOGO_0BA7'
+
+            if hr0 is not None:
+                logger.info("Device detected as: Generic Modbus")
+                return 'GENERIC'
+
+        except Exception as e:
+            logger.debug(f"Error during device detection: {e}")
+        finally:
+            if not connected:
+                await self.disconnect()
+
+        return 'UNKNOWN'
+
+    async def auto_scan_device(self, slave=1):
+        """Automatically scan device and return all found data with device type"""
+        device_type = await self.detect_device_type(slave)
+
+        results = {
+            'device_type': device_type,
+            'registers': {}
+        }
+
+        if device_type in ('LOGO_8', 'LOGO_0BA7'):
+            results['registers'] = await self.scan_logo_addresses(device_type, slave)
+        elif device_type == 'GENERIC':
+            results['registers'] = await self.scan_device(None, slave)
+
+        return results
+
+    async def test_connection(self):
+        """Test connection to device"""
+        if await self.connect():
+            await self.disconnect()
+            return True
+        return False
+
+    @staticmethod
+    def _logo_points(device_type: str) -> List[Tuple]:
+        """
+        Address plan of ModbusScanner.scan_logo8_addresses / scan_logo0ba7_addresses
+
+        Returns:
+            (bucket, name, reg_type, documented address, extra fields) tuples
+        """
+        is_logo8 = device_type == 'LOGO_8'
+        points = []
+        input_prefix = 'DI' if is_logo8 else 'I'
+        for addr in range(1, 25):
+            points.append(('digital_inputs', f'{input_prefix}{addr}', 'discrete_input', addr, {}))
+        for i in range(20 if is_logo8 else 16):
+            points.append(('digital_outputs', f'Q{i + 1}', 'coil', 8193 + i, {}))
+        if not is_logo8:
+            for i in range(24):
+                points.append(('marker_bits', f'M{i + 1}', 'coil', 8255 + i, {}))
+        for i in range(1, 9):
+            points.append(('analog_inputs', f'AI{i}', 'input_register', i, {'method': 'direct'}))
+            points.append(('analog_inputs', f'AI{i}_VM', 'holding_register', (i - 1) * 2 + 1,
+                           {'method': 'vm_mapping'}))
+            if is_logo8:
+                points.append(('analog_inputs', f'AM{i}', 'holding_register', 528 + i,
+                               {'method': 'am_mapping'}))
+        for i in range(1, 9 if is_logo8 else 3):
+            points.append(('analog_outputs', f'AQ{i}', 'holding_register', 1024 + i, {}))
+        vm_addresses = ([0, 2, 4, 6, 8, 10, 100, 200, 300, 400, 500, 600, 700, 800, 850] if is_logo8 else
+                        [0, 2, 4, 6, 8, 10, 20, 40, 60, 80, 100, 200, 300, 400, 500, 600, 700, 800, 850])
+        for vm_addr in vm_addresses:
+            points.append(('vm_memory', f'VW{vm_addr}', 'holding_register', vm_addr + 1, {}))
+        return points
+
+    async def scan_logo_addresses(self, device_type: str, slave=1):
+        """Detailed LOGO! 8 / 0BA7 scan with the same result layout as the sync scanner"""
+        results = {
+            'digital_inputs': [],
+            'digital_outputs': [],
+            'analog_inputs': [],
+            'analog_outputs': [],
+            'vm_memory': []
+        }
+        if device_type != 'LOGO_8':
+            results['marker_bits'] = []
+
+        if not await self.connect():
+            return results
+
+        try:
+            points = self._logo_points(device_type)
+            values = await asyncio.gather(*(
+                self._read(reg_type, self.lg8add(addr), 1, slave)
+                for _, _, reg_type, addr, _ in points
+            ))
+            for (bucket, name, reg_type, addr, extra), value in zip(points, values):
+                if value is None:
+                    continue
+                entry = {
+                    'address': addr,
+                    'modbus_address': self.lg8add(addr),
+                    'name': name,
+                    'value': value[0],
+                    'type': reg_type
+                }
+                entry.update(extra)
+                results[bucket].append(entry)
+        finally:
+            await self.disconnect()
+
+        total = sum(len(v) for v in results.values())
+        logger.info(f"LOGO! scan complete ({device_type}): {total} addresses found")
+        return results
+
+
+class AsyncRegisterScanner:
+    """Async counterpart of RegisterScanner using the native pipelined codec"""
+
+    def __init__(self, host: str, port: int = 502, slave_id: int = 1, timeout: int = 2,
+                 max_in_flight: int = DEFAULT_MAX_IN_FLIGHT):
+        self.host = host
+        self.port = port
+        self.slave_id = slave_id
+        self.timeout = timeout
+        self.max_in_flight = max_in_flight
+
+    async def scan_all_registers(
+        self,
+        coil_range: Tuple[int, int] = (0, 100),
+        discrete_range: Tuple[int, int] = (0, 100),
+        input_range: Tuple[int, int] = (0, 100),
+        holding_range: Tuple[int, int] = (0, 100),
+        batch_size: int = 10
+    ) -> Dict[RegisterType, RegisterStatusMap]:
+        """Scan all register types over one connection (same result as RegisterScanner)"""
+        plan = [
+            (RegisterType.COIL, READ_COILS, coil_range),
+            (RegisterType.DISCRETE_INPUT, READ_DISCRETE_INPUTS, discrete_range),
+            (RegisterType.INPUT_REGISTER, READ_INPUT_REGISTERS, input_range),
+            (RegisterType.HOLDING_REGISTER, READ_HOLDING_REGISTERS, holding_range),
+        ]
+        results = {reg_type: RegisterStatusMap() for reg_type, _, _ in plan}
+        types_by_function = {function_code: reg_type for reg_type, function_code, _ in plan}
+
+        requests = []
+        for _, function_code, (start, end) in plan:
+            size = max(1, min(batch_size, function_limit(function_code)))
+            requests.extend((function_code, addr, min(size, end - addr)) for addr in range(start, end, size))
+
+        logger.info(f"Starting async register scan for {self.host}:{self.port}")
+        async with AsyncNativeModbusClient(self.host, self.port, self.timeout, self.slave_id) as client:
+            if client.sock is None:
+                logger.error(f"Failed to connect to {self.host}:{self.port}")
+                return results
+            outcomes = await client.read_pipelined(requests, max_in_flight=self.max_in_flight)
+
+        for outcome in outcomes:
+            status = RegisterStatus.AVAILABLE if outcome.data is not None else RegisterStatus.ERROR
+            results[types_by_function[outcome.function_code]].set_range(
+                outcome.address, outcome.address + outcome.count, status
+            )
+
+        total_available = sum(len(regs.available) for regs in results.values())
+        logger.info(f"Register scan complete. Found {total_available} available registers.")
+        return results
+
+    async def probe_ranges(self, requests: List[Tuple[int, int, int]],
+                           max_in_flight: int = MAX_PIPELINE_DEPTH) -> Optional[List[ReadOutcome]]:
+        """
+        Run a discovery plan as one pipelined batch
+
+        Function codes answered with "illegal function" are cancelled for the
+        rest of the plan, so order requests round-robin across function codes.
+
+        Args:
+            requests: (function_code, address, count) tuples
+            max_in_flight: Requests in flight at once
+
+        Returns:
+            One ReadOutcome per request, or None if the device is unreachable
+        """
+        try:
+            async with AsyncNativeModbusClient(self.host, self.port, self.timeout, self.slave_id) as client:
+                if client.sock is None:
+                    logger.error(f"Failed to connect to {self.host}:{self.port}")
+                    return None
+                return await client.read_pipelined(requests, max_in_flight=max_in_flight, cancel_unsupported=True)
+        except HostUnavailableError as e:
+            logger.info(f"Skipping register probe: {e}")
+            return None
+
+
+class AsyncNetworkScanner:
+    """Async counterpart of NetworkScanner"""
+
+    @staticmethod
+    async def _port_open(ip_str: str, port: int, timeout: float) -> bool:
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(ip_str, port), timeout)
+            writer.close()
+            return True
+        except (OSError, asyncio.TimeoutError):
+            return False
+
+    @staticmethod
+    async def scan_network(network=None, ports=(502, 510), timeout=1, auto_detect=True,
+                           progress_callback: Optional[Callable] = None,
+                           max_concurrency: int = DEFAULT_MAX_CONCURRENCY) -> List[Dict]:
+        """
+        Scan network for Modbus devices with automatic device type detection
+
+        Same arguments and result structure as NetworkScanner.scan_network, but
+        all hosts are probed concurrently (bounded by max_concurrency).
+        """
+        if network is None:
+            from modbus_scanner import NetworkScanner
+            network = NetworkScanner.get_local_network()
+
+        logger.info(f"Scanning network {network} for Modbus devices (async)...")
+        devices = []
+        scanned_count = 0
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def scan_host(ip_str: str) -> List[Dict]:
+            nonlocal scanned_count
+            found = []
+            async with semaphore:
+                for port in ports:
+                    if not await AsyncNetworkScanner._port_open(ip_str, port, timeout):
+                        continue
+                    device_info = {'ip': ip_str, 'port': port, 'status': 'online'}
+                    if auto_detect:
+                        logger.info(f"Auto-detecting device type at {ip_str}:{port}...")
+                        device_type = (await fingerprint_device(ip_str, port, 1)).get('device_type', 'UNKNOWN')
+                        device_info.update(describe_device_type(device_type, ip_str))
+                    found.append(device_info)
+                    logger.info(f"Found {device_info.get('device_type', 'unknown')} device at {ip_str}:{port}")
+
+            scanned_count += 1
+            if progress_callback:
+                progress_callback(ip_str, scanned_count, None)
+                for device_info in found:
+                    progress_callback(ip_str, scanned_count, device_info)
+            return found
+
+        try:
+            net = ipaddress.IPv4Network(network, strict=False)
+            for found in await asyncio.gather(*(scan_host(str(ip)) for ip in net.hosts())):
+                devices.extend(found)
+        except Exception as e:
+            logger.error(f"Network scan error: {e}")
+
+        logger.info(f"Network scan complete. Found {len(devices)} devices.")
+        return devices
+
+
+def describe_device_type(device_type: str, ip_str: str) -> Dict:
+    """Map a detected device type to the name/manufacturer/model used by NetworkScanner"""
+    suffix = ip_str.split('.')[-1]
+    if device_type in ['LOGO_8', 'LOGO_0BA7']:
+        return {
+            'device_type': device_type,
+            'name': f"LOGO_{suffix}",
+            'manufacturer': 'Siemens',
+            'model': 'LOGO! 8' if device_type == 'LOGO_8' else 'LOGO! 0BA7'
+        }
+    return {
+        'device_type': device_type,
+        'name': f"Modbus_{suffix}",
+        'manufacturer': 'Generic',
+        'model': 'Modbus TCP'
+    }
+
+
+async def detect_device_types(targets: List[Tuple[str, int, int]],
+                              max_concurrency: int = DEFAULT_MAX_CONCURRENCY) -> List[str]:
+    """Detect device types for many (host, port, slave) targets concurrently (results in order)"""
+    results = await gather_limited(
+        (fingerprint_device(host, port, slave) for host, port, slave in targets),
+        max_concurrency
+    )
+    return [result.get('device_type', 'UNKNOWN') for result in results]
+
+
+async def resolve_identity(host: str, mac: Optional[str] = None) -> str:
+    """Discovery cache identity of a device: its MAC address if known, else the host"""
+    if mac:
+        return mac.upper()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, get_mac_from_ip, host) or host
+
+
+async def fingerprint_device(host: str, port: int = 502, slave: int = 1, refresh: bool = False,
+                             mac: Optional[str] = None, cache: Optional[DiscoveryCache] = None) -> Dict:
+    """
+    Connect once and fingerprint the device, consulting the discovery cache
+
+    A cached device only gets a verification read: its identification (when it
+    reported one) or a single known-good register. A mismatch, e.g. a new
+    firmware revision, triggers a full fingerprint.
+
+    Returns:
+        Dict with 'connection' ('success'/'failed'), 'device_type', 'cached',
+        'identity' (cache key part) and 'fingerprint_hash'
+    """
+    cache = cache or discovery_cache
+    scanner = AsyncModbusScanner(host, port, timeout=3)
+    try:
+        connected = await scanner.connect()
+    except HostUnavailableError as e:
+        logger.info(f"Skipping fingerprint of {host}:{port}: {e}")
+        return {'connection': 'failed', 'cached': False, 'error': e.to_dict()}
+    if not connected:
+        return {'connection': 'failed', 'cached': False}
+
+    try:
+        # Resolved after connecting so the ARP entry exists
+        identity = await resolve_identity(host, mac)
+        entry = None if refresh else cache.get(identity, port, slave)
+
+        if entry:
+            stored = entry['fingerprint']
+            if stored.get('identification'):
+                identification = await scanner.read_identification(slave)
+                current = dict(stored, identification=identification)
+                entry = cache.get(identity, port, slave, fingerprint_hash(current))
+            elif entry.get('verify'):
+                reg_type, address, count = entry['verify']
+                if await scanner._read(reg_type, address, count, slave) is None:
+                    entry = None
+            if entry:
+                return {
+                    'connection': 'success',
+                    'device_type': entry['device_type'],
+                    'cached': True,
+                    'identity': identity,
+                    'fingerprint_hash': entry['fingerprint_hash']
+                }
+
+        device_type, identification = await asyncio.gather(
+            scanner.detect_device_type(slave, connected=True),
+            scanner.read_identification(slave)
+        )
+    finally:
+        await scanner.disconnect()
+
+    fingerprint = {'device_type': device_type, 'identification': identification}
+    if device_type != 'UNKNOWN':
+        cache.put_fingerprint(identity, port, slave, fingerprint, list(VERIFY_READS.get(device_type, ())) or None)
+    return {
+        'connection': 'success',
+        'device_type': device_type,
+        'cached': False,
+        'identity': identity,
+        'fingerprint_hash': fingerprint_hash(fingerprint)
+    }
+
+
+async def adopt_template(host: str, port: int, slave: int, analysis: Dict, scope: str,
+                         cache: Optional[DiscoveryCache] = None) -> Optional[Dict[str, IntervalSet]]:
+    """
+    Reuse the register map of an identical, already mapped device
+
+    The template is only adopted after a sparse verification: a few pipelined
+    block reads at the map's interval boundaries must all succeed. Reads past
+    the intervals are not checked, since a scan window may end inside a
+    register area; the shared fingerprint hash vouches for the rest. Empty
+    templates are never adopted.
+
+    Args:
+        analysis: Result of fingerprint_device for this device
+        scope: Register map name
+
+    Returns:
+        The adopted register map (now also cached for this device), or None
+    """
+    cache = cache or discovery_cache
+    key = cache.key(analysis['identity'], port, slave)
+    template = cache.find_template(analysis['fingerprint_hash'], scope, exclude=key)
+    if template is None:
+        return None
+
+    probes = boundary_probes(template)
+    if not probes:
+        logger.debug(f"Template register map for {host}:{port} is empty, full scan needed")
+        return None
+    outcomes = await AsyncRegisterScanner(host, port, slave).probe_ranges(
+        [(TABLE_FUNCTIONS[table], start, count) for table, start, count in probes])
+    if outcomes is None or any(outcome.data is None for outcome in outcomes):
+        logger.info(f"Template register map does not match {host}:{port} (unit {slave}), full scan needed")
+        return None
+
+    logger.info(f"Adopted template register map for {host}:{port} after "
+                f"{len(probes)} verification reads")
+    cache.put_register_map(analysis['identity'], port, slave, scope, template)
+    return template
+
+
+async def scan_device_cached(host: str, port: int = 502, slave: int = 1, profile: Optional[Dict] = None,
+                             scope: str = 'scan', refresh: bool = False, mac: Optional[str] = None,
+                             reuse_template: bool = False, cache: Optional[DiscoveryCache] = None) -> Optional[Dict]:
+    """
+    AsyncModbusScanner.scan_device through the discovery cache
+
+    A verified, unchanged device gets the register map of its last scan back;
+    otherwise the device is scanned and the map stored.
+
+    Args:
+        scope: Name of the cached map, should identify the profile used
+        refresh: Ignore cached data
+        reuse_template: Adopt the verified map of an identical device instead of scanning
+
+    Returns:
+        scan_device results or a {table: IntervalSet} register map (both are
+        accepted by ModbusConfigGenerator), None if the device is unreachable
+    """
+    cache = cache or discovery_cache
+    analysis = await fingerprint_device(host, port, slave, refresh=refresh, mac=mac, cache=cache)
+    if analysis['connection'] != 'success':
+        return None
+
+    identity = analysis['identity']
+    if analysis['cached']:
+        register_map = cache.get_register_map(identity, port, slave, scope)
+        if register_map is not None:
+            logger.info(f"Using cached register map for {host}:{port} (unit {slave})")
+            return register_map
+
+    if reuse_template and not refresh:
+        register_map = await adopt_template(host, port, slave, analysis, scope, cache)
+        if register_map is not None:
+            return register_map
+
+    results = await AsyncModbusScanner(host, port).scan_device(profile, slave)
+    cache.put_register_map(identity, port, slave, scope, register_map_from_scan(results))
+    return results
+
+
+# Global loop thread shared by Flask endpoints and the auto-scanner
+scan_loop = AsyncLoopThread()
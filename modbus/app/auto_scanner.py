@@ -29,6 +29,7 @@ class AutoScanner:
 
         # Scan settings
         self.use_nmap = True  # Prefer nmap if available
+        self.use_async = True  # Detect devices concurrently on the async scan loop
         self.auto_add_devices = True
         self.auto_register_scan = True
         self.auto_generate_config = False
@@ -60,6 +61,8 @@ class AutoScanner:
             self.set_port_range(config['port_range'])
         if 'use_nmap' in config:
             self.use_nmap = config['use_nmap']
+        if 'use_async' in config:
+            self.use_async = config['use_async']
         if 'auto_add_devices' in config:
             self.auto_add_devices = config['auto_add_devices']
         if 'auto_register_scan' in config:
@@ -136,7 +139,8 @@ class AutoScanner:
                 network=self.network,
                 port_range=self.port_range,
                 use_nmap=use_nmap,
-                auto_add=self.auto_add_devices
+                auto_add=self.auto_add_devices,
+                use_async=self.use_async
             )
 
             self.last_scan_results = {
@@ -168,6 +172,7 @@ class AutoScanner:
             'network': self.network,
             'port_range': self.port_range,
             'use_nmap': self.use_nmap,
+            'use_async': self.use_async,
             'auto_add_devices': self.auto_add_devices,
             'auto_register_scan': self.auto_register_scan,
             'auto_generate_config': self.auto_generate_config,
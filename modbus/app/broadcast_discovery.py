@@ -0,0 +1,293 @@
+"""
+Broadcast and multicast discovery for KNXnet/IP and BACnet/IP
+Sends one KNX SEARCH_REQUEST to the KNXnet/IP multicast group and one BACnet
+Who-Is to the subnet broadcast address, collects every answer for one window
+and decodes the device descriptors (KNX individual address, serial, MAC and
+name; BACnet device instance and vendor). No address is probed individually.
+"""
+
+import asyncio
+import ipaddress
+import logging
+import socket
+import struct
+from typing import AsyncIterator, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# KNXnet/IP system setup multicast address and port
+KNX_MULTICAST_GROUP = '224.0.23.12'
+KNX_PORT = 3671
+
+# KNXnet/IP service types
+KNX_SEARCH_REQUEST = 0x0201
+KNX_SEARCH_RESPONSE = 0x0202
+
+# KNX DIB types and device medium codes
+KNX_DIB_DEVICE_INFO = 0x01
+KNX_MEDIA = {0x01: 'reserved', 0x02: 'TP1', 0x04: 'PL110', 0x10: 'RF', 0x20: 'KNX IP'}
+
+# BACnet/IP port and BVLC functions
+BACNET_PORT = 47808
+BVLC_TYPE = 0x81
+BVLC_ORIGINAL_UNICAST = 0x0A
+BVLC_ORIGINAL_BROADCAST = 0x0B
+BVLC_FORWARDED_NPDU = 0x04
+
+# BACnet APDU: unconfirmed request, services Who-Is and I-Am
+BACNET_UNCONFIRMED_REQUEST = 0x10
+BACNET_WHO_IS = 0x08
+BACNET_I_AM = 0x00
+BACNET_OBJECT_DEVICE = 8
+
+# Seconds replies are collected after the discovery request
+DEFAULT_DISCOVERY_WINDOW = 3
+
+# Multicast hops a KNX search may cross (routers between KNX IP lines)
+KNX_MULTICAST_TTL = 4
+
+
+def knx_search_request(local_ip: str, local_port: int) -> bytes:
+    """SEARCH_REQUEST asking devices to answer to local_ip:local_port"""
+    hpai = struct.pack('>BB4sH', 0x08, 0x01, socket.inet_aton(local_ip), local_port)
+    return struct.pack('>BBHH', 0x06, 0x10, KNX_SEARCH_REQUEST, 6 + len(hpai)) + hpai
+
+
+def parse_knx_search_response(data: bytes) -> Optional[Dict]:
+    """
+    Decode a KNXnet/IP SEARCH_RESPONSE
+
+    Layout: header (6), control endpoint HPAI (8), device information DIB
+    (54: medium, status, individual address, project installation ID,
+    serial, routing multicast address, MAC, friendly name), service families DIB.
+
+    Returns:
+        dict: host, port, individual_address, medium, serial, mac, name,
+            multicast_address; None if data is not a search response
+    """
+    if len(data) < 14 + 54 or data[0] != 0x06 or data[1] != 0x10:
+        return None
+    service_type, total_length = struct.unpack_from('>HH', data, 2)
+    if service_type != KNX_SEARCH_RESPONSE or total_length > len(data):
+        return None
+
+    device = parse_knx_device_dib(data[14:])
+    if device is None:
+        return None
+    return {
+        'host': socket.inet_ntoa(data[8:12]),
+        'port': struct.unpack_from('>H', data, 12)[0],
+        **device
+    }
+
+
+def parse_knx_device_dib(dib: bytes) -> Optional[Dict]:
+    """
+    Decode a KNX device information DIB (search and description responses)
+
+    Returns:
+        dict: individual_address, medium, serial, multicast_address, mac,
+            name; None if dib is not a device information DIB
+    """
+    if len(dib) < 54 or dib[0] < 54 or dib[1] != KNX_DIB_DEVICE_INFO:
+        return None
+    medium, _, individual_address = struct.unpack_from('>BBH', dib, 2)
+    return {
+        'individual_address': f"{individual_address >> 12}.{(individual_address >> 8) & 0x0F}.{individual_address & 0xFF}",
+        'medium': KNX_MEDIA.get(medium, f'0x{medium:02X}'),
+        'serial': dib[8:14].hex(),
+        'multicast_address': socket.inet_ntoa(dib[14:18]),
+        'mac': ':'.join(f'{b:02x}' for b in dib[18:24]),
+        'name': dib[24:54].split(b'\x00', 1)[0].decode('latin-1').strip()
+    }
+
+
+def bacnet_who_is(broadcast: bool = True) -> bytes:
+    """Who-Is without range limits (all devices answer) addressed to all BACnet networks"""
+    npdu = bytes([0x01, 0x20, 0xFF, 0xFF, 0x00, 0xFF])  # Version, DNET present: all networks, hop count
+    apdu = bytes([BACNET_UNCONFIRMED_REQUEST, BACNET_WHO_IS])
+    function = BVLC_ORIGINAL_BROADCAST if broadcast else BVLC_ORIGINAL_UNICAST
+    return struct.pack('>BBH', BVLC_TYPE, function, 4 + len(npdu) + len(apdu)) + npdu + apdu
+
+
+def _bacnet_unsigned(data: bytes, offset: int, tag_number: int) -> Tuple[Optional[int], int]:
+    """Decode an application-tagged unsigned/enumerated value, (value, next offset)"""
+    if offset >= len(data) or data[offset] >> 4 != tag_number or data[offset] & 0x08:
+        return None, offset
+    length = data[offset] & 0x07
+    if length > 4 or offset + 1 + length > len(data):
+        return None, offset
+    return int.from_bytes(data[offset + 1:offset + 1 + length], 'big'), offset + 1 + length
+
+
+def parse_bacnet_i_am(data: bytes) -> Optional[Dict]:
+    """
+    Decode a BACnet/IP I-Am
+
+    Returns:
+        dict: device_instance, max_apdu, segmentation, vendor_id; for
+            devices behind a BACnet router also bacnet_network / bacnet_address,
+            for replies relayed by a BBMD the original host / port;
+            None if data is not an I-Am
+    """
+    if len(data) < 4 or data[0] != BVLC_TYPE:
+        return None
+    record = {}
+    offset = 4
+    if data[1] == BVLC_FORWARDED_NPDU:
+        # Relayed by a BBMD: the original sender's address precedes the NPDU
+        if len(data) < 10:
+            return None
+        record['host'] = socket.inet_ntoa(data[4:8])
+        record['port'] = struct.unpack_from('>H', data, 8)[0]
+        offset = 10
+    if len(data) < offset + 2 or data[offset] != 0x01:
+        return None
+
+    control = data[offset + 1]
+    offset += 2
+    if control & 0x20:  # Destination specifier
+        if len(data) < offset + 3:
+            return None
+        offset += 3 + data[offset + 2]
+    if control & 0x08:  # Source specifier: device behind a router
+        if len(data) < offset + 3:
+            return None
+        source_length = data[offset + 2]
+        record['bacnet_network'] = struct.unpack_from('>H', data, offset)[0]
+        record['bacnet_address'] = data[offset + 3:offset + 3 + source_length].hex()
+        offset += 3 + source_length
+    if control & 0x20:
+        offset += 1  # Hop count
+
+    if control & 0x80 or data[offset:offset + 2] != bytes([BACNET_UNCONFIRMED_REQUEST, BACNET_I_AM]):
+        return None
+    offset += 2
+
+    # Object identifier: application tag 12, 4 bytes
+    if len(data) < offset + 5 or data[offset] != 0xC4:
+        return None
+    object_id = struct.unpack_from('>I', data, offset + 1)[0]
+    if object_id >> 22 != BACNET_OBJECT_DEVICE:
+        return None
+    record['device_instance'] = object_id & 0x3FFFFF
+    record['max_apdu'], offset = _bacnet_unsigned(data, offset + 5, 2)
+    record['segmentation'], offset = _bacnet_unsigned(data, offset, 9)
+    record['vendor_id'], offset = _bacnet_unsigned(data, offset, 2)
+    return record
+
+
+def local_address_for(network: str) -> str:
+    """Local interface address used to reach network"""
+    target = next(ipaddress.IPv4Network(network, strict=False).hosts(), None)
+    probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        probe.connect((str(target) if target else KNX_MULTICAST_GROUP, 9))
+        return probe.getsockname()[0]
+    finally:
+        probe.close()
+
+
+class _CollectProtocol(asyncio.DatagramProtocol):
+    def __init__(self, replies: asyncio.Queue):
+        self.replies = replies
+
+    def datagram_received(self, data: bytes, addr: Tuple):
+        self.replies.put_nowait((data, addr))
+
+    def error_received(self, exc: Exception):
+        logger.debug(f"Discovery socket error: {exc!r}")
+
+
+async def _collect(sock: socket.socket, request: Callable[[int], bytes], destination: Tuple[str, int],
+                   window: float) -> AsyncIterator[Tuple[bytes, Tuple]]:
+    """Send one request from sock and yield (data, address) of every datagram received within window"""
+    loop = asyncio.get_running_loop()
+    replies: asyncio.Queue = asyncio.Queue()
+    transport, _ = await loop.create_datagram_endpoint(lambda: _CollectProtocol(replies), sock=sock)
+    try:
+        transport.sendto(request(sock.getsockname()[1]), destination)
+        deadline = loop.time() + window
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                yield await asyncio.wait_for(replies.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+    finally:
+        transport.close()
+
+
+async def discover_knx(network: str, window: float = DEFAULT_DISCOVERY_WINDOW) -> AsyncIterator[Dict]:
+    """
+    Find KNXnet/IP interfaces and routers with one multicast SEARCH_REQUEST
+
+    Args:
+        network: Network whose interface sends the search (e.g. "192.168.1.0/24")
+        window: Seconds to collect responses
+
+    Yields:
+        dict per device: host, port, protocol, transport and the device descriptor
+    """
+    local_ip = local_address_for(network)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, KNX_MULTICAST_TTL)
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(local_ip))
+    sock.bind((local_ip, 0))
+
+    logger.info(f"KNX multicast search from {local_ip} ({window}s window)")
+    seen = set()
+    async for data, addr in _collect(sock, lambda port: knx_search_request(local_ip, port),
+                                     (KNX_MULTICAST_GROUP, KNX_PORT), window):
+        device = parse_knx_search_response(data)
+        if device is None:
+            continue
+        # Devices behind NAT announce 0.0.0.0: answer came from the real address
+        if device['host'] == '0.0.0.0':
+            device['host'], device['port'] = addr[0], addr[1]
+        key = (device['host'], device['individual_address'])
+        if key in seen:
+            continue
+        seen.add(key)
+        logger.info(f"KNX device {device['individual_address']} '{device['name']}' at {device['host']}")
+        yield {'protocol': 'knx_ip', 'transport': 'multicast', **device}
+
+
+async def discover_bacnet(network: str, window: float = DEFAULT_DISCOVERY_WINDOW) -> AsyncIterator[Dict]:
+    """
+    Find BACnet/IP devices with one Who-Is to the subnet broadcast
+
+    The socket binds port 47808 when it is free, because many devices
+    broadcast their I-Am to that port instead of answering the sender.
+
+    Args:
+        network: Network to discover (e.g. "192.168.1.0/24")
+        window: Seconds to collect I-Am replies
+
+    Yields:
+        dict per device: host, port, protocol, transport, device_instance, vendor_id, ...
+    """
+    broadcast = str(ipaddress.IPv4Network(network, strict=False).broadcast_address)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    try:
+        sock.bind(('', BACNET_PORT))
+    except OSError:
+        sock.bind(('', 0))
+
+    logger.info(f"BACnet Who-Is to {broadcast}:{BACNET_PORT} ({window}s window)")
+    seen = set()
+    async for data, addr in _collect(sock, lambda port: bacnet_who_is(), (broadcast, BACNET_PORT), window):
+        device = parse_bacnet_i_am(data)
+        if device is None:
+            continue
+        device = {'host': addr[0], 'port': addr[1], 'protocol': 'bacnet', 'transport': 'broadcast', **device}
+        key = (device['host'], device['device_instance'])
+        if key in seen:
+            continue
+        seen.add(key)
+        logger.info(f"BACnet device {device['device_instance']} (vendor {device['vendor_id']}) at {device['host']}")
+        yield device
@@ -0,0 +1,192 @@
+"""
+Batch coil and register writes
+Coalesces many single-address writes into Write Multiple Coils (FC15) and
+Write Multiple Registers (FC16) frames within the protocol limits, sends them
+pipelined over the pooled connection, optionally reads the written ranges
+back and reports the result of every address.
+"""
+
+import logging
+from collections import namedtuple
+from typing import Dict, Iterable, List, Optional
+
+from modbus_codec import (
+    WRITE_MULTIPLE_COILS, WRITE_MULTIPLE_REGISTERS, READ_COILS, READ_HOLDING_REGISTERS,
+    DEFAULT_MAX_IN_FLIGHT, write_limit, unpack_bits, unpack_registers
+)
+from modbus_exceptions import ModbusWriteError, ModbusReadError
+from connection_pool import ModbusConnectionPool, connection_pool
+from discovery_plan import PROFILE_TABLES
+
+logger = logging.getLogger(__name__)
+
+# Writable tables, their write function and the read used for verification
+WRITE_FUNCTIONS = {
+    'coil': (WRITE_MULTIPLE_COILS, READ_COILS),
+    'holding_register': (WRITE_MULTIPLE_REGISTERS, READ_HOLDING_REGISTERS),
+}
+
+# Upper bound on addresses per batch request
+MAX_BATCH_WRITES = 10000
+
+WriteBlock = namedtuple('WriteBlock', ['table', 'function_code', 'address', 'values'])
+WriteBlock.__doc__ = """Contiguous values written with one FC15/FC16 request"""
+
+
+def normalize_writes(writes: Iterable[Dict]) -> Dict[str, Dict[int, int]]:
+    """
+    Validate requested writes
+
+    Args:
+        writes: [{table, address, value}]; table may use Home Assistant
+            naming ('coil', 'holding') or table names
+
+    Returns:
+        {table: {address: value}}, the last write to an address wins
+
+    Raises:
+        ModbusWriteError: unknown table, bad address or value out of range
+    """
+    tables: Dict[str, Dict[int, int]] = {}
+    for write in writes:
+        table = PROFILE_TABLES.get(write.get('table'), write.get('table'))
+        if table not in WRITE_FUNCTIONS:
+            raise ModbusWriteError(f"Table not writable: {write.get('table')}", {'write': write})
+        try:
+            address = int(write['address'])
+            value = write['value']
+            if table == 'coil':
+                value = int(bool(value))
+            else:
+                value = int(value)
+                if -0x8000 <= value < 0:
+                    value &= 0xFFFF
+        except (KeyError, TypeError, ValueError):
+            raise ModbusWriteError('Write needs a numeric address and value', {'write': write})
+        if not 0 <= address <= 0xFFFF or not 0 <= value <= 0xFFFF:
+            raise ModbusWriteError(f'Address or value out of range: {address}={value}', {'write': write})
+        tables.setdefault(table, {})[address] = value
+    return tables
+
+
+def coalesce_writes(tables: Dict[str, Dict[int, int]]) -> List[WriteBlock]:
+    """
+    Merge contiguous addresses into multi-write blocks
+
+    Runs are split at the FC15/FC16 quantity limit.
+    """
+    blocks = []
+    for table, values in tables.items():
+        function_code = WRITE_FUNCTIONS[table][0]
+        limit = write_limit(function_code)
+        run: List[int] = []
+        run_start = None
+        for address in sorted(values):
+            if run and (address != run_start + len(run) or len(run) == limit):
+                blocks.append(WriteBlock(table, function_code, run_start, run))
+                run = []
+            if not run:
+                run_start = address
+            run.append(values[address])
+        if run:
+            blocks.append(WriteBlock(table, function_code, run_start, run))
+    return blocks
+
+
+class BulkWriter:
+    """Executes batch writes against one device"""
+
+    def __init__(self, host: str, port: int = 502, slave_id: int = 1, timeout: float = 2,
+                 max_in_flight: int = DEFAULT_MAX_IN_FLIGHT, pool: Optional[ModbusConnectionPool] = None):
+        self.host = host
+        self.port = port
+        self.slave_id = slave_id
+        self.timeout = timeout
+        self.max_in_flight = max_in_flight
+        self.pool = pool or connection_pool
+
+    def write(self, writes: Iterable[Dict], verify: bool = False) -> List[Dict]:
+        """
+        Write a batch and report every address
+
+        Args:
+            writes: [{table, address, value}]
+            verify: Read written blocks back and compare
+
+        Returns:
+            [{table, address, value, success, error, verified}] in table and
+            address order; verified is None without read-back
+
+        Raises:
+            ModbusWriteError: invalid writes
+            ModbusConnectionError: device not reachable
+        """
+        blocks = coalesce_writes(normalize_writes(writes))
+        if sum(len(block.values) for block in blocks) > MAX_BATCH_WRITES:
+            raise ModbusWriteError(f'Batch exceeds {MAX_BATCH_WRITES} writes')
+
+        logger.info(f"Writing {len(blocks)} block(s) to {self.host}:{self.port} (unit {self.slave_id})")
+        requests = [(block.function_code, block.address, block.values) for block in blocks]
+        with self.pool.acquire(self.host, self.port, self.slave_id, self.timeout) as client:
+            outcomes = client.write_pipelined(requests, max_in_flight=self.max_in_flight)
+            if self._connection_dropped(client, outcomes) and client.connect():
+                # Nothing was answered and the device closed the connection, so
+                # no write was applied; send the batch once more
+                logger.info(f"Connection to {self.host}:{self.port} was dropped, retrying batch")
+                outcomes = client.write_pipelined(requests, max_in_flight=self.max_in_flight)
+
+            read_back = [None] * len(blocks)
+            if verify:
+                written = [i for i, outcome in enumerate(outcomes) if outcome.ok]
+                if written and client.sock is not None:
+                    reads = client.read_pipelined(
+                        [(WRITE_FUNCTIONS[blocks[i].table][1], blocks[i].address, len(blocks[i].values))
+                         for i in written],
+                        max_in_flight=self.max_in_flight
+                    )
+                    for i, outcome in zip(written, reads):
+                        if outcome.data is None:
+                            continue
+                        count = len(blocks[i].values)
+                        if blocks[i].function_code == WRITE_MULTIPLE_COILS:
+                            read_back[i] = [int(bit) for bit in unpack_bits(outcome.data, count)]
+                        else:
+                            read_back[i] = list(unpack_registers(outcome.data, count))
+
+        results = []
+        for block, outcome, actual in zip(blocks, outcomes, read_back):
+            if outcome.ok:
+                error = None
+            elif outcome.exception_code is not None:
+                error = f'Modbus exception {outcome.exception_code:#04x}'
+            else:
+                error = 'No response'
+            for offset, value in enumerate(block.values):
+                verified = None
+                if verify and outcome.ok:
+                    verified = actual is not None and actual[offset] == value
+                results.append({
+                    'table': block.table,
+                    'address': block.address + offset,
+                    'value': value,
+                    'success': outcome.ok,
+                    'error': error,
+                    'verified': verified
+                })
+
+        failed = sum(1 for result in results if not result['success'])
+        if failed:
+            logger.warning(f"{failed} of {len(results)} writes failed on {self.host}:{self.port}")
+        return results
+
+    @staticmethod
+    def _connection_dropped(client, outcomes) -> bool:
+        """
+        True if a batch got no reply at all because the connection was closed
+
+        Timeouts do not count: the device may have applied writes it did not
+        acknowledge, so those batches are never resent.
+        """
+        error = client.abort_error
+        return (error is not None and not isinstance(error, ModbusReadError)
+                and not any(outcome.ok or outcome.exception_code is not None for outcome in outcomes))
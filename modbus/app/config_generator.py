@@ -4,10 +4,71 @@ Configuration generator for Home Assistant Modbus integration
 import yaml
 import logging
 from device_profiles import get_device_profile
+from register_map import IntervalSet, RegisterStatusMap, SCAN_RESULT_KEYS
+from device_database import get_device_database
+from discovery_plan import PROFILE_TABLES, DiscoveryPlanCompiler
 
 logger = logging.getLogger(__name__)
 
 
+def _scan_addresses(scan_results, table):
+    """
+    Available addresses of one register table
+
+    scan_results may be ModbusScanner results ({'coils': [{'address': ...}]}),
+    a register map ({'coil': IntervalSet}) or RegisterScanner results
+    ({RegisterType.COIL: RegisterStatusMap}).
+    """
+    found = scan_results.get(table, scan_results.get(SCAN_RESULT_KEYS[table], []))
+    if isinstance(found, RegisterStatusMap):
+        found = found.available
+    if isinstance(found, IntervalSet):
+        return iter(found)
+    return (reg['address'] for reg in found)
+
+
+def _documented_addresses(recommendations, offset):
+    """
+    Re-key {table: {address: value}} from Modbus PDU to documented addresses
+
+    Profiling and register type inference work on the discovery map (PDU
+    addresses); profile entities use the addresses the vendor documents.
+    """
+    if not offset:
+        return recommendations
+    return {
+        table: {int(address) - offset: value for address, value in values.items()}
+        for table, values in recommendations.items()
+    }
+
+
+def _typed_words(addresses, types):
+    """
+    Group word addresses into entities using inferred register types
+
+    Args:
+        addresses: available register addresses
+        types: {address: {data_type, count, swap}} from register type inference
+
+    Yields:
+        (address, data_type, swap) per entity; the second word of a 32-bit
+        value is consumed by its entity
+    """
+    types = {int(address): typed for address, typed in (types or {}).items()}
+    available = set(addresses)
+    skip = set()
+    for address in sorted(available):
+        if address in skip:
+            continue
+        typed = types.get(address)
+        count = typed.get('count', 1) if typed else 1
+        if typed and all(address + i in available for i in range(count)):
+            skip.update(range(address + 1, address + count))
+            yield address, typed['data_type'], typed.get('swap')
+        else:
+            yield address, 'uint16', None
+
+
 class ModbusConfigGenerator:
     """Generator for Modbus YAML configuration"""
 
@@ -20,7 +81,12 @@ class ModbusConfigGenerator:
 
         Args:
             device_config: dict with name, manufacturer, model, host, port, etc.
-            scan_results: optional scan results from ModbusScanner
+                An optional 'scan_intervals' entry ({table: {address: seconds}},
+                from register profiling) overrides the default poll intervals;
+                'register_types' ({table: {address: {data_type, count, swap}}})
+                types scanned input/holding registers. Both are keyed by Modbus
+                PDU addresses, like scan results.
+            scan_results: optional scan results from ModbusScanner or a register map
         """
         manufacturer = device_config.get('manufacturer')
         model = device_config.get('model')
@@ -83,6 +149,15 @@ class ModbusConfigGenerator:
                     registers, profile, device_config
                 )
 
+        scan_intervals = device_config.get('scan_intervals')
+        if scan_intervals and not custom_entities and not scan_results:
+            # Profile entities sit at documented addresses, recommendations at PDU addresses
+            model_info = get_device_database().get_device_profile(
+                device_config.get('manufacturer'), device_config.get('model'))
+            scan_intervals = _documented_addresses(scan_intervals, DiscoveryPlanCompiler.pdu_offset(model_info))
+        if scan_intervals:
+            self.apply_scan_intervals(sensors + binary_sensors + switches + numbers, scan_intervals)
+
         # Add entity lists to device if not empty
         if sensors:
             device['sensors'] = sensors
@@ -93,6 +168,35 @@ class ModbusConfigGenerator:
         if numbers:
             device['numbers'] = numbers
 
+    @staticmethod
+    def apply_scan_intervals(entities, scan_intervals):
+        """
+        Set recommended scan_intervals on entities
+
+        Args:
+            entities: entity dicts (sensors, binary_sensors, switches, numbers)
+            scan_intervals: {table: {address: seconds}} from register profiling;
+                an entity spanning several registers uses the shortest interval
+        """
+        applied = 0
+        for entity in entities:
+            table = PROFILE_TABLES.get(entity.get('input_type') or entity.get('write_type'))
+            recommendations = scan_intervals.get(table)
+            if not recommendations:
+                continue
+            words = entity.get('count', 1)
+            if entity.get('data_type') in ('int32', 'uint32', 'float32'):
+                words = max(words, 2)
+            intervals = [
+                recommendations.get(address, recommendations.get(str(address)))
+                for address in range(entity['address'], entity['address'] + words)
+            ]
+            intervals = [interval for interval in intervals if interval]
+            if intervals:
+                entity['scan_interval'] = min(intervals)
+                applied += 1
+        logger.info(f"Applied recommended scan intervals to {applied} entities")
+
     def _generate_from_scan(self, scan_results, profile, device_config):
         """Generate entities from scan results"""
         sensors = []
@@ -101,41 +205,39 @@ class ModbusConfigGenerator:
         numbers = []
 
         device_name = device_config.get('name', 'Device')
-
-        # Input registers -> sensors
-        for reg in scan_results.get('input_registers', []):
-            sensors.append({
-                'name': f"{device_name} Input {reg['address']}",
-                'address': reg['address'],
-                'input_type': 'input',
-                'data_type': 'uint16',
-                'scan_interval': 5
-            })
-
-        # Holding registers -> sensors
-        for reg in scan_results.get('holding_registers', []):
-            sensors.append({
-                'name': f"{device_name} Holding {reg['address']}",
-                'address': reg['address'],
-                'input_type': 'holding',
-                'data_type': 'uint16',
-                'scan_interval': 5
-            })
+        scan_results = {getattr(table, 'value', table): found for table, found in scan_results.items()}
+        register_types = device_config.get('register_types') or {}
+
+        # Input and holding registers -> sensors (32-bit values as one entity)
+        for table, input_type, label in (('input_register', 'input', 'Input'),
+                                         ('holding_register', 'holding', 'Holding')):
+            words = _typed_words(_scan_addresses(scan_results, table), register_types.get(table))
+            for address, data_type, swap in words:
+                sensor = {
+                    'name': f"{device_name} {label} {address}",
+                    'address': address,
+                    'input_type': input_type,
+                    'data_type': data_type,
+                    'scan_interval': 5
+                }
+                if swap:
+                    sensor['swap'] = swap
+                sensors.append(sensor)
 
         # Discrete inputs -> binary sensors
-        for reg in scan_results.get('discrete_inputs', []):
+        for address in _scan_addresses(scan_results, 'discrete_input'):
             binary_sensors.append({
-                'name': f"{device_name} Input {reg['address']}",
-                'address': reg['address'],
+                'name': f"{device_name} Input {address}",
+                'address': address,
                 'input_type': 'discrete_input',
                 'scan_interval': 1
             })
 
         # Coils -> switches
-        for reg in scan_results.get('coils', []):
+        for address in _scan_addresses(scan_results, 'coil'):
             switches.append({
-                'name': f"{device_name} Output {reg['address']}",
-                'address': reg['address'],
+                'name': f"{device_name} Output {address}",
+                'address': address,
                 'write_type': 'coil',
                 'scan_interval': 1
             })
@@ -221,6 +323,8 @@ class ModbusConfigGenerator:
             sensor['precision'] = entity['precision']
         if 'state_class' in entity:
             sensor['state_class'] = entity['state_class']
+        if 'swap' in entity:
+            sensor['swap'] = entity['swap']
 
         return sensor
 
@@ -259,6 +363,8 @@ class ModbusConfigGenerator:
             number['max'] = entity['max']
         if 'step' in entity:
             number['step'] = entity['step']
+        if 'swap' in entity:
+            number['swap'] = entity['swap']
 
         return number
 
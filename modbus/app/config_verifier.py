@@ -0,0 +1,253 @@
+"""
+Generated configuration verification
+Parses a modbus.yaml written by ModbusConfigGenerator, merges the addresses of
+all entities of a hub into the fewest block reads per slave and function
+code, reads them pipelined (all hubs concurrently) and reports every entity as
+readable, out of range, erroring or dead. Failed blocks are bisected along
+entity boundaries so one bad address does not condemn its neighbours.
+"""
+
+import logging
+from collections import namedtuple
+from typing import Dict, List, Optional, Tuple
+
+import yaml
+
+from modbus_codec import (
+    AsyncNativeModbusClient, function_limit, DEFAULT_MAX_IN_FLIGHT,
+    ILLEGAL_DATA_ADDRESS, ILLEGAL_DATA_VALUE
+)
+from modbus_exceptions import HostUnavailableError, ConfigurationError
+from discovery_plan import TABLE_FUNCTIONS, PROFILE_TABLES
+
+logger = logging.getLogger(__name__)
+
+# Entity sections and the key naming their register table
+ENTITY_SECTIONS = {
+    'sensors': 'input_type',
+    'binary_sensors': 'input_type',
+    'numbers': 'input_type',
+    'switches': 'write_type',
+    'lights': 'write_type',
+    'fans': 'write_type',
+}
+
+# Default table per section when the entity does not name one
+DEFAULT_TABLES = {
+    'sensors': 'holding_register',
+    'binary_sensors': 'coil',
+    'numbers': 'holding_register',
+    'switches': 'holding_register',
+    'lights': 'holding_register',
+    'fans': 'holding_register',
+}
+
+# Registers occupied per data_type
+DATA_TYPE_WORDS = {
+    'int16': 1, 'uint16': 1, 'float16': 1,
+    'int32': 2, 'uint32': 2, 'float32': 2,
+    'int64': 4, 'uint64': 4, 'float64': 4,
+}
+
+# Unconfigured addresses a block read may span to reach the next entity
+DEFAULT_MAX_GAP = 16
+
+# Entity verification states
+READABLE = 'readable'
+OUT_OF_RANGE = 'out_of_range'
+ERROR = 'error'
+DEAD = 'dead'
+
+ConfiguredEntity = namedtuple('ConfiguredEntity', ['section', 'name', 'slave', 'table', 'address', 'count'])
+ConfiguredEntity.__doc__ = """Register range one configured entity reads"""
+
+
+def load_hubs(text: str) -> List[Dict]:
+    """
+    Parse modbus.yaml contents into hub dicts
+
+    Accepts the generated top-level list as well as a {'modbus': [...]} mapping.
+
+    Raises:
+        ConfigurationError: not a Modbus hub list
+    """
+    try:
+        data = yaml.safe_load(text)
+    except yaml.YAMLError as e:
+        raise ConfigurationError(f'Invalid YAML: {e}')
+    if isinstance(data, dict):
+        data = data.get('modbus', [data])
+    if not isinstance(data, list) or not all(isinstance(hub, dict) and hub.get('host') for hub in data):
+        raise ConfigurationError('Configuration is not a list of Modbus TCP hubs')
+    return data
+
+
+def hub_entities(hub: Dict) -> List[ConfiguredEntity]:
+    """
+    Register ranges of all entities of a hub
+
+    Entities without an address or with an unknown table are skipped.
+    """
+    hub_slave = hub.get('slave', 1)
+    entities = []
+    for section, table_key in ENTITY_SECTIONS.items():
+        for entity in hub.get(section) or []:
+            if 'address' not in entity:
+                continue
+            table = PROFILE_TABLES.get(entity.get(table_key, ''), entity.get(table_key)) or DEFAULT_TABLES[section]
+            if table not in TABLE_FUNCTIONS:
+                logger.debug(f"Skipping {entity.get('name')}: unknown table {entity.get(table_key)}")
+                continue
+            if table in ('coil', 'discrete_input'):
+                count = 1
+            else:
+                count = entity.get('count') or DATA_TYPE_WORDS.get(entity.get('data_type', 'uint16'), 1)
+            slave = entity.get('slave', entity.get('device_address', hub_slave))
+            entities.append(ConfiguredEntity(section, entity.get('name'), int(slave), table,
+                                             int(entity['address']), int(count)))
+    return entities
+
+
+def plan_block_reads(entities: List[ConfiguredEntity],
+                     max_gap: int = DEFAULT_MAX_GAP) -> Dict[Tuple[int, int], List[List[ConfiguredEntity]]]:
+    """
+    Group entities into block reads
+
+    Entities of one slave and table share a block when at most max_gap
+    unconfigured addresses lie between them and the block stays within the
+    function's read limit. A gap the device rejects is resolved by bisection.
+
+    Returns:
+        {(slave, function_code): [entities of each block]}
+    """
+    groups: Dict[Tuple[int, int], List[ConfiguredEntity]] = {}
+    for entity in entities:
+        groups.setdefault((entity.slave, TABLE_FUNCTIONS[entity.table]), []).append(entity)
+
+    plan = {}
+    for (slave, function_code), members in groups.items():
+        limit = function_limit(function_code)
+        blocks: List[List[ConfiguredEntity]] = []
+        block_start = block_end = None
+        for entity in sorted(members, key=lambda e: (e.address, e.count)):
+            end = entity.address + entity.count
+            if blocks and entity.address <= block_end + max_gap and max(block_end, end) - block_start <= limit:
+                blocks[-1].append(entity)
+                block_end = max(block_end, end)
+            else:
+                blocks.append([entity])
+                block_start, block_end = entity.address, end
+        plan[(slave, function_code)] = blocks
+    return plan
+
+
+def _span(block: List[ConfiguredEntity]) -> Tuple[int, int]:
+    """(start, count) read covering a block"""
+    start = min(entity.address for entity in block)
+    return start, max(entity.address + entity.count for entity in block) - start
+
+
+def _entity_status(status: str, exception_code: Optional[int] = None) -> Dict:
+    return {'status': status, 'exception_code': exception_code}
+
+
+async def verify_hub(hub: Dict, timeout: float = 2, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                     max_gap: int = DEFAULT_MAX_GAP) -> Dict:
+    """
+    Verify all entities of one hub over a single connection
+
+    Blocks answered with an exception are split in halves and read again
+    (pipelined per round) until the failing entities are isolated.
+
+    Returns:
+        {name, host, port, connection, reads, summary, entities: [...]}
+    """
+    host, port = hub['host'], hub.get('port', 502)
+    entities = hub_entities(hub)
+    results: Dict[ConfiguredEntity, Dict] = {}
+    connection = 'success'
+    reads = 0
+
+    client = AsyncNativeModbusClient(host, port, hub.get('timeout', timeout), hub.get('slave', 1))
+    try:
+        if not await client.connect():
+            connection = 'failed'
+        else:
+            pending = [(slave, function_code, block)
+                       for (slave, function_code), blocks in plan_block_reads(entities, max_gap).items()
+                       for block in blocks]
+            while pending and client.sock is not None:
+                retry = []
+                for slave in {slave for slave, _, _ in pending}:
+                    batch = [(function_code, block) for s, function_code, block in pending if s == slave]
+                    outcomes = await client.read_pipelined(
+                        [(function_code, *_span(block)) for function_code, block in batch],
+                        unit=slave, max_in_flight=max_in_flight
+                    )
+                    reads += len(batch)
+                    for (function_code, block), outcome in zip(batch, outcomes):
+                        if outcome.data is not None:
+                            status = _entity_status(READABLE)
+                        elif outcome.exception_code is None:
+                            status = _entity_status(DEAD)
+                        elif len(block) > 1:
+                            middle = len(block) // 2
+                            retry += [(slave, function_code, block[:middle]),
+                                      (slave, function_code, block[middle:])]
+                            continue
+                        elif outcome.exception_code in (ILLEGAL_DATA_ADDRESS, ILLEGAL_DATA_VALUE):
+                            status = _entity_status(OUT_OF_RANGE, outcome.exception_code)
+                        else:
+                            status = _entity_status(ERROR, outcome.exception_code)
+                        for entity in block:
+                            results[entity] = status
+                pending = retry
+    except HostUnavailableError as e:
+        logger.warning(str(e))
+        connection = 'unavailable'
+    finally:
+        client.close()
+
+    entries = []
+    summary = {READABLE: 0, OUT_OF_RANGE: 0, ERROR: 0, DEAD: 0}
+    for entity in entities:
+        status = results.get(entity, _entity_status(DEAD))
+        summary[status['status']] += 1
+        entries.append({
+            'section': entity.section,
+            'name': entity.name,
+            'slave': entity.slave,
+            'table': entity.table,
+            'address': entity.address,
+            'count': entity.count,
+            **status
+        })
+
+    logger.info(f"Verified {len(entities)} entities of {host}:{port} with {reads} reads: {summary}")
+    return {
+        'name': hub.get('name'),
+        'host': host,
+        'port': port,
+        'connection': connection,
+        'reads': reads,
+        'summary': summary,
+        'entities': entries
+    }
+
+
+def unverified_hub(hub: Dict, connection: str = 'timeout') -> Dict:
+    """Report for a hub whose verification did not finish: every entity dead"""
+    entities = hub_entities(hub)
+    return {
+        'name': hub.get('name'),
+        'host': hub['host'],
+        'port': hub.get('port', 502),
+        'connection': connection,
+        'reads': 0,
+        'summary': {READABLE: 0, OUT_OF_RANGE: 0, ERROR: 0, DEAD: len(entities)},
+        'entities': [
+            {'section': e.section, 'name': e.name, 'slave': e.slave, 'table': e.table,
+             'address': e.address, 'count': e.count, **_entity_status(DEAD)}
+            for e in entities
+        ]
+    }
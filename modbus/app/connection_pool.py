@@ -0,0 +1,149 @@
+"""
+Pooled native Modbus TCP connections
+Keeps one NativeModbusClient per (host, port) open between API calls, so
+repeated writes and read-backs don't pay a TCP handshake each time and small
+PLCs (LOGO! accepts only a few connections) see a single client. Each
+connection is used by one caller at a time.
+"""
+
+import logging
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Tuple
+
+from modbus_codec import NativeModbusClient
+from modbus_exceptions import ModbusConnectionError
+
+logger = logging.getLogger(__name__)
+
+# Seconds an unused connection stays open
+DEFAULT_IDLE_TIMEOUT = 60
+
+
+def _peer_closed(sock: socket.socket) -> bool:
+    """
+    Check an idle socket without blocking
+
+    EOF or a reset means the device dropped the connection; unread bytes
+    mean the stream is out of step. Either way it must not be reused.
+    """
+    try:
+        sock.setblocking(False)
+        try:
+            sock.recv(1, socket.MSG_PEEK)
+        finally:
+            sock.setblocking(True)
+    except BlockingIOError:
+        return False
+    except OSError:
+        pass
+    return True
+
+
+class _PooledConnection:
+    """A pooled client and the lock serializing its users"""
+
+    __slots__ = ('client', 'lock', 'last_used')
+
+    def __init__(self, client: NativeModbusClient):
+        self.client = client
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+
+
+class ModbusConnectionPool:
+    """Thread-safe pool of native Modbus TCP connections keyed by (host, port)"""
+
+    def __init__(self, idle_timeout: float = DEFAULT_IDLE_TIMEOUT):
+        """
+        Initialize connection pool
+
+        Args:
+            idle_timeout: Seconds before an unused connection is closed
+        """
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._connections: Dict[Tuple[str, int], _PooledConnection] = {}
+
+    @contextmanager
+    def acquire(self, host: str, port: int = 502, unit: int = 1, timeout: float = 2) -> Iterator[NativeModbusClient]:
+        """
+        Borrow the connection to host:port, connecting if needed
+
+        Blocks while another caller uses the same connection. A connection
+        the caller left closed (e.g. after a timeout) or the device closed
+        while idle is reopened.
+
+        Raises:
+            ModbusConnectionError: connection could not be opened
+            HostUnavailableError: the host's circuit breaker is open
+        """
+        self._evict_idle()
+        key = (host, port)
+        with self._lock:
+            pooled = self._connections.get(key)
+            if pooled is None:
+                pooled = _PooledConnection(NativeModbusClient(host, port, timeout, unit))
+                self._connections[key] = pooled
+
+        with pooled.lock:
+            client = pooled.client
+            client.unit = unit
+            client.timeout = timeout
+            if client.sock is not None and _peer_closed(client.sock):
+                logger.debug(f"Pooled connection to {host}:{port} was closed by the device, reconnecting")
+                client.close()
+            if client.sock is None:
+                if not client.connect():
+                    raise ModbusConnectionError(f'Failed to connect to {host}:{port}',
+                                                {'host': host, 'port': port})
+            else:
+                client.sock.settimeout(timeout)
+            try:
+                yield client
+            except BaseException:
+                # The stream may hold unread replies
+                client.close()
+                raise
+            finally:
+                pooled.last_used = time.monotonic()
+
+    def _evict_idle(self):
+        """Close connections unused for longer than idle_timeout"""
+        now = time.monotonic()
+        with self._lock:
+            for key, pooled in list(self._connections.items()):
+                if now - pooled.last_used > self.idle_timeout and pooled.lock.acquire(blocking=False):
+                    try:
+                        pooled.client.close()
+                    finally:
+                        pooled.lock.release()
+                    del self._connections[key]
+                    logger.debug(f"Closed idle connection to {key[0]}:{key[1]}")
+
+    def close_all(self):
+        """Close every pooled connection"""
+        with self._lock:
+            for pooled in self._connections.values():
+                with pooled.lock:
+                    pooled.client.close()
+            self._connections.clear()
+
+    def stats(self) -> Dict[str, Dict]:
+        """Open connections and their idle time"""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                f"{host}:{port}": {
+                    'connected': pooled.client.sock is not None,
+                    'in_use': pooled.lock.locked(),
+                    'idle': round(now - pooled.last_used, 1)
+                }
+                for (host, port), pooled in self._connections.items()
+            }
+
+
+# Global connection pool
+connection_pool = ModbusConnectionPool()
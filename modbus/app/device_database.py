@@ -5,6 +5,7 @@ Provides structured device information based on ports, manufacturers, and detect
 import json
 import logging
 import os
+import re
 from typing import Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
@@ -93,7 +94,8 @@ class DeviceDatabase:
         port: int,
         banner: Optional[str] = None,
         modbus_info: Optional[str] = None,
-        vendor_id: Optional[int] = None
+        vendor_id: Optional[int] = None,
+        order_number: Optional[str] = None
     ) -> Tuple[str, str, str]:
         """
         Identify device based on multiple detection criteria
@@ -103,6 +105,7 @@ class DeviceDatabase:
             banner: Banner string from service detection
             modbus_info: Modbus-discover script output
             vendor_id: Modbus vendor ID
+            order_number: Order number (MLFB) read from the device, e.g. via S7 SZL
 
         Returns:
             Tuple of (manufacturer, model, device_type)
@@ -111,6 +114,12 @@ class DeviceDatabase:
         model = "Unknown Device"
         device_type = "MODBUS_DEVICE"
 
+        # Priority 0: Order number names the exact product
+        if order_number:
+            detected = self._detect_from_order_number(order_number)
+            if detected:
+                return detected
+
         # Priority 1: Vendor ID
         if vendor_id is not None:
             vendor_ids = self.db.get('detection_rules', {}).get('vendor_ids', {})
@@ -133,6 +142,22 @@ class DeviceDatabase:
 
         return manufacturer, model, device_type
 
+    def _detect_from_order_number(self, order_number: str) -> Optional[Tuple[str, str, str]]:
+        """
+        Detect device from its order number using the database patterns
+
+        Args:
+            order_number: Order number, e.g. "6ED1052-1MD00-0BA7"
+
+        Returns:
+            Tuple of (manufacturer, model, device_type) or None
+        """
+        normalized = re.sub(r'\s+', '', order_number).upper()
+        for rule in self.db.get('detection_rules', {}).get('order_number_patterns', []):
+            if re.search(rule['pattern'], normalized):
+                return rule['manufacturer'], rule['model'], rule['device_type']
+        return None
+
     def _detect_from_banner(self, text: str) -> Optional[Tuple[str, str, str]]:
         """
         Detect device from banner text using pattern matching
@@ -222,6 +247,15 @@ class DeviceDatabase:
 
         return None
 
+    def get_discovery_defaults(self) -> List[Dict]:
+        """
+        Get probe windows for devices without documented register areas
+
+        Returns:
+            List of window dicts with table, start, count and note
+        """
+        return self.db.get('discovery_defaults', {}).get('windows', [])
+
     def get_all_supported_ports(self) -> List[int]:
         """
         Get list of all supported ports
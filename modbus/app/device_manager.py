@@ -7,6 +7,8 @@ import logging
 from typing import Dict, List, Optional
 from enum import Enum
 
+from register_map import RegisterStatus, RegisterStatusMap
+
 logger = logging.getLogger(__name__)
 
 
@@ -17,13 +19,6 @@ class DeviceProtocol(Enum):
     UNKNOWN = "unknown"
 
 
-class RegisterStatus(Enum):
-    """Register availability status"""
-    AVAILABLE = "available"  # Yellow dot - register exists
-    ERROR = "error"  # Black dot - register doesn't exist or error
-    UNTESTED = "untested"  # Gray dot - not yet tested
-
-
 class IOType(Enum):
     """Input/Output types"""
     DIGITAL_INPUT = "digital_input"  # DI - Discrete Inputs
@@ -60,12 +55,12 @@ class Device:
         # Modbus-specific attributes
         self.slave_id = kwargs.get('slave_id', 1)
 
-        # Register information
+        # Register information (interval-backed address -> RegisterStatus)
         self.registers = {
-            IOType.DIGITAL_INPUT: {},  # address -> RegisterStatus
-            IOType.DIGITAL_OUTPUT: {},
-            IOType.ANALOG_INPUT: {},
-            IOType.ANALOG_OUTPUT: {}
+            IOType.DIGITAL_INPUT: RegisterStatusMap(),
+            IOType.DIGITAL_OUTPUT: RegisterStatusMap(),
+            IOType.ANALOG_INPUT: RegisterStatusMap(),
+            IOType.ANALOG_OUTPUT: RegisterStatusMap()
         }
 
         # I/O Configuration
@@ -95,10 +90,7 @@ class Device:
             'tsap_dst': self.tsap_dst,
             'pdu_size': self.pdu_size,
             'registers': {
-                io_type.value: {
-                    str(addr): status.value
-                    for addr, status in registers.items()
-                }
+                io_type.value: registers.to_json()
                 for io_type, registers in self.registers.items()
             },
             'io_config': {
@@ -133,10 +125,7 @@ class Device:
             for io_type_str, registers in data['registers'].items():
                 try:
                     io_type = IOType(io_type_str)
-                    device.registers[io_type] = {
-                        int(addr): RegisterStatus(status)
-                        for addr, status in registers.items()
-                    }
+                    device.registers[io_type] = RegisterStatusMap.from_json(registers)
                 except (ValueError, KeyError):
                     pass
 
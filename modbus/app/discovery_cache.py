@@ -0,0 +1,231 @@
+"""
+Persistent discovery cache
+Remembers the fingerprint and register maps of every device discovered, so
+rescans only need a cheap verification read instead of a full rediscovery.
+
+Entries are keyed by (MAC or host, port, unit) and carry the fingerprint hash;
+a lookup with a different fingerprint (e.g. new firmware revision) drops the
+entry. Entries also expire after a TTL and can be invalidated explicitly.
+
+Changes are written to disk by a background timer shortly after the first
+unsaved change, so a network scan caching hundreds of devices (on the shared
+asyncio loop) does not rewrite the file once per device.
+"""
+
+import atexit
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from register_map import IntervalSet, register_map_from_json, register_map_to_json
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.environ.get('DISCOVERY_CACHE_PATH', '/data/discovery_cache.json')
+
+# Seconds a cache entry stays valid (24 hours)
+DEFAULT_CACHE_TTL = 24 * 3600
+
+# Seconds changes are collected before the cache file is rewritten
+DEFAULT_FLUSH_DELAY = 2.0
+
+
+def fingerprint_hash(fingerprint: Dict) -> str:
+    """Stable short hash of a fingerprint dict"""
+    encoded = json.dumps(fingerprint, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha1(encoded).hexdigest()[:16]
+
+
+class DiscoveryCache:
+    """Thread-safe JSON-backed cache of device fingerprints and register maps"""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl: float = DEFAULT_CACHE_TTL,
+                 flush_delay: float = DEFAULT_FLUSH_DELAY):
+        """
+        Initialize discovery cache
+
+        Args:
+            path: JSON file the cache is persisted to
+            ttl: Entry lifetime in seconds
+            flush_delay: Seconds changes are batched before they are written
+        """
+        self.path = path
+        self.ttl = ttl
+        self.flush_delay = flush_delay
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._flush_timer: Optional[threading.Timer] = None
+        self._entries: Dict[str, Dict] = self._load()
+        atexit.register(self.flush)
+
+    def _load(self) -> Dict[str, Dict]:
+        """Load cache entries from disk"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            if isinstance(entries, dict):
+                logger.info(f"Loaded {len(entries)} discovery cache entries from {self.path}")
+                return entries
+            logger.error(f"Discovery cache {self.path} contains invalid data, starting empty")
+        except FileNotFoundError:
+            pass
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Error loading discovery cache: {e}")
+        return {}
+
+    def _save(self):
+        """Schedule a write of the cache entries (caller holds the lock)"""
+        if self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.flush_delay, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def flush(self):
+        """Write pending changes to disk now"""
+        with self._write_lock:
+            with self._lock:
+                if self._flush_timer is None:
+                    return
+                self._flush_timer.cancel()
+                self._flush_timer = None
+                encoded = json.dumps(self._entries, separators=(',', ':'))
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                temp_path = f"{self.path}.tmp"
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    f.write(encoded)
+                os.replace(temp_path, self.path)
+            except OSError as e:
+                logger.warning(f"Could not save discovery cache to {self.path}: {e}")
+
+    @staticmethod
+    def key(identity: str, port: int, unit: int) -> str:
+        """Cache key for a device (identity is the MAC address or host)"""
+        return f"{identity}|{port}|{unit}"
+
+    def get(self, identity: str, port: int, unit: int, expected_hash: Optional[str] = None) -> Optional[Dict]:
+        """
+        Get a valid cache entry
+
+        Args:
+            identity: MAC address or host
+            port: Modbus port
+            unit: Unit id
+            expected_hash: Current fingerprint hash; a different stored hash drops the entry
+
+        Returns:
+            Entry dict or None if missing, expired or stale
+        """
+        key = self.key(identity, port, unit)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry.get('updated', 0) > self.ttl:
+                logger.debug(f"Discovery cache entry {key} expired")
+            elif expected_hash is not None and entry.get('fingerprint_hash') != expected_hash:
+                logger.info(f"Fingerprint of {key} changed, dropping cached discovery")
+            else:
+                return entry
+            del self._entries[key]
+            self._save()
+            return None
+
+    def put_fingerprint(self, identity: str, port: int, unit: int, fingerprint: Dict,
+                        verify: Optional[list] = None) -> Dict:
+        """
+        Store a device fingerprint
+
+        Register maps are kept when the fingerprint hash is unchanged.
+
+        Args:
+            fingerprint: Fingerprint dict (device_type, identification)
+            verify: Cheap verification read as [register type, address, count]
+        """
+        key = self.key(identity, port, unit)
+        new_hash = fingerprint_hash(fingerprint)
+        with self._lock:
+            previous = self._entries.get(key, {})
+            entry = {
+                'fingerprint': fingerprint,
+                'fingerprint_hash': new_hash,
+                'device_type': fingerprint.get('device_type'),
+                'verify': verify,
+                'register_maps': previous.get('register_maps', {})
+                if previous.get('fingerprint_hash') == new_hash else {},
+                'updated': time.time()
+            }
+            self._entries[key] = entry
+            self._save()
+            return entry
+
+    def get_register_map(self, identity: str, port: int, unit: int, scope: str) -> Optional[Dict[str, IntervalSet]]:
+        """
+        Get a cached register map
+
+        Args:
+            scope: Name of the map, e.g. the discovery plan or scan profile it came from
+        """
+        entry = self.get(identity, port, unit)
+        if entry is None or scope not in entry.get('register_maps', {}):
+            return None
+        return register_map_from_json(entry['register_maps'][scope])
+
+    def put_register_map(self, identity: str, port: int, unit: int, scope: str,
+                         register_map: Dict[str, IntervalSet]):
+        """Store a register map for an already fingerprinted device"""
+        key = self.key(identity, port, unit)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                logger.debug(f"No fingerprint cached for {key}, not storing register map")
+                return
+            entry.setdefault('register_maps', {})[scope] = register_map_to_json(register_map)
+            self._save()
+
+    def find_template(self, expected_hash: str, scope: str,
+                      exclude: Optional[str] = None) -> Optional[Dict[str, IntervalSet]]:
+        """
+        Get the register map of another device with the same fingerprint
+
+        Args:
+            expected_hash: Fingerprint hash the device must share
+            scope: Register map name
+            exclude: Cache key of the device asking (skipped)
+
+        Returns:
+            Most recently stored matching map, or None
+        """
+        now = time.time()
+        with self._lock:
+            candidates = [
+                entry for key, entry in self._entries.items()
+                if key != exclude
+                and entry.get('fingerprint_hash') == expected_hash
+                and scope in entry.get('register_maps', {})
+                and now - entry.get('updated', 0) <= self.ttl
+            ]
+            if not candidates:
+                return None
+            newest = max(candidates, key=lambda entry: entry.get('updated', 0))
+            return register_map_from_json(newest['register_maps'][scope])
+
+    def invalidate(self, identity: Optional[str] = None):
+        """Drop entries of one device identity (all ports/units), or everything"""
+        with self._lock:
+            if identity is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k.split('|', 1)[0] == identity]:
+                    del self._entries[key]
+            self._save()
+
+
+# Global discovery cache instance
+discovery_cache = DiscoveryCache()
@@ -0,0 +1,177 @@
+"""
+Discovery plan compiler
+Turns a device profile or device database model entry into the minimal set of
+block reads that covers its documented register areas, so adding a device to
+device_profiles.py or device_database.json is enough to get a tailored scan.
+"""
+
+import logging
+import re
+from collections import namedtuple
+from typing import Dict, List, Optional, Tuple
+
+from modbus_codec import (
+    function_limit, READ_COILS, READ_DISCRETE_INPUTS, READ_HOLDING_REGISTERS, READ_INPUT_REGISTERS
+)
+from device_profiles import get_device_profile
+from device_database import DeviceDatabase, get_device_database
+
+logger = logging.getLogger(__name__)
+
+# Modbus tables in discovery order
+TABLE_FUNCTIONS = {
+    'discrete_input': READ_DISCRETE_INPUTS,
+    'coil': READ_COILS,
+    'input_register': READ_INPUT_REGISTERS,
+    'holding_register': READ_HOLDING_REGISTERS,
+}
+
+# Result keys used by register discovery
+TABLE_KEYS = {
+    'discrete_input': 'discrete_inputs',
+    'coil': 'coils',
+    'input_register': 'input_registers',
+    'holding_register': 'holding_registers',
+}
+
+# Profile input_type / write_type values (Home Assistant naming) per table
+PROFILE_TABLES = {
+    'discrete_input': 'discrete_input',
+    'coil': 'coil',
+    'coils': 'coil',
+    'input': 'input_register',
+    'holding': 'holding_register',
+    'holdings': 'holding_register',
+}
+
+# Database register range notation, e.g. "I1-I24" or "AM1-AM64"
+RANGE_PATTERN = re.compile(r'^([A-Z]+)(\d+)-(?:[A-Z]+)?(\d+)$')
+
+DiscoveryBlock = namedtuple('DiscoveryBlock', ['table', 'function_code', 'start', 'count', 'note'])
+DiscoveryBlock.__doc__ = """One block read of a discovery plan (start is the Modbus PDU address)"""
+
+# Area: (table, start, count, name)
+Area = Tuple[str, int, int, str]
+
+# Database offset_function -> shift from documented to Modbus PDU addresses
+OFFSET_FUNCTIONS = {
+    'lg8add': -1,  # LOGO! 8 documents 1-based addresses
+}
+
+
+class DiscoveryPlanCompiler:
+    """Compiles discovery plans from device profiles and the device database"""
+
+    def __init__(self, database: Optional[DeviceDatabase] = None):
+        self.database = database or get_device_database()
+
+    @staticmethod
+    def areas_from_profile(profile: Dict) -> List[Area]:
+        """Register areas of a device_profiles.py entry (documented addresses)"""
+        areas = []
+        for name, reg in profile.get('registers', {}).items():
+            table = PROFILE_TABLES.get(reg.get('input_type') or reg.get('write_type'))
+            if table is None:
+                logger.debug(f"Profile register '{name}' has no readable table, skipping")
+                continue
+            areas.append((table, reg.get('start_address', 0), reg.get('count', 1), name))
+        return areas
+
+    @staticmethod
+    def areas_from_database(model_info: Dict) -> List[Area]:
+        """Register areas of a device_database.json model entry (documented addresses)"""
+        area_map = model_info.get('addressing', {}).get('areas', {})
+
+        areas = []
+        for name, notation in model_info.get('register_ranges', {}).items():
+            match = RANGE_PATTERN.match(notation)
+            if not match:
+                logger.debug(f"Cannot parse register range '{notation}', skipping")
+                continue
+            prefix, first, last = match.group(1), int(match.group(2)), int(match.group(3))
+            area = area_map.get(prefix)
+            if area is None:
+                logger.debug(f"No address mapping for area '{prefix}', skipping")
+                continue
+            start = area['start'] + first - 1
+            areas.append((area['table'], start, last - first + 1, notation))
+        return areas
+
+    @staticmethod
+    def pdu_offset(model_info: Optional[Dict]) -> int:
+        """Shift from documented to Modbus PDU addresses per the model's offset_function"""
+        return OFFSET_FUNCTIONS.get((model_info or {}).get('addressing', {}).get('offset_function'), 0)
+
+    @staticmethod
+    def to_pdu_addresses(areas: List[Area], model_info: Optional[Dict]) -> List[Area]:
+        """Shift documented area addresses to Modbus PDU addresses per the model's offset_function"""
+        offset = DiscoveryPlanCompiler.pdu_offset(model_info)
+        if not offset:
+            return areas
+        return [(table, max(0, start + offset), count, name) for table, start, count, name in areas]
+
+    def default_areas(self) -> List[Area]:
+        """Generic probe windows from the device database"""
+        return [
+            (window['table'], window['start'], window['count'], window.get('note', ''))
+            for window in self.database.get_discovery_defaults()
+        ]
+
+    @staticmethod
+    def merge(areas: List[Area], merge_adjacent: bool = True) -> List[DiscoveryBlock]:
+        """
+        Merge areas into the fewest block reads covering exactly the same addresses
+
+        Overlapping (and, with merge_adjacent, touching) areas of one table are
+        joined; blocks are then split at the protocol limit per request.
+        """
+        blocks = []
+        for table, function_code in TABLE_FUNCTIONS.items():
+            spans = sorted((start, start + count, name) for t, start, count, name in areas
+                           if t == table and count > 0)
+            merged = []
+            for start, end, name in spans:
+                last = merged[-1] if merged else None
+                if last and (start < last[1] or (merge_adjacent and start == last[1])):
+                    last[1] = max(last[1], end)
+                    last[2].append(name)
+                else:
+                    merged.append([start, end, [name]])
+
+            limit = function_limit(function_code)
+            for start, end, names in merged:
+                note = ', '.join(names)
+                for block_start in range(start, end, limit):
+                    blocks.append(DiscoveryBlock(table, function_code, block_start,
+                                                 min(limit, end - block_start), note))
+        return blocks
+
+    def compile(self, manufacturer: Optional[str] = None, model: Optional[str] = None) -> List[DiscoveryBlock]:
+        """
+        Compile the discovery plan for a device
+
+        Uses the device profile if one exists, then the device database model
+        entry, then the generic probe windows. Both sources document device
+        addresses; the model's offset_function maps them to PDU addresses.
+        """
+        if manufacturer and model:
+            model_info = self.database.get_device_profile(manufacturer, model)
+            profile = get_device_profile(manufacturer, model)
+            if profile and profile.get('registers'):
+                areas = self.areas_from_profile(profile)
+                if areas:
+                    logger.info(f"Discovery plan for {manufacturer} {model} from device profile")
+                    return self.merge(self.to_pdu_addresses(areas, model_info))
+
+            if model_info:
+                areas = self.areas_from_database(model_info)
+                if areas:
+                    logger.info(f"Discovery plan for {manufacturer} {model} from device database")
+                    return self.merge(self.to_pdu_addresses(areas, model_info))
+
+        # Generic windows are probed separately so each one reports on its own
+        return self.merge(self.default_areas(), merge_adjacent=False)
+
+
+# Global compiler instance
+plan_compiler = DiscoveryPlanCompiler()
@@ -0,0 +1,243 @@
+"""
+Host health registry with a per-host circuit breaker
+Shared by every prober (register scanner, device detection, LOGO! scans,
+discovery), so a powered-off PLC costs a few timeouts once instead of one
+timeout per read in every subsystem.
+
+States:
+- closed: calls pass; consecutive connect/read timeouts are counted
+- open: calls fail immediately with HostUnavailableError (a ModbusConnectionError)
+- half-open: after reset_timeout a single probe call is let through; a reply
+  closes the circuit, another timeout opens it again
+"""
+
+import asyncio
+import logging
+import socket
+import threading
+import time
+from enum import Enum
+from typing import Dict, Optional
+
+from modbus_exceptions import HostUnavailableError, ModbusTimeoutError
+
+logger = logging.getLogger(__name__)
+
+# Consecutive timeouts that open the circuit
+DEFAULT_FAILURE_THRESHOLD = 3
+
+# Seconds an open circuit waits before letting a probe through
+DEFAULT_RESET_TIMEOUT = 30
+
+
+class CircuitState(Enum):
+    """Circuit breaker state"""
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+def is_timeout(error) -> bool:
+    """
+    Check whether an exception or pymodbus response means "no answer"
+
+    Connection refused is an answer (the host is up), so it does not count.
+    """
+    if isinstance(error, HostUnavailableError):
+        return False
+    if isinstance(error, (socket.timeout, asyncio.TimeoutError, TimeoutError, ModbusTimeoutError)):
+        return True
+    if isinstance(error, ConnectionRefusedError):
+        return False
+    if isinstance(error, OSError):
+        # Host/network unreachable and similar connect failures
+        return True
+    try:
+        from pymodbus.exceptions import ConnectionException, ModbusIOException
+    except ImportError:
+        return False
+    return isinstance(error, (ConnectionException, ModbusIOException))
+
+
+class HostCircuit:
+    """Breaker state of one host"""
+
+    __slots__ = ('state', 'failures', 'opened_at', 'probe_started', 'last_error')
+
+    def __init__(self):
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_started = 0.0
+        self.last_error = None
+
+    def to_dict(self, reset_timeout: float) -> Dict:
+        retry_in = None
+        if self.state == CircuitState.OPEN:
+            retry_in = round(max(0.0, reset_timeout - (time.monotonic() - self.opened_at)), 1)
+        return {
+            'state': self.state.value,
+            'failures': self.failures,
+            'retry_in': retry_in,
+            'last_error': self.last_error
+        }
+
+
+class HostHealthRegistry:
+    """Thread-safe registry of per-host circuit breakers"""
+
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout: float = DEFAULT_RESET_TIMEOUT):
+        """
+        Initialize host health registry
+
+        Args:
+            failure_threshold: Consecutive timeouts that open a circuit
+            reset_timeout: Seconds before an open circuit allows a probe
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._circuits: Dict[str, HostCircuit] = {}
+
+    def check(self, host: str):
+        """
+        Gate a call to host
+
+        Raises:
+            HostUnavailableError: circuit is open (or half-open with a probe running)
+        """
+        with self._lock:
+            circuit = self._circuits.get(host)
+            if circuit is None or circuit.state == CircuitState.CLOSED:
+                return
+
+            now = time.monotonic()
+            if circuit.state == CircuitState.OPEN and now - circuit.opened_at >= self.reset_timeout:
+                circuit.state = CircuitState.HALF_OPEN
+                circuit.probe_started = now
+                logger.info(f"Circuit for {host} half-open, probing")
+                return
+            if circuit.state == CircuitState.HALF_OPEN and now - circuit.probe_started >= self.reset_timeout:
+                # The previous probe never reported back; let another one through
+                circuit.probe_started = now
+                return
+
+            retry_in = max(0.0, self.reset_timeout - (now - circuit.opened_at))
+            raise HostUnavailableError(
+                f'{host} is not responding (circuit {circuit.state.value}), skipping',
+                {'host': host, 'state': circuit.state.value, 'retry_in': round(retry_in, 1),
+                 'last_error': circuit.last_error}
+            )
+
+    def record_success(self, host: str):
+        """Record a reply from host (any well-formed response, including exceptions)"""
+        with self._lock:
+            circuit = self._circuits.get(host)
+            if circuit is None:
+                return
+            if circuit.state != CircuitState.CLOSED:
+                logger.info(f"Circuit for {host} closed, host is responding again")
+            del self._circuits[host]
+
+    def record_connect(self, host: str):
+        """
+        Record an accepted TCP connection
+
+        Closes a half-open circuit (the host is back), but does not reset the
+        timeout count of a closed one: a host that accepts connections and
+        never answers must still trip the breaker.
+        """
+        with self._lock:
+            circuit = self._circuits.get(host)
+            if circuit is not None and circuit.state == CircuitState.HALF_OPEN:
+                logger.info(f"Circuit for {host} closed, host is accepting connections again")
+                del self._circuits[host]
+
+    def record_failure(self, host: str, error=None):
+        """Record a connect or read timeout on host"""
+        with self._lock:
+            circuit = self._circuits.setdefault(host, HostCircuit())
+            circuit.failures += 1
+            circuit.last_error = str(error) if error is not None else None
+            if circuit.state == CircuitState.HALF_OPEN or (
+                    circuit.state == CircuitState.CLOSED and circuit.failures >= self.failure_threshold):
+                circuit.state = CircuitState.OPEN
+                circuit.opened_at = time.monotonic()
+                logger.warning(f"Circuit for {host} opened after {circuit.failures} timeout(s)")
+
+    def observe(self, host: str, result):
+        """Record the outcome of a call from its result or exception"""
+        if is_timeout(result):
+            self.record_failure(host, result)
+        elif not isinstance(result, HostUnavailableError):
+            self.record_success(host)
+
+    def state(self, host: str) -> CircuitState:
+        """Current circuit state of host"""
+        with self._lock:
+            circuit = self._circuits.get(host)
+            return circuit.state if circuit else CircuitState.CLOSED
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """State of all hosts with recorded failures"""
+        with self._lock:
+            return {host: circuit.to_dict(self.reset_timeout) for host, circuit in self._circuits.items()}
+
+    def reset(self, host: Optional[str] = None):
+        """Close the circuit of one host, or of all hosts"""
+        with self._lock:
+            if host is None:
+                self._circuits.clear()
+            else:
+                self._circuits.pop(host, None)
+
+
+class GuardedClient:
+    """
+    Proxy around a pymodbus client that consults the host health registry
+
+    Every client method call is gated by check() and its outcome recorded, so
+    the many direct self.client.read_*() calls in the scanners fail fast once
+    the host's circuit is open. Works for sync and async clients.
+    """
+
+    def __init__(self, client, host: str, registry: 'HostHealthRegistry'):
+        self._client = client
+        self._host = host
+        self._registry = registry
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr) or name in ('close', 'connect', 'connected'):
+            return attr
+
+        host, registry = self._host, self._registry
+
+        def call(*args, **kwargs):
+            registry.check(host)
+            try:
+                result = attr(*args, **kwargs)
+            except Exception as e:
+                registry.observe(host, e)
+                raise
+            if asyncio.iscoroutine(result):
+                return _observe_coroutine(result, host, registry)
+            registry.observe(host, result)
+            return result
+
+        return call
+
+
+async def _observe_coroutine(coro, host: str, registry: HostHealthRegistry):
+    try:
+        result = await coro
+    except Exception as e:
+        registry.observe(host, e)
+        raise
+    registry.observe(host, result)
+    return result
+
+
+# Global host health registry
+host_health = HostHealthRegistry()
@@ -0,0 +1,667 @@
+"""
+Lightweight Modbus TCP codec for the scanning hot path
+
+Discovery only needs a handful of read function codes, so instead of going
+through a full pymodbus client (transaction manager, framer and response
+object per request) the scanners pack MBAP/PDU frames with struct.pack_into
+into preallocated buffers and read replies with recv_into.
+
+pymodbus remains the path for full-featured operations; this module only
+depends on the standard library so pure discovery never imports pymodbus.
+
+Frame layout (Modbus Messaging on TCP/IP Implementation Guide v1.0b):
+- MBAP header: transaction id (2), protocol id (2, always 0),
+  length (2, unit id + PDU), unit id (1)
+- PDU: function code (1) + data
+- Exception responses set bit 0x80 on the function code and carry one
+  exception code byte
+"""
+
+import asyncio
+import socket
+import struct
+import logging
+from collections import namedtuple
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from modbus_exceptions import HostUnavailableError, ModbusConnectionError, ModbusTimeoutError, ModbusReadError
+from host_health import host_health
+
+logger = logging.getLogger(__name__)
+
+# Read function codes used during discovery
+READ_COILS = 0x01
+READ_DISCRETE_INPUTS = 0x02
+READ_HOLDING_REGISTERS = 0x03
+READ_INPUT_REGISTERS = 0x04
+
+BIT_FUNCTIONS = (READ_COILS, READ_DISCRETE_INPUTS)
+REGISTER_FUNCTIONS = (READ_HOLDING_REGISTERS, READ_INPUT_REGISTERS)
+
+# Write function codes used by bulk writes
+WRITE_MULTIPLE_COILS = 0x0F
+WRITE_MULTIPLE_REGISTERS = 0x10
+
+# Modbus exception codes
+ILLEGAL_FUNCTION = 0x01
+ILLEGAL_DATA_ADDRESS = 0x02
+ILLEGAL_DATA_VALUE = 0x03
+SERVER_DEVICE_FAILURE = 0x04
+GATEWAY_PATH_UNAVAILABLE = 0x0A
+GATEWAY_TARGET_FAILED = 0x0B
+
+# Protocol limits
+MAX_READ_BITS = 2000
+MAX_READ_REGISTERS = 125
+MAX_WRITE_BITS = 1968
+MAX_WRITE_REGISTERS = 123
+MAX_ADU_LENGTH = 260
+MBAP_HEADER_LENGTH = 7
+
+# Maximum number of requests kept in flight on one connection
+DEFAULT_MAX_IN_FLIGHT = 4
+MAX_PIPELINE_DEPTH = 32
+
+MBAP_HEADER = struct.Struct('>HHHB')        # transaction, protocol, length, unit
+READ_REQUEST = struct.Struct('>HHHBBHH')    # MBAP + function, address, count
+PDU_HEADER = struct.Struct('>BB')           # function code, byte count / exception code
+WRITE_HEADER = struct.Struct('>HHHBBHHB')   # MBAP + function, address, quantity, byte count
+WRITE_RESPONSE = struct.Struct('>BHH')      # function code, address, quantity
+
+ReadOutcome = namedtuple('ReadOutcome', ['function_code', 'address', 'count', 'exception_code', 'data'])
+ReadOutcome.__doc__ = """Result of one pipelined read
+
+data is a bytes copy of the payload when the read succeeded, exception_code
+is set for exception responses and both are None when no reply arrived.
+"""
+
+
+def function_limit(function_code: int) -> int:
+    """Get the maximum quantity a single read request may ask for"""
+    return MAX_READ_BITS if function_code in BIT_FUNCTIONS else MAX_READ_REGISTERS
+
+
+WriteOutcome = namedtuple('WriteOutcome', ['function_code', 'address', 'count', 'exception_code', 'ok'])
+WriteOutcome.__doc__ = """Result of one pipelined write
+
+ok is True when the device echoed the request, exception_code is set for
+exception responses and both are falsy when no reply arrived.
+"""
+
+
+def write_limit(function_code: int) -> int:
+    """Get the maximum quantity a single write request may carry"""
+    return MAX_WRITE_BITS if function_code == WRITE_MULTIPLE_COILS else MAX_WRITE_REGISTERS
+
+
+def expected_byte_count(function_code: int, count: int) -> int:
+    """Get the payload length of a successful read response"""
+    if function_code in BIT_FUNCTIONS:
+        return (count + 7) // 8
+    return count * 2
+
+
+def pack_read_request(buffer, offset: int, transaction_id: int, unit: int,
+                      function_code: int, address: int, count: int) -> None:
+    """Pack a complete read request ADU (12 bytes) into buffer at offset"""
+    READ_REQUEST.pack_into(buffer, offset, transaction_id, 0x0000, 6, unit,
+                           function_code, address, count)
+
+
+def pack_bits(values: Sequence[bool]) -> bytes:
+    """Encode bits LSB-first as in coil payloads"""
+    packed = bytearray((len(values) + 7) // 8)
+    for i, value in enumerate(values):
+        if value:
+            packed[i >> 3] |= 1 << (i & 7)
+    return bytes(packed)
+
+
+def pack_write_request(transaction_id: int, unit: int, function_code: int, address: int,
+                       values: Sequence) -> bytes:
+    """Pack a complete Write Multiple Coils/Registers request ADU"""
+    if function_code == WRITE_MULTIPLE_COILS:
+        payload = pack_bits(values)
+    else:
+        payload = struct.pack(f'>{len(values)}H', *values)
+    # MBAP length counts unit id, function, address, quantity, byte count and payload
+    return WRITE_HEADER.pack(transaction_id, 0x0000, 7 + len(payload), unit, function_code,
+                             address, len(values), len(payload)) + payload
+
+
+def unpack_registers(data, count: int) -> Tuple[int, ...]:
+    """Decode big-endian 16-bit registers from a response payload"""
+    return struct.unpack_from(f'>{count}H', data, 0)
+
+
+def unpack_bits(data, count: int) -> List[bool]:
+    """Decode LSB-first packed bits from a response payload"""
+    return [bool(data[i >> 3] & (1 << (i & 7))) for i in range(count)]
+
+
+class _ModbusFraming:
+    """Shared buffers and frame parsing for the blocking and asyncio clients"""
+
+    def __init__(self, host: str, port: int, timeout: float, unit: int):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.unit = unit
+        self._transaction_id = 0
+        # One 12-byte slot per in-flight request, sent with a single write
+        self._tx = bytearray(READ_REQUEST.size * MAX_PIPELINE_DEPTH)
+        self._tx_view = memoryview(self._tx)
+        self._rx = bytearray(MAX_ADU_LENGTH)
+        self._rx_view = memoryview(self._rx)
+        # Error that aborted the last pipelined call (None after success or a timeout)
+        self.abort_error: Optional[Exception] = None
+
+    def _next_transaction_id(self) -> int:
+        self._transaction_id = (self._transaction_id + 1) & 0xFFFF
+        return self._transaction_id
+
+    def _pack(self, slot: int, function_code: int, address: int, count: int, unit: int) -> int:
+        """Pack a request into tx slot and return its transaction id"""
+        transaction_id = self._next_transaction_id()
+        pack_read_request(self._tx, slot * READ_REQUEST.size, transaction_id, unit,
+                          function_code, address, count)
+        return transaction_id
+
+    def _pack_batch(self, requests: Sequence[Tuple[int, int, int]], cursor: int, window: int, unit: int,
+                    unsupported: Set[int], outcomes: List) -> Tuple[Dict[int, int], int]:
+        """
+        Pack up to window requests starting at cursor into the tx buffer
+
+        Requests for a function code in unsupported are not sent; they get an
+        ILLEGAL_FUNCTION outcome straight away.
+
+        Returns:
+            (transaction id -> request index, cursor after the batch)
+        """
+        pending = {}
+        while cursor < len(requests) and len(pending) < window:
+            function_code, address, count = requests[cursor]
+            if function_code in unsupported:
+                outcomes[cursor] = ReadOutcome(function_code, address, count, ILLEGAL_FUNCTION, None)
+            else:
+                pending[self._pack(len(pending), function_code, address, count, unit)] = cursor
+            cursor += 1
+        return pending, cursor
+
+    def _parse_header(self) -> Tuple[int, int]:
+        """
+        Validate the MBAP header in the rx buffer
+
+        Returns:
+            (transaction_id, remaining PDU length after the unit id)
+        """
+        transaction_id, protocol_id, length, _unit = MBAP_HEADER.unpack_from(self._rx, 0)
+        # Unit id, function code and byte count / exception code at least
+        if protocol_id != 0x0000 or not 3 <= length <= MAX_ADU_LENGTH - 6:
+            raise ModbusReadError(
+                f'Invalid MBAP header from {self.host}:{self.port}',
+                {'protocol_id': protocol_id, 'length': length}
+            )
+        return transaction_id, length - 1
+
+    def _parse_pdu(self, function_code: int, count: int, pdu_length: int):
+        """
+        Interpret the PDU that follows the header in the rx buffer
+
+        Returns:
+            (exception_code, payload view); payload is None for exceptions
+        """
+        pdu = self._rx_view[MBAP_HEADER_LENGTH:MBAP_HEADER_LENGTH + pdu_length]
+        response_function, value = PDU_HEADER.unpack_from(pdu, 0)
+        if response_function == function_code | 0x80:
+            return value, None
+        if response_function != function_code:
+            raise ModbusReadError(
+                f'Unexpected function code 0x{response_function:02X} from {self.host}:{self.port}',
+                {'expected': function_code, 'received': response_function}
+            )
+        if value != expected_byte_count(function_code, count) or value + 2 > pdu_length:
+            raise ModbusReadError(
+                f'Malformed read response from {self.host}:{self.port}',
+                {'function_code': function_code, 'byte_count': value}
+            )
+        return None, pdu[2:2 + value]
+
+    def _parse_write_pdu(self, function_code: int, address: int, count: int, pdu_length: int) -> Optional[int]:
+        """
+        Interpret a write response PDU in the rx buffer
+
+        Returns:
+            Exception code, None if the device echoed address and quantity
+        """
+        pdu = self._rx_view[MBAP_HEADER_LENGTH:MBAP_HEADER_LENGTH + pdu_length]
+        response_function, value = PDU_HEADER.unpack_from(pdu, 0)
+        if response_function == function_code | 0x80:
+            return value
+        if pdu_length < WRITE_RESPONSE.size or WRITE_RESPONSE.unpack_from(pdu, 0) != (function_code, address, count):
+            raise ModbusReadError(
+                f'Malformed write response from {self.host}:{self.port}',
+                {'function_code': function_code, 'address': address}
+            )
+        return None
+
+    def _raise_for_exception(self, function_code: int, address: int, exception_code: int):
+        raise ModbusReadError(
+            f'Device {self.host}:{self.port} returned exception 0x{exception_code:02X} '
+            f'for function 0x{function_code:02X} at {address}',
+            {'function_code': function_code, 'address': address, 'exception_code': exception_code}
+        )
+
+
+class NativeModbusClient(_ModbusFraming):
+    """Minimal blocking Modbus TCP client for discovery reads"""
+
+    def __init__(self, host: str, port: int = 502, timeout: float = 2, unit: int = 1):
+        super().__init__(host, port, timeout, unit)
+        self.sock: Optional[socket.socket] = None
+
+    def connect(self) -> bool:
+        """
+        Open the TCP connection
+
+        Raises:
+            HostUnavailableError: the host's circuit breaker is open
+        """
+        host_health.check(self.host)
+        try:
+            self.sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            host_health.record_connect(self.host)
+            return True
+        except OSError as e:
+            logger.debug(f"Native Modbus connect to {self.host}:{self.port} failed: {e}")
+            host_health.observe(self.host, e)
+            self.sock = None
+            return False
+
+    def close(self):
+        """Close the TCP connection"""
+        if self.sock:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+            self.sock = None
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _recv_exact(self, length: int, offset: int = 0):
+        """Fill rx buffer[offset:offset + length] from the socket"""
+        view = self._rx_view[offset:offset + length]
+        received = 0
+        while received < length:
+            n = self.sock.recv_into(view[received:], length - received)
+            if n == 0:
+                raise ModbusConnectionError(f'Connection closed by {self.host}:{self.port}')
+            received += n
+
+    def _receive_frame(self) -> Tuple[int, int]:
+        self._recv_exact(MBAP_HEADER_LENGTH)
+        transaction_id, pdu_length = self._parse_header()
+        self._recv_exact(pdu_length, MBAP_HEADER_LENGTH)
+        return transaction_id, pdu_length
+
+    def read(self, function_code: int, address: int, count: int, unit: Optional[int] = None) -> memoryview:
+        """
+        Perform a single read
+
+        Returns:
+            memoryview of the payload, valid until the next call on this client
+
+        Raises:
+            ModbusReadError: exception response or malformed reply
+            ModbusTimeoutError: no reply within timeout
+            ModbusConnectionError: not connected or connection lost
+        """
+        if self.sock is None:
+            raise ModbusConnectionError(f'Not connected to {self.host}:{self.port}')
+
+        transaction_id = self._pack(0, function_code, address, count, self.unit if unit is None else unit)
+        try:
+            self.sock.sendall(self._tx_view[:READ_REQUEST.size])
+            while True:
+                received_id, pdu_length = self._receive_frame()
+                if received_id == transaction_id:
+                    break
+                logger.debug(f"Dropping stale transaction {received_id} from {self.host}:{self.port}")
+        except socket.timeout:
+            host_health.record_failure(self.host, 'read timeout')
+            raise ModbusTimeoutError(f'Timeout reading from {self.host}:{self.port}',
+                                     {'function_code': function_code, 'address': address})
+        except OSError as e:
+            self.close()
+            raise ModbusConnectionError(f'Connection error with {self.host}:{self.port}: {e}')
+        except ModbusConnectionError:
+            # Closed by the peer; do not keep the dead socket
+            self.close()
+            raise
+
+        host_health.record_success(self.host)
+        exception_code, payload = self._parse_pdu(function_code, count, pdu_length)
+        if exception_code is not None:
+            self._raise_for_exception(function_code, address, exception_code)
+        return payload
+
+    def read_registers(self, function_code: int, address: int, count: int,
+                       unit: Optional[int] = None) -> Tuple[int, ...]:
+        """Read holding or input registers and decode them"""
+        return unpack_registers(self.read(function_code, address, count, unit), count)
+
+    def read_bits(self, function_code: int, address: int, count: int,
+                  unit: Optional[int] = None) -> List[bool]:
+        """Read coils or discrete inputs and decode them"""
+        return unpack_bits(self.read(function_code, address, count, unit), count)
+
+    def probe(self, unit: Optional[int] = None) -> bool:
+        """
+        Check that the peer speaks Modbus TCP
+
+        Any well-formed MBAP reply counts, including exception responses.
+        """
+        try:
+            self.read(READ_COILS, 0, 1, unit)
+            return True
+        except ModbusReadError as e:
+            return 'exception_code' in e.details
+        except (ModbusConnectionError, ValueError, struct.error):
+            return False
+
+    def read_pipelined(self, requests: Sequence[Tuple[int, int, int]], unit: Optional[int] = None,
+                       max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                       cancel_unsupported: bool = False) -> List[ReadOutcome]:
+        """
+        Issue many reads with several requests in flight on one connection
+
+        Args:
+            requests: (function_code, address, count) tuples
+            unit: Unit id (defaults to client unit)
+            max_in_flight: Requests sent before waiting for replies
+            cancel_unsupported: Once a function code is answered with "illegal
+                function", skip its requests that were not sent yet
+
+        Returns:
+            One ReadOutcome per request, in request order
+        """
+        if self.sock is None:
+            raise ModbusConnectionError(f'Not connected to {self.host}:{self.port}')
+
+        unit = self.unit if unit is None else unit
+        window = max(1, min(max_in_flight, MAX_PIPELINE_DEPTH))
+        outcomes: List[Optional[ReadOutcome]] = [None] * len(requests)
+        unsupported: Set[int] = set()
+        cursor = 0
+        self.abort_error = None
+
+        while cursor < len(requests):
+            pending, cursor = self._pack_batch(requests, cursor, window, unit, unsupported, outcomes)
+            if not pending:
+                break
+
+            try:
+                self.sock.sendall(self._tx_view[:READ_REQUEST.size * len(pending)])
+                while pending:
+                    transaction_id, pdu_length = self._receive_frame()
+                    host_health.record_success(self.host)
+                    index = pending.pop(transaction_id, None)
+                    if index is None:
+                        continue
+                    function_code, address, count = requests[index]
+                    exception_code, payload = self._parse_pdu(function_code, count, pdu_length)
+                    outcomes[index] = ReadOutcome(function_code, address, count, exception_code,
+                                                  bytes(payload) if payload is not None else None)
+                    if cancel_unsupported and exception_code == ILLEGAL_FUNCTION:
+                        unsupported.add(function_code)
+            except socket.timeout:
+                logger.debug(f"Pipelined read timeout on {self.host}:{self.port}, "
+                             f"{len(pending)} request(s) unanswered")
+                host_health.record_failure(self.host, 'pipelined read timeout')
+                # The stream may now be out of step; reconnect for the next batch
+                self.close()
+                try:
+                    if not self.connect():
+                        break
+                except HostUnavailableError as e:
+                    logger.debug(f"Stopping pipelined reads: {e}")
+                    break
+            except (OSError, ModbusConnectionError, ModbusReadError) as e:
+                logger.debug(f"Pipelined read aborted on {self.host}:{self.port}: {e}")
+                self.abort_error = e
+                self.close()
+                break
+
+        return [
+            outcome if outcome is not None else ReadOutcome(*requests[i], None, None)
+            for i, outcome in enumerate(outcomes)
+        ]
+
+    def write_pipelined(self, requests: Sequence[Tuple[int, int, Sequence]], unit: Optional[int] = None,
+                        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT) -> List[WriteOutcome]:
+        """
+        Issue Write Multiple Coils/Registers requests with several in flight
+
+        Unlike reads, a timed out batch is not retried on a new connection:
+        the device may have applied the writes.
+
+        Args:
+            requests: (function_code, address, values) tuples within write_limit
+            unit: Unit id (defaults to client unit)
+            max_in_flight: Requests sent before waiting for replies
+
+        Returns:
+            One WriteOutcome per request, in request order
+        """
+        if self.sock is None:
+            raise ModbusConnectionError(f'Not connected to {self.host}:{self.port}')
+
+        unit = self.unit if unit is None else unit
+        window = max(1, min(max_in_flight, MAX_PIPELINE_DEPTH))
+        outcomes: List[Optional[WriteOutcome]] = [None] * len(requests)
+        self.abort_error = None
+
+        for batch_start in range(0, len(requests), window):
+            pending = {}
+            frames = []
+            for index in range(batch_start, min(batch_start + window, len(requests))):
+                function_code, address, values = requests[index]
+                transaction_id = self._next_transaction_id()
+                frames.append(pack_write_request(transaction_id, unit, function_code, address, values))
+                pending[transaction_id] = index
+
+            try:
+                self.sock.sendall(b''.join(frames))
+                while pending:
+                    transaction_id, pdu_length = self._receive_frame()
+                    host_health.record_success(self.host)
+                    index = pending.pop(transaction_id, None)
+                    if index is None:
+                        continue
+                    function_code, address, values = requests[index]
+                    exception_code = self._parse_write_pdu(function_code, address, len(values), pdu_length)
+                    outcomes[index] = WriteOutcome(function_code, address, len(values), exception_code,
+                                                   exception_code is None)
+            except socket.timeout:
+                logger.debug(f"Pipelined write timeout on {self.host}:{self.port}, "
+                             f"{len(pending)} request(s) unanswered")
+                host_health.record_failure(self.host, 'pipelined write timeout')
+                self.close()
+                break
+            except (OSError, ModbusConnectionError, ModbusReadError) as e:
+                logger.debug(f"Pipelined write aborted on {self.host}:{self.port}: {e}")
+                self.abort_error = e
+                self.close()
+                break
+
+        return [
+            outcome if outcome is not None
+            else WriteOutcome(requests[i][0], requests[i][1], len(requests[i][2]), None, False)
+            for i, outcome in enumerate(outcomes)
+        ]
+
+
+class AsyncNativeModbusClient(_ModbusFraming):
+    """Minimal asyncio Modbus TCP client for discovery reads"""
+
+    def __init__(self, host: str, port: int = 502, timeout: float = 2, unit: int = 1):
+        super().__init__(host, port, timeout, unit)
+        self.sock: Optional[socket.socket] = None
+        self._lock = asyncio.Lock()
+
+    async def connect(self) -> bool:
+        """
+        Open the TCP connection
+
+        Raises:
+            HostUnavailableError: the host's circuit breaker is open
+        """
+        host_health.check(self.host)
+        loop = asyncio.get_running_loop()
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        try:
+            await asyncio.wait_for(loop.sock_connect(sock, (self.host, self.port)), self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.sock = sock
+            host_health.record_connect(self.host)
+            return True
+        except (OSError, asyncio.TimeoutError) as e:
+            logger.debug(f"Async Modbus connect to {self.host}:{self.port} failed: {e!r}")
+            host_health.observe(self.host, e)
+            sock.close()
+            return False
+
+    def close(self):
+        """Close the TCP connection"""
+        if self.sock:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+            self.sock = None
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    async def _recv_exact(self, length: int, offset: int = 0):
+        loop = asyncio.get_running_loop()
+        view = self._rx_view[offset:offset + length]
+        received = 0
+        while received < length:
+            n = await loop.sock_recv_into(self.sock, view[received:])
+            if n == 0:
+                raise ModbusConnectionError(f'Connection closed by {self.host}:{self.port}')
+            received += n
+
+    async def _receive_frame(self) -> Tuple[int, int]:
+        await self._recv_exact(MBAP_HEADER_LENGTH)
+        transaction_id, pdu_length = self._parse_header()
+        await self._recv_exact(pdu_length, MBAP_HEADER_LENGTH)
+        return transaction_id, pdu_length
+
+    async def read(self, function_code: int, address: int, count: int, unit: Optional[int] = None) -> bytes:
+        """
+        Perform a single read
+
+        Returns:
+            Payload bytes
+
+        Raises:
+            ModbusReadError, ModbusTimeoutError, ModbusConnectionError
+        """
+        outcome = (await self.read_pipelined([(function_code, address, count)], unit, 1))[0]
+        if outcome.exception_code is not None:
+            self._raise_for_exception(function_code, address, outcome.exception_code)
+        if outcome.data is None:
+            error = self.abort_error
+            if isinstance(error, ModbusReadError):
+                raise error
+            if error is not None:
+                raise ModbusConnectionError(f'Connection error with {self.host}:{self.port}: {error}')
+            raise ModbusTimeoutError(f'Timeout reading from {self.host}:{self.port}',
+                                     {'function_code': function_code, 'address': address})
+        return outcome.data
+
+    async def probe(self, unit: Optional[int] = None) -> bool:
+        """Check that the peer speaks Modbus TCP (exception responses count)"""
+        try:
+            outcome = (await self.read_pipelined([(READ_COILS, 0, 1)], unit, 1))[0]
+        except (ModbusConnectionError, ModbusReadError, ValueError, struct.error):
+            return False
+        return outcome.data is not None or outcome.exception_code is not None
+
+    async def read_pipelined(self, requests: Sequence[Tuple[int, int, int]], unit: Optional[int] = None,
+                             max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                             cancel_unsupported: bool = False) -> List[ReadOutcome]:
+        """
+        Issue many reads with several requests in flight on one connection
+
+        Same contract as NativeModbusClient.read_pipelined.
+        """
+        if self.sock is None:
+            raise ModbusConnectionError(f'Not connected to {self.host}:{self.port}')
+
+        loop = asyncio.get_running_loop()
+        unit = self.unit if unit is None else unit
+        window = max(1, min(max_in_flight, MAX_PIPELINE_DEPTH))
+        outcomes: List[Optional[ReadOutcome]] = [None] * len(requests)
+        unsupported: Set[int] = set()
+        cursor = 0
+
+        async with self._lock:
+            self.abort_error = None
+            while cursor < len(requests):
+                pending, cursor = self._pack_batch(requests, cursor, window, unit, unsupported, outcomes)
+                if not pending:
+                    break
+
+                async def collect():
+                    while pending:
+                        transaction_id, pdu_length = await self._receive_frame()
+                        host_health.record_success(self.host)
+                        index = pending.pop(transaction_id, None)
+                        if index is None:
+                            continue
+                        function_code, address, count = requests[index]
+                        exception_code, payload = self._parse_pdu(function_code, count, pdu_length)
+                        outcomes[index] = ReadOutcome(function_code, address, count, exception_code,
+                                                      bytes(payload) if payload is not None else None)
+                        if cancel_unsupported and exception_code == ILLEGAL_FUNCTION:
+                            unsupported.add(function_code)
+
+                try:
+                    await loop.sock_sendall(self.sock, self._tx_view[:READ_REQUEST.size * len(pending)])
+                    await asyncio.wait_for(collect(), self.timeout)
+                except asyncio.TimeoutError:
+                    logger.debug(f"Pipelined read timeout on {self.host}:{self.port}, "
+                                 f"{len(pending)} request(s) unanswered")
+                    host_health.record_failure(self.host, 'pipelined read timeout')
+                    self.close()
+                    try:
+                        if not await self.connect():
+                            break
+                    except HostUnavailableError as e:
+                        logger.debug(f"Stopping pipelined reads: {e}")
+                        break
+                except (OSError, ModbusConnectionError, ModbusReadError) as e:
+                    logger.debug(f"Pipelined read aborted on {self.host}:{self.port}: {e}")
+                    self.abort_error = e
+                    self.close()
+                    break
+
+        return [
+            outcome if outcome is not None else ReadOutcome(*requests[i], None, None)
+            for i, outcome in enumerate(outcomes)
+        ]
@@ -30,6 +30,11 @@ class ModbusTimeoutError(ModbusConnectionError):
     pass
 
 
+class HostUnavailableError(ModbusConnectionError):
+    """Raised without contacting a host whose circuit breaker is open"""
+    pass
+
+
 class ModbusInvalidAddressError(ModbusError):
     """Raised when attempting to access invalid register address"""
     pass
@@ -70,10 +75,16 @@ class RegisterCountError(ModbusError):
     pass
 
 
+class CaptureFormatError(ModbusError):
+    """Raised when a packet capture is not a readable pcap/pcapng file"""
+    pass
+
+
 # Error code mapping for API responses
 ERROR_CODES = {
     ModbusConnectionError: 'CONNECTION_FAILED',
     ModbusTimeoutError: 'TIMEOUT',
+    HostUnavailableError: 'HOST_UNAVAILABLE',
     ModbusInvalidAddressError: 'INVALID_ADDRESS',
     ModbusReadError: 'READ_FAILED',
     ModbusWriteError: 'WRITE_FAILED',
@@ -81,7 +92,8 @@ ERROR_CODES = {
     ConfigurationError: 'INVALID_CONFIG',
     DeviceNotFoundError: 'DEVICE_NOT_FOUND',
     InvalidSlaveIdError: 'INVALID_SLAVE_ID',
-    RegisterCountError: 'INVALID_REGISTER_COUNT'
+    RegisterCountError: 'INVALID_REGISTER_COUNT',
+    CaptureFormatError: 'INVALID_CAPTURE'
 }
 
 
@@ -3,9 +3,11 @@ Modbus Scanner for automatic device discovery
 """
 import logging
 import socket
+import time
 import ipaddress
-from pymodbus.client import ModbusTcpClient
-from pymodbus.exceptions import ModbusException
+
+from host_health import GuardedClient, host_health
+from modbus_exceptions import HostUnavailableError
 
 logger = logging.getLogger(__name__)
 
@@ -28,19 +30,35 @@ class ModbusScanner:
         return logo_modbustcp_address - 1
 
     def connect(self):
-        """Connect to Modbus device"""
+        """
+        Connect to Modbus device
+
+        Raises:
+            HostUnavailableError: the host's circuit breaker is open
+        """
+        host_health.check(self.host)
         try:
-            self.client = ModbusTcpClient(
+            # Imported lazily so pure discovery never loads pymodbus
+            from pymodbus.client import ModbusTcpClient
+
+            client = ModbusTcpClient(
                 host=self.host,
                 port=self.port,
                 timeout=self.timeout
             )
-            connected = self.client.connect()
+            started = time.monotonic()
+            connected = client.connect()
+            # Reads go through the host health registry so a dead host fails fast
+            self.client = GuardedClient(client, self.host, host_health)
             if connected:
+                host_health.record_connect(self.host)
                 logger.info(f"Connected to {self.host}:{self.port}")
                 return True
             else:
                 logger.error(f"Failed to connect to {self.host}:{self.port}")
+                # Refused connects return at once; only a timed-out connect means a silent host
+                if time.monotonic() - started >= self.timeout:
+                    host_health.record_failure(self.host, 'connect timeout')
                 return False
         except Exception as e:
             logger.error(f"Connection error: {e}")
@@ -674,37 +692,43 @@ class NetworkScanner:
                         sock.close()
 
                         if result == 0:
-                            # Port is open, try Modbus connection
-                            scanner = ModbusScanner(ip_str, port, timeout=3)
-                            if scanner.test_connection():
-                                device_info = {
-                                    'ip': ip_str,
-                                    'port': port,
-                                    'status': 'online'
-                                }
-
-                                if auto_detect:
-                                    # Automatically detect device type
-                                    logger.info(f"Auto-detecting device type at {ip_str}:{port}...")
+                            # Port is open; the connect above already proved reachability,
+                            # so no second (pymodbus) connection is needed here
+                            device_info = {
+                                'ip': ip_str,
+                                'port': port,
+                                'status': 'online'
+                            }
+
+                            if auto_detect:
+                                # Automatically detect device type
+                                logger.info(f"Auto-detecting device type at {ip_str}:{port}...")
+                                scanner = ModbusScanner(ip_str, port, timeout=3)
+                                try:
                                     device_type = scanner.detect_device_type(slave=1)
-                                    device_info['device_type'] = device_type
-
-                                    # Auto-generate device name
-                                    if device_type in ['LOGO_8', 'LOGO_0BA7']:
-                                        device_info['name'] = f"LOGO_{ip_str.split('.')[-1]}"
-                                        device_info['manufacturer'] = 'Siemens'
-                                        device_info['model'] = 'LOGO! 8' if device_type == 'LOGO_8' else 'LOGO! 0BA7'
-                                    else:
-                                        device_info['name'] = f"Modbus_{ip_str.split('.')[-1]}"
-                                        device_info['manufacturer'] = 'Generic'
-                                        device_info['model'] = 'Modbus TCP'
-
-                                devices.append(device_info)
-                                logger.info(f"Found {device_info.get('device_type', 'unknown')} device at {ip_str}:{port}")
-
-                                # Notify about found device
-                                if progress_callback:
-                                    progress_callback(ip_str, scanned_count, device_info)
+                                except HostUnavailableError as e:
+                                    # Port is open but the breaker skips detection; still report the host
+                                    logger.info(f"Not detecting {ip_str}:{port}: {e}")
+                                    device_type = 'UNKNOWN'
+                                    device_info['error'] = e.to_dict()
+                                device_info['device_type'] = device_type
+
+                                # Auto-generate device name
+                                if device_type in ['LOGO_8', 'LOGO_0BA7']:
+                                    device_info['name'] = f"LOGO_{ip_str.split('.')[-1]}"
+                                    device_info['manufacturer'] = 'Siemens'
+                                    device_info['model'] = 'LOGO! 8' if device_type == 'LOGO_8' else 'LOGO! 0BA7'
+                                else:
+                                    device_info['name'] = f"Modbus_{ip_str.split('.')[-1]}"
+                                    device_info['manufacturer'] = 'Generic'
+                                    device_info['model'] = 'Modbus TCP'
+
+                            devices.append(device_info)
+                            logger.info(f"Found {device_info.get('device_type', 'unknown')} device at {ip_str}:{port}")
+
+                            # Notify about found device
+                            if progress_callback:
+                                progress_callback(ip_str, scanned_count, device_info)
                     except Exception as e:
                         logger.debug(f"Error scanning {ip_str}:{port}: {e}")
 
@@ -0,0 +1,713 @@
+"""
+Passive device inventory from packet captures
+Reads pcap/pcapng captures taken on a mirror port as a stream and follows
+Modbus TCP/UDP, S7comm (TPKT/COTP), KNXnet/IP and BACnet/IP traffic to build
+the device records and register maps an active scan would produce, without
+sending a single packet to the plant.
+
+Memory does not grow with the capture: packets are read one at a time, each
+TCP direction buffers at most one partial frame, and the connection table is
+bounded (least recently used connections are dropped first).
+"""
+
+import gzip
+import logging
+import socket
+import struct
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from modbus_codec import (
+    MBAP_HEADER, MBAP_HEADER_LENGTH, MAX_ADU_LENGTH,
+    READ_COILS, READ_DISCRETE_INPUTS, READ_HOLDING_REGISTERS, READ_INPUT_REGISTERS,
+    WRITE_MULTIPLE_COILS, WRITE_MULTIPLE_REGISTERS
+)
+from modbus_exceptions import CaptureFormatError
+from register_map import IntervalSet, register_map_to_json
+from register_scanner import S7_AREA_PROBES
+from s7_client import S7_AREA_DB, VM_DB_NUMBER
+from s7_scanner import S7Scanner, SZL_MODULE_IDENTIFICATION
+from broadcast_discovery import (
+    KNX_PORT, KNX_SEARCH_RESPONSE, BACNET_PORT, BVLC_TYPE,
+    parse_knx_search_response, parse_knx_device_dib, parse_bacnet_i_am
+)
+
+logger = logging.getLogger(__name__)
+
+# Capture file signatures
+PCAP_MAGIC = {
+    b'\xd4\xc3\xb2\xa1': ('<', 1e-6), b'\xa1\xb2\xc3\xd4': ('>', 1e-6),
+    b'\x4d\x3c\xb2\xa1': ('<', 1e-9), b'\xa1\xb2\x3c\x4d': ('>', 1e-9),
+}
+PCAPNG_SECTION_HEADER = b'\x0a\x0d\x0d\x0a'
+PCAPNG_BYTE_ORDER_MAGIC = 0x1A2B3C4D
+GZIP_MAGIC = b'\x1f\x8b'
+
+# pcapng block types
+PCAPNG_INTERFACE_DESCRIPTION = 0x00000001
+PCAPNG_PACKET = 0x00000002
+PCAPNG_SIMPLE_PACKET = 0x00000003
+PCAPNG_ENHANCED_PACKET = 0x00000006
+PCAPNG_OPTION_TSRESOL = 9
+
+# Largest packet record accepted; larger lengths mean a corrupt file
+MAX_SNAPLEN = 262144
+
+# Link layer types
+LINKTYPE_NULL = 0
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_IPV4 = 228
+LINKTYPE_LINUX_SLL2 = 276
+
+ETHERTYPE_IPV4 = 0x0800
+ETHERTYPE_VLAN = (0x8100, 0x88A8, 0x9100)
+
+IPPROTO_TCP = 6
+IPPROTO_UDP = 17
+TCP_SYN = 0x02
+
+# Well-known server ports followed passively
+MODBUS_PORTS = (502,)
+S7_PORTS = (102,)
+
+# Connections tracked at once; the least recently seen is dropped beyond this
+MAX_TRACKED_CONNECTIONS = 4096
+
+# Bytes one TCP direction may buffer waiting for the rest of a frame
+MAX_STREAM_BUFFER = 8192
+
+# Unanswered requests remembered per connection
+MAX_PENDING_REQUESTS = 64
+
+# Modbus function code -> register table its address field refers to
+MODBUS_FUNCTION_TABLES = {
+    READ_COILS: 'coil',
+    READ_DISCRETE_INPUTS: 'discrete_input',
+    READ_HOLDING_REGISTERS: 'holding_register',
+    READ_INPUT_REGISTERS: 'input_register',
+    0x05: 'coil',                           # Write Single Coil
+    0x06: 'holding_register',               # Write Single Register
+    WRITE_MULTIPLE_COILS: 'coil',
+    WRITE_MULTIPLE_REGISTERS: 'holding_register',
+}
+MODBUS_READ_WRITE_MULTIPLE = 0x17
+MODBUS_ENCAPSULATED_INTERFACE = 0x2B
+MODBUS_READ_DEVICE_ID = 0x0E
+MODBUS_DEVICE_ID_OBJECTS = {0x00: 'vendor_name', 0x01: 'product_code', 0x02: 'revision'}
+
+# S7comm header types (ROSCTR) and functions
+S7_JOB = 0x01
+S7_ACK_DATA = 0x03
+S7_USERDATA = 0x07
+S7_SETUP_COMMUNICATION = 0xF0
+S7_READ_VAR = 0x04
+S7_WRITE_VAR = 0x05
+S7_ITEM_OK = 0xFF
+
+# Bytes per element of an S7 request item by transport size
+S7_TRANSPORT_BYTES = {0x01: 1, 0x02: 1, 0x03: 1, 0x04: 2, 0x05: 2, 0x06: 4, 0x07: 4, 0x08: 4, 0x1C: 2, 0x1D: 2}
+
+# KNXnet/IP services carrying device descriptors or bus telegrams
+KNX_DESCRIPTION_RESPONSE = 0x0204
+KNX_TUNNELLING_REQUEST = 0x0420
+KNX_ROUTING_INDICATION = 0x0530
+
+
+def _open_capture(path: str):
+    """Open a capture, transparently decompressing .gz files"""
+    with open(path, 'rb') as f:
+        compressed = f.read(2) == GZIP_MAGIC
+    return gzip.open(path, 'rb') if compressed else open(path, 'rb')
+
+
+def read_packets(path: str) -> Iterator[Tuple[float, int, bytes]]:
+    """
+    Stream the packets of a pcap or pcapng file
+
+    Yields:
+        (timestamp, link type, packet bytes); a truncated last record ends
+        iteration
+
+    Raises:
+        CaptureFormatError: not a pcap/pcapng file or a corrupt record
+    """
+    with _open_capture(path) as f:
+        magic = f.read(4)
+        if magic == PCAPNG_SECTION_HEADER:
+            yield from _read_pcapng(f)
+        elif magic in PCAP_MAGIC:
+            yield from _read_pcap(f, *PCAP_MAGIC[magic])
+        else:
+            raise CaptureFormatError(f'Not a pcap/pcapng capture: {path}', {'path': path})
+
+
+def _read_pcap(f, endian: str, resolution: float) -> Iterator[Tuple[float, int, bytes]]:
+    header = f.read(20)
+    if len(header) < 20:
+        raise CaptureFormatError('Truncated pcap header')
+    linktype = struct.unpack_from(endian + 'I', header, 16)[0] & 0x0FFFFFFF
+    record = struct.Struct(endian + 'IIII')
+    while True:
+        head = f.read(record.size)
+        if len(head) < record.size:
+            return
+        seconds, fraction, captured, _ = record.unpack(head)
+        if captured > MAX_SNAPLEN:
+            raise CaptureFormatError(f'Corrupt pcap record ({captured} bytes)')
+        data = f.read(captured)
+        if len(data) < captured:
+            return
+        yield seconds + fraction * resolution, linktype, data
+
+
+def _read_pcapng(f) -> Iterator[Tuple[float, int, bytes]]:
+    # read_packets consumed the first block type; it reads the same in either byte order
+    endian = '<'
+    interfaces: List[Tuple[int, float]] = []  # (link type, timestamp resolution) per interface
+    head = PCAPNG_SECTION_HEADER + f.read(4)
+    while len(head) == 8:
+        if head[:4] == PCAPNG_SECTION_HEADER:
+            byte_order = f.read(4)
+            if len(byte_order) < 4:
+                return
+            if struct.unpack('<I', byte_order)[0] == PCAPNG_BYTE_ORDER_MAGIC:
+                endian = '<'
+            elif struct.unpack('>I', byte_order)[0] == PCAPNG_BYTE_ORDER_MAGIC:
+                endian = '>'
+            else:
+                raise CaptureFormatError('Corrupt pcapng section header')
+            interfaces = []
+            body_length = struct.unpack(endian + 'I', head[4:])[0] - 16
+            if body_length < 0:
+                raise CaptureFormatError('Corrupt pcapng section header')
+            if len(f.read(body_length + 4)) < body_length + 4:
+                return
+        else:
+            block_type, block_length = struct.unpack(endian + 'II', head)
+            if block_length < 12 or block_length > MAX_SNAPLEN + 64:
+                raise CaptureFormatError(f'Corrupt pcapng block ({block_length} bytes)')
+            body = f.read(block_length - 8)
+            if len(body) < block_length - 8:
+                return
+            packet = _pcapng_block(block_type, body[:-4], endian, interfaces)
+            if packet is not None:
+                yield packet
+        head = f.read(8)
+
+
+def _pcapng_block(block_type: int, body: bytes, endian: str,
+                  interfaces: List[Tuple[int, float]]) -> Optional[Tuple[float, int, bytes]]:
+    """Decode one pcapng block body; registers interfaces, returns packets"""
+    if block_type == PCAPNG_INTERFACE_DESCRIPTION:
+        linktype = struct.unpack_from(endian + 'H', body)[0]
+        interfaces.append((linktype, _pcapng_resolution(body[8:], endian)))
+    elif block_type == PCAPNG_ENHANCED_PACKET and len(body) >= 20:
+        interface, high, low, captured = struct.unpack_from(endian + 'IIII', body)
+        if interface < len(interfaces):
+            linktype, resolution = interfaces[interface]
+            return ((high << 32) | low) * resolution, linktype, body[20:20 + captured]
+    elif block_type == PCAPNG_PACKET and len(body) >= 20:
+        interface, _, high, low, captured = struct.unpack_from(endian + 'HHIII', body)
+        if interface < len(interfaces):
+            linktype, resolution = interfaces[interface]
+            return ((high << 32) | low) * resolution, linktype, body[20:20 + captured]
+    elif block_type == PCAPNG_SIMPLE_PACKET and len(body) >= 4 and interfaces:
+        original = struct.unpack_from(endian + 'I', body)[0]
+        return 0.0, interfaces[0][0], body[4:4 + original]
+    return None
+
+
+def _pcapng_resolution(options: bytes, endian: str) -> float:
+    """Timestamp resolution from interface options (if_tsresol), microseconds by default"""
+    offset = 0
+    while offset + 4 <= len(options):
+        code, length = struct.unpack_from(endian + 'HH', options, offset)
+        if code == 0:
+            break
+        if code == PCAPNG_OPTION_TSRESOL and length >= 1:
+            value = options[offset + 4]
+            return 2.0 ** -(value & 0x7F) if value & 0x80 else 10.0 ** -value
+        offset += 4 + (length + 3) // 4 * 4
+    return 1e-6
+
+
+def _ipv4_offset(linktype: int, frame: bytes) -> Optional[int]:
+    """Offset of the IPv4 header in a link layer frame, None for other traffic"""
+    if linktype == LINKTYPE_ETHERNET:
+        offset, ethertype = 14, frame[12:14]
+        while ethertype and struct.unpack('>H', ethertype)[0] in ETHERTYPE_VLAN:
+            ethertype = frame[offset + 2:offset + 4]
+            offset += 4
+        return offset if ethertype == b'\x08\x00' else None
+    if linktype == LINKTYPE_LINUX_SLL:
+        return 16 if frame[14:16] == b'\x08\x00' else None
+    if linktype == LINKTYPE_LINUX_SLL2:
+        return 20 if frame[0:2] == b'\x08\x00' else None
+    if linktype == LINKTYPE_NULL:
+        return 4 if frame[:4] in (b'\x02\x00\x00\x00', b'\x00\x00\x00\x02') else None
+    if linktype in (LINKTYPE_RAW, LINKTYPE_IPV4):
+        return 0 if frame[:1] and frame[0] >> 4 == 4 else None
+    return None
+
+
+class _Stream:
+    """One direction of a TCP connection: next expected sequence number and partial frame"""
+
+    __slots__ = ('next_seq', 'buffer')
+
+    def __init__(self):
+        self.next_seq: Optional[int] = None
+        self.buffer = bytearray()
+
+    def push(self, seq: int, payload: bytes):
+        """Append a segment; retransmitted bytes are skipped, a gap drops the partial frame"""
+        if self.next_seq is not None:
+            ahead = (seq - self.next_seq) & 0xFFFFFFFF
+            if ahead >= 0x80000000:
+                overlap = (self.next_seq - seq) & 0xFFFFFFFF
+                if overlap >= len(payload):
+                    return
+                payload = payload[overlap:]
+                seq = self.next_seq
+            elif ahead:
+                self.buffer.clear()
+        self.next_seq = (seq + len(payload)) & 0xFFFFFFFF
+        if len(self.buffer) + len(payload) > MAX_STREAM_BUFFER:
+            self.buffer.clear()
+            if len(payload) > MAX_STREAM_BUFFER:
+                return
+        self.buffer += payload
+
+
+class _Connection:
+    """A client/server conversation: both TCP directions and unanswered requests"""
+
+    __slots__ = ('streams', 'pending', 'tsap_src', 'tsap_dst')
+
+    def __init__(self):
+        self.streams = (_Stream(), _Stream())  # (to client, to server)
+        self.pending: Dict[int, Tuple] = {}
+        self.tsap_src: Optional[int] = None
+        self.tsap_dst: Optional[int] = None
+
+    def remember(self, key: int, request: Tuple):
+        if len(self.pending) >= MAX_PENDING_REQUESTS:
+            del self.pending[next(iter(self.pending))]
+        self.pending[key] = request
+
+
+def _split_mbap(buffer: bytearray) -> List[bytes]:
+    """Remove and return the complete MBAP frames at the start of buffer"""
+    frames = []
+    offset = 0
+    while len(buffer) - offset >= MBAP_HEADER_LENGTH:
+        _, protocol, length, _ = MBAP_HEADER.unpack_from(buffer, offset)
+        if protocol != 0 or not 2 <= length <= MAX_ADU_LENGTH - 6:
+            # Not aligned on a frame (e.g. after a lost segment)
+            buffer.clear()
+            return frames
+        end = offset + 6 + length
+        if end > len(buffer):
+            break
+        frames.append(bytes(buffer[offset:end]))
+        offset = end
+    del buffer[:offset]
+    return frames
+
+
+def _split_tpkt(buffer: bytearray) -> List[bytes]:
+    """Remove and return the complete TPKT frames at the start of buffer"""
+    frames = []
+    offset = 0
+    while len(buffer) - offset >= 4:
+        version, _, length = struct.unpack_from('>BBH', buffer, offset)
+        if version != S7Scanner.TPKT_VERSION or not 7 <= length <= MAX_STREAM_BUFFER:
+            buffer.clear()
+            return frames
+        end = offset + length
+        if end > len(buffer):
+            break
+        frames.append(bytes(buffer[offset:end]))
+        offset = end
+    del buffer[:offset]
+    return frames
+
+
+def _modbus_request_ranges(function_code: int, pdu: bytes) -> List[Tuple[str, int, int]]:
+    """(table, start, count) addressed by a Modbus request PDU"""
+    if function_code in (0x05, 0x06) and len(pdu) >= 3:
+        return [(MODBUS_FUNCTION_TABLES[function_code], struct.unpack_from('>H', pdu, 1)[0], 1)]
+    if function_code in MODBUS_FUNCTION_TABLES and len(pdu) >= 5:
+        start, count = struct.unpack_from('>HH', pdu, 1)
+        return [(MODBUS_FUNCTION_TABLES[function_code], start, count)]
+    if function_code == MODBUS_READ_WRITE_MULTIPLE and len(pdu) >= 9:
+        read_start, read_count, write_start, write_count = struct.unpack_from('>HHHH', pdu, 1)
+        return [('holding_register', read_start, read_count), ('holding_register', write_start, write_count)]
+    return []
+
+
+def _modbus_device_id(pdu: bytes) -> Dict[str, str]:
+    """Basic objects of a Read Device Identification response"""
+    identity = {}
+    if len(pdu) < 7:
+        return identity
+    offset, count = 7, pdu[6]
+    for _ in range(count):
+        if offset + 2 > len(pdu):
+            break
+        object_id, length = pdu[offset], pdu[offset + 1]
+        if object_id in MODBUS_DEVICE_ID_OBJECTS:
+            identity[MODBUS_DEVICE_ID_OBJECTS[object_id]] = \
+                pdu[offset + 2:offset + 2 + length].decode('latin-1', 'replace').strip()
+        offset += 2 + length
+    return identity
+
+
+def s7_area_name(area: int, db_number: int, start: int) -> str:
+    """Register map key of an S7 area, matching S7RegisterScanner's keys"""
+    if area == S7_AREA_DB:
+        return 'data_blocks' if db_number == VM_DB_NUMBER else f'db{db_number}'
+    names = [(first, name) for name, (code, _, first, _) in S7_AREA_PROBES.items()
+             if code == area and start >= first]
+    return max(names)[1] if names else f'area_0x{area:02x}'
+
+
+def _s7_request_items(parameter: bytes) -> List[Tuple[str, int, int]]:
+    """(area name, first byte, byte count) of the items of a read/write var job"""
+    items = []
+    offset = 2
+    for _ in range(parameter[1] if len(parameter) > 1 else 0):
+        if offset + 12 > len(parameter) or parameter[offset + 2] != 0x10:
+            break
+        transport, count, db_number, area = struct.unpack_from('>BHHB', parameter, offset + 3)
+        address = int.from_bytes(parameter[offset + 9:offset + 12], 'big')
+        size = 1 if transport == 0x01 else count * S7_TRANSPORT_BYTES.get(transport, 1)
+        items.append((s7_area_name(area, db_number, address >> 3), address >> 3, size))
+        offset += 12
+    return items
+
+
+def _s7_return_codes(function: int, data: bytes, count: int) -> List[int]:
+    """Per-item return codes of a read/write var response"""
+    if function == S7_WRITE_VAR:
+        return list(data[:count])
+    codes = []
+    offset = 0
+    for index in range(count):
+        if offset + 4 > len(data):
+            break
+        code, transport, length = struct.unpack_from('>BBH', data, offset)
+        codes.append(code)
+        if transport in (0x03, 0x04, 0x05):  # Length given in bits
+            length = (length + 7) // 8
+        offset += 4 + length + (length & 1 if index < count - 1 else 0)
+    return codes
+
+
+def _knx_group_address(value: int) -> str:
+    return f"{value >> 11}/{(value >> 8) & 0x07}/{value & 0xFF}"
+
+
+def _knx_individual_address(value: int) -> str:
+    return f"{value >> 12}.{(value >> 8) & 0x0F}.{value & 0xFF}"
+
+
+class PassiveInventory:
+    """Builds a device inventory from captured traffic"""
+
+    def __init__(self, modbus_ports=MODBUS_PORTS, s7_ports=S7_PORTS,
+                 max_connections: int = MAX_TRACKED_CONNECTIONS):
+        """
+        Initialize inventory
+
+        Args:
+            modbus_ports: Server ports carrying Modbus TCP/UDP
+            s7_ports: Server ports carrying S7comm
+            max_connections: Connections tracked at once
+        """
+        self.modbus_ports = frozenset(modbus_ports)
+        self.s7_ports = frozenset(s7_ports)
+        self.max_connections = max_connections
+        self._connections: 'OrderedDict[Tuple, _Connection]' = OrderedDict()
+        self._devices: Dict[Tuple[str, int, str], Dict] = {}
+        self._s7_frames: Dict[Tuple[str, int], Tuple[Optional[bytes], Dict]] = {}
+        self.stats = {'packets': 0, 'ipv4': 0, 'fragments': 0, 'frames': 0, 'evicted': 0}
+
+    def ingest(self, path: str) -> 'PassiveInventory':
+        """
+        Add the traffic of one capture file
+
+        Raises:
+            CaptureFormatError: unreadable capture
+            OSError: file not accessible
+        """
+        logger.info(f"Reading capture {path}")
+        for timestamp, linktype, frame in read_packets(path):
+            self.stats['packets'] += 1
+            try:
+                self._packet(timestamp, linktype, frame)
+            except (struct.error, IndexError, ValueError) as e:
+                logger.debug(f"Skipping malformed packet {self.stats['packets']}: {e}")
+        logger.info(f"Read {self.stats['packets']} packets from {path}: "
+                    f"{len(self._devices)} device(s), {self.stats['frames']} protocol frames")
+        return self
+
+    def _packet(self, timestamp: float, linktype: int, frame: bytes):
+        offset = _ipv4_offset(linktype, frame)
+        if offset is None or len(frame) < offset + 20:
+            return
+        self.stats['ipv4'] += 1
+        header_length = (frame[offset] & 0x0F) * 4
+        total_length, fragment, protocol = struct.unpack_from('>H2xHxB', frame, offset + 2)
+        if fragment & 0x3FFF:
+            # Industrial protocol frames are small; fragments are not reassembled
+            self.stats['fragments'] += 1
+            return
+        end = min(len(frame), offset + total_length)
+        source, destination = frame[offset + 12:offset + 16], frame[offset + 16:offset + 20]
+        offset += header_length
+
+        if protocol == IPPROTO_TCP and end >= offset + 20:
+            source_port, destination_port, seq = struct.unpack_from('>HHI', frame, offset)
+            if destination_port in self.modbus_ports or destination_port in self.s7_ports:
+                to_server, server_port = True, destination_port
+                key = (source, source_port, destination, destination_port)
+            elif source_port in self.modbus_ports or source_port in self.s7_ports:
+                to_server, server_port = False, source_port
+                key = (destination, destination_port, source, source_port)
+            else:
+                return
+            connection = self._connection(key)
+            stream = connection.streams[to_server]
+            flags = frame[offset + 13]
+            payload = frame[offset + (frame[offset + 12] >> 4) * 4:end]
+            if flags & TCP_SYN:
+                stream.next_seq = (seq + 1) & 0xFFFFFFFF
+                stream.buffer.clear()
+                return
+            if not payload:
+                return
+            stream.push(seq, payload)
+            if server_port in self.modbus_ports:
+                for mbap in _split_mbap(stream.buffer):
+                    self._modbus_frame(key, connection, to_server, mbap, 'modbus_tcp', 'tcp', timestamp)
+            else:
+                for tpkt in _split_tpkt(stream.buffer):
+                    self._s7_frame(key, connection, to_server, tpkt, timestamp)
+
+        elif protocol == IPPROTO_UDP and end >= offset + 8:
+            source_port, destination_port = struct.unpack_from('>HH', frame, offset)
+            payload = frame[offset + 8:end]
+            if destination_port in self.modbus_ports or source_port in self.modbus_ports:
+                to_server = destination_port in self.modbus_ports
+                key = ((source, source_port, destination, destination_port) if to_server
+                       else (destination, destination_port, source, source_port))
+                buffer = bytearray(payload)
+                for mbap in _split_mbap(buffer):
+                    self._modbus_frame(key, self._connection(key), to_server, mbap, 'modbus_udp', 'udp', timestamp)
+            elif KNX_PORT in (source_port, destination_port) and payload[:2] == b'\x06\x10':
+                self._knx_packet(source, source_port, destination, destination_port, payload, timestamp)
+            elif BACNET_PORT in (source_port, destination_port) and payload[:1] == bytes([BVLC_TYPE]):
+                self._bacnet_packet(source, source_port, payload, timestamp)
+
+    def _connection(self, key: Tuple) -> _Connection:
+        connection = self._connections.get(key)
+        if connection is None:
+            connection = self._connections[key] = _Connection()
+            if len(self._connections) > self.max_connections:
+                self._connections.popitem(last=False)
+                self.stats['evicted'] += 1
+        else:
+            self._connections.move_to_end(key)
+        return connection
+
+    def _device(self, host: str, port: int, protocol: str, transport: str, timestamp: float) -> Dict:
+        key = (host, port, protocol)
+        device = self._devices.get(key)
+        if device is None:
+            device = self._devices[key] = {
+                'host': host, 'port': port, 'protocol': protocol, 'transport': transport,
+                'first_seen': timestamp, 'last_seen': timestamp, 'frames': 0, 'masters': set()
+            }
+        device['first_seen'] = min(device['first_seen'], timestamp)
+        device['last_seen'] = max(device['last_seen'], timestamp)
+        device['frames'] += 1
+        self.stats['frames'] += 1
+        return device
+
+    def _modbus_frame(self, key: Tuple, connection: _Connection, to_server: bool, frame: bytes,
+                      protocol: str, transport: str, timestamp: float):
+        transaction_id, _, _, unit = MBAP_HEADER.unpack_from(frame)
+        pdu = frame[MBAP_HEADER_LENGTH:]
+        function_code = pdu[0]
+        if to_server:
+            connection.remember(transaction_id, (unit, function_code, _modbus_request_ranges(function_code, pdu)))
+            return
+
+        device = self._device(socket.inet_ntoa(key[2]), key[3], protocol, transport, timestamp)
+        device['masters'].add(socket.inet_ntoa(key[0]))
+        device.setdefault('unit_ids', set()).add(unit)
+        counts = device.setdefault('function_codes', {})
+        counts[function_code & 0x7F] = counts.get(function_code & 0x7F, 0) + 1
+        request = connection.pending.pop(transaction_id, None)
+        if function_code & 0x80:
+            exceptions = device.setdefault('exceptions', {})
+            exceptions[pdu[1]] = exceptions.get(pdu[1], 0) + 1
+            return
+        if request is None or request[1] != function_code:
+            return
+        register_map = device.setdefault('register_maps', {}).setdefault(unit, {})
+        for table, start, count in request[2]:
+            register_map.setdefault(table, IntervalSet()).add_range(start, start + count)
+        if function_code == MODBUS_ENCAPSULATED_INTERFACE and pdu[1:2] == bytes([MODBUS_READ_DEVICE_ID]):
+            device.update(_modbus_device_id(pdu))
+
+    def _s7_frame(self, key: Tuple, connection: _Connection, to_server: bool, frame: bytes, timestamp: float):
+        host, port = socket.inet_ntoa(key[2]), key[3]
+        cotp_type = frame[5]
+        if cotp_type == S7Scanner.COTP_CONNECT_REQUEST and to_server:
+            offset = 11
+            while offset + 2 <= 5 + frame[4]:
+                code, length = frame[offset], frame[offset + 1]
+                if code == 0xC1:
+                    connection.tsap_src = int.from_bytes(frame[offset + 2:offset + 2 + length], 'big')
+                elif code == 0xC2:
+                    connection.tsap_dst = int.from_bytes(frame[offset + 2:offset + 2 + length], 'big')
+                offset += 2 + length
+            return
+        if cotp_type != S7Scanner.COTP_DATA:
+            return
+        s7 = frame[5 + frame[4]:]
+        if len(s7) < 10 or s7[0] != S7Scanner.S7COMM_PROTOCOL_ID:
+            return
+
+        rosctr = s7[1]
+        reference, parameter_length, data_length = struct.unpack_from('>HHH', s7, 4)
+        header_length = 12 if rosctr in (0x02, S7_ACK_DATA) else 10
+        parameter = s7[header_length:header_length + parameter_length]
+        data = s7[header_length + parameter_length:header_length + parameter_length + data_length]
+        if to_server:
+            if rosctr == S7_JOB and parameter[:1] in (bytes([S7_READ_VAR]), bytes([S7_WRITE_VAR])):
+                connection.remember(reference, (parameter[0], _s7_request_items(parameter)))
+            return
+
+        device = self._device(host, port, 's7comm', 'tcp', timestamp)
+        device['masters'].add(socket.inet_ntoa(key[0]))
+        if connection.tsap_dst is not None:
+            device['tsap_src'], device['tsap_dst'] = connection.tsap_src, connection.tsap_dst
+        setup, identity = self._s7_frames.get((host, port), (None, None))
+
+        if rosctr == S7_ACK_DATA and parameter[:1] == bytes([S7_SETUP_COMMUNICATION]):
+            _, device['pdu_size'] = S7Scanner(host, port)._parse_setup_response(frame)
+            self._s7_frames[(host, port)] = (frame, identity)
+        elif rosctr == S7_ACK_DATA and parameter[:1] in (bytes([S7_READ_VAR]), bytes([S7_WRITE_VAR])):
+            request = connection.pending.pop(reference, None)
+            if request is None or request[0] != parameter[0]:
+                return
+            codes = _s7_return_codes(parameter[0], data, len(request[1]))
+            register_map = device.setdefault('register_map', {})
+            for (area, start, size), code in zip(request[1], codes):
+                if code == S7_ITEM_OK:
+                    register_map.setdefault(area, IntervalSet()).add_range(start, start + size)
+        elif rosctr == S7_USERDATA and len(data) >= 6 and data[0] == S7_ITEM_OK \
+                and struct.unpack_from('>H', data, 4)[0] == SZL_MODULE_IDENTIFICATION:
+            found = S7Scanner(host, port)._module_identity(frame)
+            if found['order_number']:
+                self._s7_frames[(host, port)] = (setup, found)
+
+    def _knx_packet(self, source: bytes, source_port: int, destination: bytes, destination_port: int,
+                    payload: bytes, timestamp: float):
+        service = struct.unpack_from('>H', payload, 2)[0]
+        source_host = socket.inet_ntoa(source)
+        if service == KNX_SEARCH_RESPONSE:
+            descriptor = parse_knx_search_response(payload)
+            if descriptor:
+                host = descriptor.pop('host')
+                if host == '0.0.0.0':
+                    host = source_host
+                descriptor.pop('port')
+                self._device(host, KNX_PORT, 'knx_ip', 'udp', timestamp).update(descriptor)
+        elif service == KNX_DESCRIPTION_RESPONSE:
+            descriptor = parse_knx_device_dib(payload[6:])
+            if descriptor:
+                self._device(source_host, source_port, 'knx_ip', 'udp', timestamp).update(descriptor)
+        elif service in (KNX_TUNNELLING_REQUEST, KNX_ROUTING_INDICATION):
+            if service == KNX_ROUTING_INDICATION:
+                gateway, port, cemi = source_host, source_port, payload[6:]
+            else:
+                # The KNXnet/IP server is the side on port 3671
+                server_is_source = source_port == KNX_PORT
+                gateway = source_host if server_is_source else socket.inet_ntoa(destination)
+                port = source_port if server_is_source else destination_port
+                cemi = payload[6 + payload[6]:]
+                if not server_is_source:
+                    self._device(gateway, port, 'knx_ip', 'udp', timestamp)['masters'].add(source_host)
+            if len(cemi) < 2 or len(cemi) < 2 + cemi[1] + 6:
+                return
+            base = 2 + cemi[1]
+            control, source_address, destination_address = struct.unpack_from('>xBHH', cemi, base)
+            device = self._device(gateway, port, 'knx_ip', 'udp', timestamp)
+            device.setdefault('bus_devices', set()).add(_knx_individual_address(source_address))
+            if control & 0x80:
+                device.setdefault('group_addresses', set()).add(_knx_group_address(destination_address))
+
+    def _bacnet_packet(self, source: bytes, source_port: int, payload: bytes, timestamp: float):
+        i_am = parse_bacnet_i_am(payload)
+        host, port = socket.inet_ntoa(source), source_port
+        if i_am:
+            host, port = i_am.pop('host', host), i_am.pop('port', port)
+            self._device(host, port, 'bacnet', 'udp', timestamp).update(i_am)
+        elif source_port == BACNET_PORT:
+            self._device(host, port, 'bacnet', 'udp', timestamp)
+
+    def devices(self) -> List[Dict]:
+        """
+        Device records in address, port and protocol order
+
+        Each record has the keys of a ProtocolScanner result (host, port,
+        protocol, transport) plus first_seen, last_seen, frames and masters.
+        Modbus slaves add unit_ids, function_codes, exceptions and
+        register_maps ({unit: {table: IntervalSet}}); S7 devices add the
+        TSAPs, pdu_size, SZL identity and register_map ({area: IntervalSet})
+        like S7RegisterScanner; KNX gateways add their descriptor, bus_devices
+        and group_addresses; BACnet devices add their I-Am fields.
+        """
+        records = []
+        for (host, port, protocol), device in sorted(self._devices.items(),
+                                                     key=lambda item: (socket.inet_aton(item[0][0]),) + item[0][1:]):
+            record = {key: sorted(value) if isinstance(value, set) else value for key, value in device.items()}
+            if protocol == 's7comm':
+                self._classify_s7(record)
+            records.append(record)
+        return records
+
+    def _classify_s7(self, record: Dict):
+        """Device type from the captured SZL identity, else from TSAP and setup heuristics"""
+        setup, identity = self._s7_frames.get((record['host'], record['port']), (None, None))
+        tsap_dst = record.get('tsap_dst')
+        if identity is None and tsap_dst is None:
+            return
+        scanner = S7Scanner(record['host'], record['port'])
+        result = scanner._new_result(record.get('tsap_src'), tsap_dst if tsap_dst is not None else 0)
+        scanner._classify(result, identity or {'order_number': None}, setup or b'')
+        for key in ('device_type', 'order_number', 'firmware', 'manufacturer', 'model', 'device_class',
+                    'module_type_id', 'hardware'):
+            if result.get(key) is not None:
+                record[key] = result[key]
+
+
+def device_to_json(device: Dict) -> Dict:
+    """JSON-serializable copy of a device record (register maps as interval lists)"""
+    record = dict(device)
+    if 'register_maps' in record:
+        record['register_maps'] = {str(unit): register_map_to_json(tables)
+                                   for unit, tables in record['register_maps'].items()}
+    if 'register_map' in record:
+        record['register_map'] = register_map_to_json(record['register_map'])
+    if 'function_codes' in record:
+        record['function_codes'] = {str(code): count for code, count in record['function_codes'].items()}
+    if 'exceptions' in record:
+        record['exceptions'] = {str(code): count for code, count in record['exceptions'].items()}
+    return record
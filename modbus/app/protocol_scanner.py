@@ -5,12 +5,18 @@ Detects: Modbus TCP/UDP, S7comm, KNX, CANbus, CANopen, PROFINET, PROFIBUS
 Based on standard ports and protocol signatures
 """
 
+import asyncio
+import ipaddress
 import socket
 import struct
 import logging
-from typing import List, Dict, Optional
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from enum import Enum
 
+from modbus_codec import AsyncNativeModbusClient, pack_read_request, READ_COILS
+from udp_prober import UdpProber, UdpTarget
+from broadcast_discovery import discover_bacnet, discover_knx, bacnet_who_is, DEFAULT_DISCOVERY_WINDOW
+
 logger = logging.getLogger(__name__)
 
 
@@ -31,12 +37,78 @@ class ProtocolType(Enum):
 # Standard ports for industrial protocols
 PROTOCOL_PORTS = {
     ProtocolType.MODBUS_TCP: [502],
+    ProtocolType.MODBUS_UDP: [502],
     ProtocolType.S7COMM: [102],
     ProtocolType.KNX_IP: [3671],  # KNXnet/IP
     ProtocolType.PROFINET: [34962, 34963, 34964],  # PROFINET RT
     ProtocolType.BACNET: [47808],  # BAC/IP (UDP)
 }
 
+# Protocols probed with datagrams; all others with TCP connects
+UDP_PROTOCOLS = (ProtocolType.MODBUS_UDP, ProtocolType.BACNET)
+
+# Protocols found by one multicast/broadcast request in broadcast mode
+BROADCAST_DISCOVERY = {
+    ProtocolType.KNX_IP: discover_knx,
+    ProtocolType.BACNET: discover_bacnet,
+}
+
+# Probe connections a sweep keeps open at once (TCP pipeline)
+DEFAULT_TCP_CONCURRENCY = 512
+
+# New probes (TCP connects and UDP datagrams) a sweep starts per second
+DEFAULT_PROBE_RATE = 1000
+
+
+class ProbeBudget:
+    """Global probe rate shared by all pipelines of a sweep"""
+
+    def __init__(self, rate: float = DEFAULT_PROBE_RATE):
+        """
+        Args:
+            rate: Probes per second, unlimited if 0 or None
+        """
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._next = 0.0
+
+    async def take(self):
+        """Wait for the next probe slot"""
+        if not self.interval:
+            return
+        now = asyncio.get_running_loop().time()
+        start = max(now, self._next)
+        self._next = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+async def _merge(sources: List[AsyncIterator[Dict]]) -> AsyncIterator[Dict]:
+    """Yield items of several async iterators as they arrive"""
+    results: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    async def pump(source):
+        try:
+            async for item in source:
+                results.put_nowait(item)
+        finally:
+            results.put_nowait(done)
+
+    tasks = [asyncio.ensure_future(pump(source)) for source in sources]
+    try:
+        remaining = len(tasks)
+        while remaining:
+            item = await results.get()
+            if item is done:
+                remaining -= 1
+            else:
+                yield item
+        # Re-raise errors from the sources
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+
 
 class ProtocolScanner:
     """Scanner for multiple industrial protocols"""
@@ -48,6 +120,9 @@ class ProtocolScanner:
         """
         Scan a single host for all supported protocols
 
+        Blocking wrapper around scan_host_async for callers without an
+        event loop.
+
         Args:
             host: IP address to scan
             ports: Optional list of ports to scan (defaults to all known ports)
@@ -55,31 +130,76 @@ class ProtocolScanner:
         Returns:
             List of detected protocols with details
         """
-        if ports is None:
-            ports = self._get_all_ports()
+        return asyncio.run(self.scan_host_async(host, ports))
+
+    async def scan_host_async(self, host: str, ports: Optional[List[int]] = None) -> List[Dict]:
+        """
+        Scan a single host, all ports concurrently
 
-        detected = []
+        Every port is probed over TCP; ports with a UDP probe (Modbus UDP,
+        BACnet) are probed over UDP at the same time.
 
-        for port in ports:
-            result = self._probe_port(host, port)
-            if result:
-                detected.append(result)
+        Returns:
+            List of detected protocols in port order
+        """
+        if ports is None:
+            tcp_ports, udp_ports = self._pipeline_ports(list(PROTOCOL_PORTS))
+        else:
+            tcp_ports = sorted(set(ports))
+            udp_ports = [port for port in tcp_ports if self._udp_probe(port) is not None]
 
-        return detected
+        detected = [result async for result in self.sweep([host], tcp_ports, udp_ports, rate=None)]
+        return sorted(detected, key=lambda result: (result['port'], result['transport']))
 
-    def scan_network(self, network: str, protocols: Optional[List[ProtocolType]] = None) -> List[Dict]:
+    def scan_network(self, network: str, protocols: Optional[List[ProtocolType]] = None,
+                     rate: float = DEFAULT_PROBE_RATE, broadcast: bool = False) -> List[Dict]:
         """
         Scan network for devices supporting specified protocols
 
+        Blocking wrapper around scan_network_async for callers without an
+        event loop.
+
         Args:
             network: Network range (e.g., "192.168.1.0/24")
             protocols: Optional list of protocols to scan for
+            rate: Probes started per second
+            broadcast: Discover KNX/IP and BACnet by multicast/broadcast
 
         Returns:
-            List of detected devices
+            List of detected devices in address and port order
         """
-        import ipaddress
+        async def collect():
+            return [result async for result in self.scan_network_async(network, protocols, rate,
+                                                                       broadcast=broadcast)]
+
+        devices = asyncio.run(collect())
+        return sorted(devices, key=lambda device: (ipaddress.IPv4Address(device['host']),
+                                                   device['port'], device['transport']))
+
+    async def scan_network_async(self, network: str, protocols: Optional[List[ProtocolType]] = None,
+                                 rate: float = DEFAULT_PROBE_RATE,
+                                 tcp_concurrency: int = DEFAULT_TCP_CONCURRENCY,
+                                 broadcast: bool = False,
+                                 window: float = DEFAULT_DISCOVERY_WINDOW) -> AsyncIterator[Dict]:
+        """
+        Sweep a network for all requested protocols at once
+
+        TCP and UDP probes run in separate pipelines under one rate budget;
+        each detection is yielded as soon as it is identified.
 
+        In broadcast mode KNX/IP and BACnet are not swept: one KNX multicast
+        SEARCH_REQUEST and one BACnet Who-Is to the subnet broadcast find
+        them, with their device descriptors, while the other protocols are
+        swept as usual.
+
+        Args:
+            network: Network range (e.g., "192.168.1.0/24")
+            protocols: Protocols to scan for (default: Modbus TCP, S7comm, KNX/IP)
+            rate: Probes started per second across both pipelines
+            tcp_concurrency: TCP probe connections open at once
+            broadcast: Discover KNX/IP and BACnet by multicast/broadcast
+            window: Seconds broadcast discovery collects responses
+        """
         if protocols is None:
             protocols = [
                 ProtocolType.MODBUS_TCP,
@@ -87,128 +207,170 @@ class ProtocolScanner:
                 ProtocolType.KNX_IP
             ]
 
-        devices = []
-        network_obj = ipaddress.IPv4Network(network, strict=False)
-
-        ports = []
-        for protocol in protocols:
-            if protocol in PROTOCOL_PORTS:
-                ports.extend(PROTOCOL_PORTS[protocol])
-
-        ports = list(set(ports))  # Remove duplicates
+        hosts = [str(ip) for ip in ipaddress.IPv4Network(network, strict=False).hosts()]
+        discovered = [protocol for protocol in protocols if broadcast and protocol in BROADCAST_DISCOVERY]
+        tcp_ports, udp_ports = self._pipeline_ports([p for p in protocols if p not in discovered])
 
         logger.info(f"Scanning {network} for protocols: {[p.value for p in protocols]}")
-        logger.info(f"Ports to scan: {ports}")
+        logger.info(f"Ports to scan: TCP {tcp_ports}, UDP {udp_ports} ({len(hosts)} hosts, {rate} probes/s)")
 
-        for ip in network_obj.hosts():
-            ip_str = str(ip)
-            for port in ports:
-                result = self._probe_port(ip_str, port)
-                if result:
-                    devices.append(result)
-                    logger.info(f"Found device: {ip_str}:{port} - {result['protocol']}")
+        sources = [BROADCAST_DISCOVERY[protocol](network, window) for protocol in discovered]
+        if tcp_ports or udp_ports:
+            sources.append(self.sweep(hosts, tcp_ports, udp_ports, rate, tcp_concurrency))
 
-        return devices
+        found = 0
+        async for result in _merge(sources):
+            found += 1
+            logger.info(f"Found device: {result['host']}:{result['port']} - {result['protocol']}")
+            yield result
 
-    def _probe_port(self, host: str, port: int) -> Optional[Dict]:
-        """
-        Probe a specific port and identify protocol
+        logger.info(f"Protocol scan of {network} complete. Found {found} service(s).")
 
-        Returns:
-            Dict with protocol info or None if no response
+    async def sweep(self, hosts: List[str], tcp_ports: List[int], udp_ports: List[int],
+                    rate: Optional[float] = DEFAULT_PROBE_RATE,
+                    tcp_concurrency: int = DEFAULT_TCP_CONCURRENCY) -> AsyncIterator[Dict]:
         """
-        # Try TCP first
-        result = self._probe_tcp(host, port)
-        if result:
-            return result
+        Probe every host on the given ports and yield detections as they arrive
 
-        # Try UDP for UDP-based protocols
-        if port in [502, 47808]:  # Modbus UDP, BACnet
-            result = self._probe_udp(host, port)
-            if result:
-                return result
+        The TCP pipeline is a fixed set of workers drawing (host, port)
+        targets from a shared iterator, so memory stays flat for large
+        networks. The UDP pipeline sends all datagrams from one socket and
+        waits one timeout window for every reply (see UdpProber). A slow or
+        filtered TCP port never delays UDP probes and vice versa.
 
-        return None
+        Args:
+            hosts: Addresses to probe
+            tcp_ports: Ports probed with TCP connect and signature exchange
+            udp_ports: Ports probed with a protocol datagram
+            rate: Probes started per second across both pipelines, unlimited if None
+            tcp_concurrency: TCP workers
+        """
+        budget = ProbeBudget(rate)
+        results: asyncio.Queue = asyncio.Queue()
 
-    def _probe_tcp(self, host: str, port: int) -> Optional[Dict]:
-        """Probe TCP port"""
+        async def tcp_worker(targets):
+            for host, port in targets:
+                await budget.take()
+                result = await self._probe_tcp(host, port)
+                if result:
+                    results.put_nowait(result)
+
+        async def udp_pipeline():
+            prober = UdpProber(self.timeout, budget.take, self._udp_reply_id)
+            targets = (self._udp_target(host, port, transaction_id)
+                       for transaction_id, (host, port) in enumerate(
+                           (host, port) for host in hosts for port in udp_ports))
+            async for target, data in prober.probe(targets):
+                results.put_nowait({
+                    'host': target.host,
+                    'port': target.port,
+                    'protocol': self._identify_udp_protocol(target.port, data).value,
+                    'transport': 'udp'
+                })
+
+        tcp_targets = ((host, port) for host in hosts for port in tcp_ports)
+        workers = [asyncio.ensure_future(tcp_worker(tcp_targets))
+                   for _ in range(min(max(1, tcp_concurrency), len(hosts) * len(tcp_ports)))]
+        if udp_ports:
+            workers.append(asyncio.ensure_future(udp_pipeline()))
+
+        finished = asyncio.ensure_future(asyncio.gather(*workers))
+        finished.add_done_callback(lambda _: results.put_nowait(None))
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(self.timeout)
-            result = sock.connect_ex((host, port))
-            sock.close()
+            while True:
+                result = await results.get()
+                if result is None:
+                    break
+                yield result
+            await finished
+        finally:
+            finished.cancel()
+            for task in workers:
+                task.cancel()
 
-            if result == 0:
-                # Port is open, identify protocol
-                protocol = self._identify_tcp_protocol(host, port)
-                return {
-                    'host': host,
-                    'port': port,
-                    'protocol': protocol.value,
-                    'transport': 'tcp'
-                }
-
-        except Exception as e:
-            logger.debug(f"TCP probe error {host}:{port}: {e}")
+    @staticmethod
+    def _pipeline_ports(protocols: List[ProtocolType]) -> Tuple[List[int], List[int]]:
+        """(TCP ports, UDP ports) probed for the given protocols"""
+        tcp_ports, udp_ports = set(), set()
+        for protocol in protocols:
+            ports = udp_ports if protocol in UDP_PROTOCOLS else tcp_ports
+            ports.update(PROTOCOL_PORTS.get(protocol, []))
+        return sorted(tcp_ports), sorted(udp_ports)
 
-        return None
+    async def _probe_tcp(self, host: str, port: int) -> Optional[Dict]:
+        """
+        Probe TCP port
 
-    def _probe_udp(self, host: str, port: int) -> Optional[Dict]:
-        """Probe UDP port"""
+        The accepted connection is kept for the protocol signature exchange,
+        so identifying an open port costs one TCP handshake.
+        """
+        loop = asyncio.get_running_loop()
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setblocking(False)
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            sock.settimeout(self.timeout)
-
-            # Send protocol-specific probe
-            if port == 502:
-                # Modbus UDP probe
-                probe = self._create_modbus_probe()
-            elif port == 47808:
-                # BACnet probe
-                probe = self._create_bacnet_probe()
-            else:
-                return None
-
-            sock.sendto(probe, (host, port))
+            await asyncio.wait_for(loop.sock_connect(sock, (host, port)), self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            # Port is open, identify protocol on the same connection
+            protocol = await self._identify_tcp_protocol(host, port, sock)
+            return {
+                'host': host,
+                'port': port,
+                'protocol': protocol.value,
+                'transport': 'tcp'
+            }
+
+        except (OSError, asyncio.TimeoutError) as e:
+            logger.debug(f"TCP probe error {host}:{port}: {e!r}")
+
+        finally:
+            sock.close()
 
-            try:
-                data, addr = sock.recvfrom(1024)
-                sock.close()
+        return None
 
-                if data:
-                    protocol = self._identify_udp_protocol(port, data)
-                    return {
-                        'host': host,
-                        'port': port,
-                        'protocol': protocol.value,
-                        'transport': 'udp'
-                    }
-            except socket.timeout:
-                pass
+    def _udp_probe(self, port: int, transaction_id: int = 0x0001) -> Optional[bytes]:
+        """Protocol-specific datagram for a UDP port, None if the port has no UDP probe"""
+        if port == 502:
+            # Modbus UDP probe
+            return self._create_modbus_probe(transaction_id)
+        if port == 47808:
+            # BACnet probe
+            return self._create_bacnet_probe()
+        return None
 
-            sock.close()
+    def _udp_target(self, host: str, port: int, sequence: int) -> UdpTarget:
+        """
+        UDP probe of host:port
 
-        except Exception as e:
-            logger.debug(f"UDP probe error {host}:{port}: {e}")
+        Modbus probes carry a distinct MBAP transaction ID so replies are
+        matched by it; BACnet Who-Is has none and is matched by address.
+        """
+        transaction_id = sequence & 0xFFFF if port == 502 else None
+        return UdpTarget(host, port, self._udp_probe(port, transaction_id or 0), transaction_id)
 
+    @staticmethod
+    def _udp_reply_id(port: int, data: bytes) -> Optional[int]:
+        """Transaction ID of a UDP reply (MBAP transaction ID for Modbus)"""
+        if port == 502 and len(data) >= 2:
+            return struct.unpack_from('>H', data)[0]
         return None
 
-    def _identify_tcp_protocol(self, host: str, port: int) -> ProtocolType:
-        """Identify protocol based on port and connection test"""
+    async def _identify_tcp_protocol(self, host: str, port: int, sock: socket.socket) -> ProtocolType:
+        """Identify protocol based on port and a signature exchange on the open connection"""
 
         # Modbus TCP (port 502)
         if port == 502:
-            if self._test_modbus_tcp(host, port):
+            if await self._test_modbus_tcp(host, port, sock):
                 return ProtocolType.MODBUS_TCP
 
         # S7comm (port 102)
         elif port == 102:
-            if self._test_s7comm(host, port):
+            if await self._test_s7comm(host, port, sock):
                 return ProtocolType.S7COMM
 
         # KNX/IP (port 3671)
         elif port == 3671:
-            if self._test_knx_ip(host, port):
+            if await self._test_knx_ip(host, port, sock):
                 return ProtocolType.KNX_IP
 
         # PROFINET (ports 34962-34964)
@@ -232,57 +394,38 @@ class ProtocolScanner:
 
         return ProtocolType.UNKNOWN
 
-    def _test_modbus_tcp(self, host: str, port: int) -> bool:
-        """Test if port responds to Modbus TCP"""
+    async def _test_modbus_tcp(self, host: str, port: int, sock: socket.socket) -> bool:
+        """Test if the connection responds to Modbus TCP"""
+        client = AsyncNativeModbusClient(host, port, timeout=self.timeout)
+        client.sock = sock
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(self.timeout)
-            sock.connect((host, port))
-
-            # Send Modbus Read Coils request (Function 01)
-            # MBAP Header + PDU
-            request = struct.pack(
-                '>HHHBB',
-                0x0001,  # Transaction ID
-                0x0000,  # Protocol ID (Modbus)
-                0x0006,  # Length
-                0x01,    # Unit ID
-                0x01     # Function Code: Read Coils
-            )
-            request += struct.pack('>HH', 0x0000, 0x0001)  # Start address, count
-
-            sock.sendall(request)
-            response = sock.recv(1024)
-            sock.close()
-
-            # Check for Modbus response (protocol ID should be 0x0000)
-            if len(response) >= 7:
-                protocol_id = struct.unpack('>H', response[2:4])[0]
-                return protocol_id == 0x0000
-
+            # Any well-formed MBAP reply (protocol ID 0x0000) counts
+            return await client.probe()
         except Exception as e:
             logger.debug(f"Modbus TCP test error: {e}")
+            return False
 
-        return False
-
-    def _test_s7comm(self, host: str, port: int) -> bool:
-        """Test if port responds to S7comm"""
+    async def _test_s7comm(self, host: str, port: int, sock: socket.socket) -> bool:
+        """Test if the connection responds to S7comm"""
         try:
-            # Use simplified S7 detection
-            from s7_scanner import S7Scanner
-            scanner = S7Scanner(host, port=port, timeout=self.timeout)
-            result = scanner.detect_s7_device()
+            # An established pooled session already proves S7comm
+            from s7_session_pool import s7_session_pool
+            if s7_session_pool.is_connected(host, port):
+                return True
+
+            # COTP Connect Request and S7 Setup on the probe connection
+            from s7_scanner import AsyncS7Scanner
+            scanner = AsyncS7Scanner(host, port=port, timeout=self.timeout)
+            result = await scanner.detect_s7_device(sock=sock)
             return result.get('success', False)
         except Exception as e:
             logger.debug(f"S7comm test error: {e}")
             return False
 
-    def _test_knx_ip(self, host: str, port: int) -> bool:
-        """Test if port responds to KNX/IP"""
+    async def _test_knx_ip(self, host: str, port: int, sock: socket.socket) -> bool:
+        """Test if the connection responds to KNX/IP"""
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(self.timeout)
-            sock.connect((host, port))
+            loop = asyncio.get_running_loop()
 
             # Send KNX SEARCH_REQUEST (simplified)
             # KNX/IP header: header length, protocol version, service type, total length
@@ -298,47 +441,29 @@ class ProtocolScanner:
             request += socket.inet_aton(host)
             request += struct.pack('>H', 0)  # Port
 
-            sock.sendall(request)
-            response = sock.recv(1024)
-            sock.close()
+            await loop.sock_sendall(sock, request)
+            response = await asyncio.wait_for(loop.sock_recv(sock, 1024), self.timeout)
 
             # Check for KNX response
             if len(response) >= 6:
                 return response[1] == 0x10  # Protocol version
 
         except Exception as e:
-            logger.debug(f"KNX/IP test error: {e}")
+            logger.debug(f"KNX/IP test error: {e!r}")
 
         return False
 
-    def _create_modbus_probe(self) -> bytes:
+    def _create_modbus_probe(self, transaction_id: int = 0x0001) -> bytes:
         """Create Modbus UDP probe packet"""
         # Simple Modbus read coils request
-        return struct.pack(
-            '>HHHBBHH',
-            0x0001,  # Transaction ID
-            0x0000,  # Protocol ID
-            0x0006,  # Length
-            0x01,    # Unit ID
-            0x01,    # Function Code
-            0x0000,  # Start address
-            0x0001   # Quantity
-        )
+        probe = bytearray(12)
+        pack_read_request(probe, 0, transaction_id, 0x01, READ_COILS, 0x0000, 0x0001)
+        return bytes(probe)
 
     def _create_bacnet_probe(self) -> bytes:
         """Create BACnet probe packet"""
-        # BACnet Who-Is request (simplified)
-        return bytes([
-            0x81,  # BVLC Type: BACnet/IP
-            0x0A,  # Function: Original-Unicast-NPDU
-            0x00, 0x11,  # Length
-            0x01,  # Version
-            0x20,  # Control flags
-            0xFF, 0xFF,  # DNET
-            0x00,  # DLEN
-            0x08,  # Who-Is
-            0x00, 0x00,  # Range (all)
-        ])
+        # BACnet Who-Is request, unicast to one host
+        return bacnet_who_is(broadcast=False)
 
     def _get_all_ports(self) -> List[int]:
         """Get all known protocol ports"""
@@ -0,0 +1,323 @@
+"""
+Compact register availability maps
+Sets of Modbus addresses are stored as sorted, non-overlapping half-open
+intervals in two parallel arrays, so a fully readable table costs two integers
+instead of one entry per address.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from enum import Enum
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+# Addresses read at each interval edge when verifying a register map
+DEFAULT_VERIFY_WIDTH = 4
+
+# Upper bound on verification reads per device
+DEFAULT_VERIFY_LIMIT = 16
+
+# Register tables (RegisterType values) and the matching scan result keys
+SCAN_RESULT_KEYS = {
+    'coil': 'coils',
+    'discrete_input': 'discrete_inputs',
+    'input_register': 'input_registers',
+    'holding_register': 'holding_registers',
+}
+
+
+class RegisterStatus(Enum):
+    """Register availability status"""
+    AVAILABLE = "available"  # Yellow dot - register exists and readable
+    ERROR = "error"  # Black dot - register doesn't exist or read error
+    UNTESTED = "untested"  # Gray dot - not yet tested
+
+
+class IntervalSet:
+    """Set of integer addresses stored as sorted [start, end) intervals"""
+
+    __slots__ = ('_starts', '_ends')
+
+    def __init__(self, intervals: Iterable[Tuple[int, int]] = ()):
+        self._starts = array('l')
+        self._ends = array('l')
+        for start, end in intervals:
+            self.add_range(start, end)
+
+    @classmethod
+    def from_addresses(cls, addresses: Iterable[int]) -> 'IntervalSet':
+        """Build a set from individual addresses"""
+        result = cls()
+        run_start = previous = None
+        for address in sorted(set(addresses)):
+            if previous is not None and address == previous + 1:
+                previous = address
+                continue
+            if run_start is not None:
+                result._starts.append(run_start)
+                result._ends.append(previous + 1)
+            run_start = previous = address
+        if run_start is not None:
+            result._starts.append(run_start)
+            result._ends.append(previous + 1)
+        return result
+
+    def add_range(self, start: int, end: int):
+        """Add addresses start..end-1, merging touching intervals"""
+        if end <= start:
+            return
+        lo = bisect_left(self._ends, start)
+        hi = bisect_right(self._starts, end)
+        if lo < hi:
+            start = min(start, self._starts[lo])
+            end = max(end, self._ends[hi - 1])
+        self._starts[lo:hi] = array('l', [start])
+        self._ends[lo:hi] = array('l', [end])
+
+    def add(self, address: int):
+        """Add a single address"""
+        self.add_range(address, address + 1)
+
+    def remove_range(self, start: int, end: int):
+        """Remove addresses start..end-1, splitting intervals as needed"""
+        if end <= start:
+            return
+        lo = bisect_right(self._ends, start)
+        hi = bisect_left(self._starts, end)
+        if lo >= hi:
+            return
+        pieces = []
+        if self._starts[lo] < start:
+            pieces.append((self._starts[lo], start))
+        if self._ends[hi - 1] > end:
+            pieces.append((end, self._ends[hi - 1]))
+        self._starts[lo:hi] = array('l', [piece[0] for piece in pieces])
+        self._ends[lo:hi] = array('l', [piece[1] for piece in pieces])
+
+    def copy(self) -> 'IntervalSet':
+        """Shallow copy"""
+        result = IntervalSet()
+        result._starts = array('l', self._starts)
+        result._ends = array('l', self._ends)
+        return result
+
+    def union(self, other: 'IntervalSet') -> 'IntervalSet':
+        """Addresses in either set (linear merge)"""
+        result = IntervalSet()
+        starts, ends = result._starts, result._ends
+        i = j = 0
+        while i < len(self._starts) or j < len(other._starts):
+            if j >= len(other._starts) or (i < len(self._starts) and self._starts[i] <= other._starts[j]):
+                start, end = self._starts[i], self._ends[i]
+                i += 1
+            else:
+                start, end = other._starts[j], other._ends[j]
+                j += 1
+            if ends and start <= ends[-1]:
+                ends[-1] = max(ends[-1], end)
+            else:
+                starts.append(start)
+                ends.append(end)
+        return result
+
+    def intersection(self, other: 'IntervalSet') -> 'IntervalSet':
+        """Addresses in both sets (linear sweep)"""
+        result = IntervalSet()
+        i = j = 0
+        while i < len(self._starts) and j < len(other._starts):
+            start = max(self._starts[i], other._starts[j])
+            end = min(self._ends[i], other._ends[j])
+            if start < end:
+                result._starts.append(start)
+                result._ends.append(end)
+            if self._ends[i] < other._ends[j]:
+                i += 1
+            else:
+                j += 1
+        return result
+
+    def difference(self, other: 'IntervalSet') -> 'IntervalSet':
+        """Addresses in this set but not in other"""
+        result = self.copy()
+        for start, end in zip(other._starts, other._ends):
+            result.remove_range(start, end)
+        return result
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+
+    def __contains__(self, address: int) -> bool:
+        index = bisect_right(self._starts, address) - 1
+        return index >= 0 and address < self._ends[index]
+
+    def covers(self, start: int, end: int) -> bool:
+        """Check that every address in start..end-1 is in the set"""
+        if end <= start:
+            return True
+        index = bisect_right(self._starts, start) - 1
+        return index >= 0 and end <= self._ends[index]
+
+    def intervals(self) -> List[Tuple[int, int]]:
+        """Get the [start, end) intervals"""
+        return list(zip(self._starts, self._ends))
+
+    def first(self) -> Optional[int]:
+        """Lowest address, None if empty"""
+        return self._starts[0] if self._starts else None
+
+    def __iter__(self) -> Iterator[int]:
+        for start, end in zip(self._starts, self._ends):
+            yield from range(start, end)
+
+    def __len__(self) -> int:
+        return sum(end - start for start, end in zip(self._starts, self._ends))
+
+    def __bool__(self) -> bool:
+        return len(self._starts) > 0
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, IntervalSet):
+            return NotImplemented
+        return self._starts == other._starts and self._ends == other._ends
+
+    def __repr__(self) -> str:
+        return f"IntervalSet({self.intervals()})"
+
+    def to_json(self) -> List[List[int]]:
+        """Encode as [[start, end], ...]"""
+        return [[start, end] for start, end in zip(self._starts, self._ends)]
+
+    @classmethod
+    def from_json(cls, data: Iterable) -> 'IntervalSet':
+        """Decode from [[start, end], ...]"""
+        return cls((int(start), int(end)) for start, end in data)
+
+
+class RegisterStatusMap:
+    """
+    Availability of one register table
+
+    Available and error addresses are kept as interval sets; every other
+    address is untested. Supports item access like the former
+    {address: RegisterStatus} dicts.
+    """
+
+    __slots__ = ('available', 'error')
+
+    def __init__(self, available: Optional[IntervalSet] = None, error: Optional[IntervalSet] = None):
+        self.available = available or IntervalSet()
+        self.error = error or IntervalSet()
+
+    def set_range(self, start: int, end: int, status: RegisterStatus):
+        """Set the status of addresses start..end-1"""
+        status = RegisterStatus(status.value)
+        if status == RegisterStatus.AVAILABLE:
+            self.error.remove_range(start, end)
+            self.available.add_range(start, end)
+        elif status == RegisterStatus.ERROR:
+            self.available.remove_range(start, end)
+            self.error.add_range(start, end)
+        else:
+            self.available.remove_range(start, end)
+            self.error.remove_range(start, end)
+
+    def __setitem__(self, address: int, status: RegisterStatus):
+        self.set_range(address, address + 1, status)
+
+    def __getitem__(self, address: int) -> RegisterStatus:
+        if address in self.available:
+            return RegisterStatus.AVAILABLE
+        if address in self.error:
+            return RegisterStatus.ERROR
+        return RegisterStatus.UNTESTED
+
+    def items(self) -> Iterator[Tuple[int, RegisterStatus]]:
+        """Iterate (address, status) over tested addresses in address order"""
+        tested = [(start, end, RegisterStatus.AVAILABLE) for start, end in self.available.intervals()]
+        tested += [(start, end, RegisterStatus.ERROR) for start, end in self.error.intervals()]
+        for start, end, status in sorted(tested, key=lambda interval: interval[0]):
+            for address in range(start, end):
+                yield address, status
+
+    def update(self, other: 'RegisterStatusMap'):
+        """Apply another map on top of this one (its tested addresses win)"""
+        for start, end in other.error.intervals():
+            self.set_range(start, end, RegisterStatus.ERROR)
+        for start, end in other.available.intervals():
+            self.set_range(start, end, RegisterStatus.AVAILABLE)
+
+    def __len__(self) -> int:
+        return len(self.available) + len(self.error)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, RegisterStatusMap):
+            return NotImplemented
+        return self.available == other.available and self.error == other.error
+
+    def __repr__(self) -> str:
+        return f"RegisterStatusMap(available={self.available.intervals()}, error={self.error.intervals()})"
+
+    def to_json(self) -> Dict[str, List[List[int]]]:
+        """Encode as {'available': [[start, end], ...], 'error': [...]}"""
+        return {'available': self.available.to_json(), 'error': self.error.to_json()}
+
+    @classmethod
+    def from_json(cls, data: Dict) -> 'RegisterStatusMap':
+        """Decode the interval format or the legacy {str(address): status} format"""
+        if set(data) <= {'available', 'error'} and all(isinstance(v, list) for v in data.values()):
+            return cls(IntervalSet.from_json(data.get('available', [])),
+                       IntervalSet.from_json(data.get('error', [])))
+        return cls.from_items((int(address), RegisterStatus(status)) for address, status in data.items())
+
+    @classmethod
+    def from_items(cls, items: Iterable[Tuple[int, Union[RegisterStatus, str]]]) -> 'RegisterStatusMap':
+        """Build from (address, status) pairs, e.g. a legacy status dict's items()"""
+        available, error = [], []
+        for address, status in items:
+            value = status.value if isinstance(status, Enum) else status
+            if value == RegisterStatus.AVAILABLE.value:
+                available.append(address)
+            elif value == RegisterStatus.ERROR.value:
+                error.append(address)
+        return cls(IntervalSet.from_addresses(available), IntervalSet.from_addresses(error))
+
+
+def register_map_to_json(register_map: Dict[str, IntervalSet]) -> Dict[str, List[List[int]]]:
+    """Encode a {table: IntervalSet} map"""
+    return {table: intervals.to_json() for table, intervals in register_map.items()}
+
+
+def register_map_from_json(data: Dict) -> Dict[str, IntervalSet]:
+    """Decode a {table: [[start, end], ...]} map"""
+    return {table: IntervalSet.from_json(intervals) for table, intervals in data.items()}
+
+
+def register_map_from_scan(scan_results: Dict[str, List[Dict]]) -> Dict[str, IntervalSet]:
+    """Build a register map from ModbusScanner.scan_device results"""
+    return {
+        table: IntervalSet.from_addresses(reg['address'] for reg in scan_results.get(key, []))
+        for table, key in SCAN_RESULT_KEYS.items()
+    }
+
+
+def boundary_probes(register_map: Dict[str, IntervalSet], width: int = DEFAULT_VERIFY_WIDTH,
+                    limit: int = DEFAULT_VERIFY_LIMIT) -> List[Tuple[str, int, int]]:
+    """
+    Sparse verification reads at the edges of a register map
+
+    Reads the first and last addresses of every interval; with more edges than
+    limit, an evenly spread subset is kept.
+
+    Returns:
+        (table, start, count) tuples
+    """
+    probes = []
+    for table, intervals in register_map.items():
+        for start, end in intervals.intervals():
+            probes.append((table, start, min(width, end - start)))
+            if end - start > width:
+                probes.append((table, end - width, width))
+
+    if len(probes) > limit:
+        probes = [probes[i * len(probes) // limit] for i in range(limit)]
+    return probes
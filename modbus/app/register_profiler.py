@@ -0,0 +1,229 @@
+"""
+Register activity profiling
+Samples a device's discovered register blocks several times with block reads
+and analyzes the sample matrix (change frequency, variance, monotonic
+counters) to recommend a scan_interval per register, so Home Assistant polls
+static setpoints rarely and only fast-changing values often.
+"""
+
+import logging
+import time
+import warnings
+from collections import namedtuple
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+from modbus_codec import NativeModbusClient, function_limit, DEFAULT_MAX_IN_FLIGHT, BIT_FUNCTIONS
+from discovery_plan import TABLE_FUNCTIONS
+from register_map import IntervalSet
+
+logger = logging.getLogger(__name__)
+
+# Defaults for one profiling run
+DEFAULT_SAMPLES = 20
+DEFAULT_SAMPLE_INTERVAL = 1.0
+MAX_SAMPLES = 600
+
+# Longest profiling run in seconds; sampling runs inside the API request
+MAX_PROFILE_DURATION = 300
+
+# Home Assistant scan_interval steps a recommendation is rounded down to
+SCAN_INTERVAL_STEPS = (1, 2, 5, 10, 15, 30, 60)
+
+# Registers that never changed while sampled (setpoints, configuration)
+STATIC_SCAN_INTERVAL = 60
+
+# Monotonic counters (energy, operating hours) only need occasional updates
+COUNTER_SCAN_INTERVAL = 30
+
+RegisterSamples = namedtuple('RegisterSamples', ['table', 'addresses', 'values', 'timestamps'])
+RegisterSamples.__doc__ = """
+Sample matrix of one register table
+
+addresses: (N,) address of each column
+values: (samples, N) float64 raw values, NaN where a read failed
+timestamps: (samples,) monotonic time of each sampling round
+"""
+
+
+def _blocks(register_map: Dict[str, IntervalSet]) -> List[Tuple[str, int, int, int]]:
+    """Block reads covering a register map: (table, function_code, start, count)"""
+    blocks = []
+    for table, intervals in register_map.items():
+        function_code = TABLE_FUNCTIONS[table]
+        limit = function_limit(function_code)
+        for start, end in intervals.intervals():
+            for block_start in range(start, end, limit):
+                blocks.append((table, function_code, block_start, min(limit, end - block_start)))
+    return blocks
+
+
+def _decode(function_code: int, data: bytes, count: int):
+    """Decode a read payload into a numpy row"""
+    if function_code in BIT_FUNCTIONS:
+        return np.unpackbits(np.frombuffer(data, dtype=np.uint8), bitorder='little')[:count]
+    return np.frombuffer(data, dtype='>u2', count=count)
+
+
+class RegisterProfiler:
+    """Samples register blocks of one device over a single connection"""
+
+    def __init__(self, host: str, port: int = 502, slave_id: int = 1, timeout: float = 2,
+                 max_in_flight: int = DEFAULT_MAX_IN_FLIGHT):
+        self.host = host
+        self.port = port
+        self.slave_id = slave_id
+        self.timeout = timeout
+        self.max_in_flight = max_in_flight
+
+    def sample(self, register_map: Dict[str, IntervalSet], samples: int = DEFAULT_SAMPLES,
+               interval: float = DEFAULT_SAMPLE_INTERVAL) -> Optional[Dict[str, RegisterSamples]]:
+        """
+        Read every block of register_map samples times
+
+        Args:
+            register_map: {table: IntervalSet} of discovered registers
+            samples: Sampling rounds
+            interval: Seconds between the starts of two rounds
+
+        Returns:
+            {table: RegisterSamples}, None if the device is unreachable
+        """
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("NumPy is required for register profiling")
+
+        blocks = _blocks(register_map)
+        requests = [(function_code, start, count) for _, function_code, start, count in blocks]
+
+        # Column offset of every block within its table's matrix
+        columns = {}
+        offsets = []
+        for table, _, start, count in blocks:
+            offsets.append(columns.get(table, 0))
+            columns[table] = columns.get(table, 0) + count
+
+        matrices = {table: np.full((samples, width), np.nan) for table, width in columns.items()}
+        timestamps = np.zeros(samples)
+
+        with NativeModbusClient(self.host, self.port, self.timeout, self.slave_id) as client:
+            if client.sock is None:
+                logger.error(f"Failed to connect to {self.host}:{self.port}")
+                return None
+
+            logger.info(f"Profiling {len(blocks)} blocks on {self.host}:{self.port}, "
+                        f"{samples} samples every {interval}s")
+            rounds = 0
+            for row in range(samples):
+                started = time.monotonic()
+                if client.sock is None and not client.connect():
+                    break
+                timestamps[row] = started
+                rounds += 1
+                outcomes = client.read_pipelined(requests, max_in_flight=self.max_in_flight)
+                for (table, _, _, count), offset, outcome in zip(blocks, offsets, outcomes):
+                    if outcome.data is not None:
+                        matrices[table][row, offset:offset + count] = _decode(
+                            outcome.function_code, outcome.data, count)
+
+                if row < samples - 1:
+                    time.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+        results = {}
+        for table, matrix in matrices.items():
+            addresses = np.concatenate([
+                np.arange(start, start + count)
+                for block_table, _, start, count in blocks if block_table == table
+            ])
+            results[table] = RegisterSamples(table, addresses, matrix[:rounds], timestamps[:rounds])
+        return results
+
+
+def analyze_samples(samples: RegisterSamples) -> Dict[str, "np.ndarray"]:
+    """
+    Per-register activity statistics of a sample matrix
+
+    Returns:
+        Dict of (N,) arrays: changes, change_rate (changes per second),
+        variance, counter (monotonically increasing, 16 bit wraparound
+        allowed) and scan_interval (recommended seconds)
+    """
+    values = samples.values
+    valid = ~np.isnan(values)
+    pair_valid = valid[1:] & valid[:-1]
+    diffs = np.diff(values, axis=0)
+
+    changed = (diffs != 0) & pair_valid
+    changes = changed.sum(axis=0)
+    pairs = pair_valid.sum(axis=0)
+
+    duration = float(samples.timestamps[-1] - samples.timestamps[0]) if len(samples.timestamps) > 1 else 0.0
+    change_rate = changes / duration if duration > 0 else np.zeros(values.shape[1])
+
+    with warnings.catch_warnings():
+        # Columns without a single successful read give NaN
+        warnings.simplefilter('ignore', RuntimeWarning)
+        variance = np.nanvar(values, axis=0)
+
+    if TABLE_FUNCTIONS[samples.table] in BIT_FUNCTIONS:
+        counter = np.zeros(values.shape[1], dtype=bool)
+    else:
+        # A wrap from 65535 to 0 shows up as a large negative step
+        deltas = np.where(diffs < -32768, diffs + 65536, diffs)
+        never_decreases = np.all((deltas >= 0) | ~pair_valid, axis=0)
+        counter = never_decreases & (changes * 2 >= pairs) & (changes > 0)
+
+    # Poll at least twice per observed change, rounded down to a standard step
+    steps = np.asarray(SCAN_INTERVAL_STEPS)
+    with np.errstate(divide='ignore'):
+        target = np.where(change_rate > 0, 0.5 / change_rate, np.inf)
+    index = np.clip(np.searchsorted(steps, target, side='right') - 1, 0, len(steps) - 1)
+    scan_interval = steps[index]
+    scan_interval = np.where(counter, np.maximum(scan_interval, COUNTER_SCAN_INTERVAL), scan_interval)
+    scan_interval = np.where(changes == 0, STATIC_SCAN_INTERVAL, scan_interval)
+    # Registers that never answered keep no recommendation
+    scan_interval = np.where(valid.any(axis=0), scan_interval, 0)
+
+    return {
+        'changes': changes,
+        'change_rate': change_rate,
+        'variance': variance,
+        'counter': counter,
+        'scan_interval': scan_interval,
+    }
+
+
+def profile_report(samples: Dict[str, RegisterSamples]) -> Dict[str, Dict[int, Dict]]:
+    """
+    JSON-friendly profiling result
+
+    Returns:
+        {table: {address: {scan_interval, change_rate, variance, counter}}}
+    """
+    report = {}
+    for table, table_samples in samples.items():
+        stats = analyze_samples(table_samples)
+        entries = {}
+        for column, address in enumerate(table_samples.addresses.tolist()):
+            if not stats['scan_interval'][column]:
+                continue
+            entries[address] = {
+                'scan_interval': int(stats['scan_interval'][column]),
+                'change_rate': round(float(stats['change_rate'][column]), 4),
+                'variance': round(float(stats['variance'][column]), 4),
+                'counter': bool(stats['counter'][column])
+            }
+        report[table] = entries
+    return report
+
+
+def scan_interval_recommendations(report: Dict[str, Dict[int, Dict]]) -> Dict[str, Dict[int, int]]:
+    """Reduce a profile report to {table: {address: scan_interval}} for ModbusConfigGenerator"""
+    return {
+        table: {address: entry['scan_interval'] for address, entry in entries.items()}
+        for table, entries in report.items()
+    }
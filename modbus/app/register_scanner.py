@@ -4,17 +4,28 @@ Scans available registers and reports status
 """
 
 import logging
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, List, Tuple
 from enum import Enum
 
-logger = logging.getLogger(__name__)
+from modbus_codec import (
+    NativeModbusClient, function_limit, DEFAULT_MAX_IN_FLIGHT,
+    READ_COILS, READ_DISCRETE_INPUTS, READ_HOLDING_REGISTERS, READ_INPUT_REGISTERS
+)
+from register_map import IntervalSet, RegisterStatus, RegisterStatusMap
+from modbus_exceptions import ModbusConnectionError
+from s7_client import S7_AREA_PE, S7_AREA_PA, S7_AREA_MK, S7_AREA_DB, VM_DB_NUMBER, READ_RESPONSE_OVERHEAD
 
+logger = logging.getLogger(__name__)
 
-class RegisterStatus(Enum):
-    """Register availability status"""
-    AVAILABLE = "available"  # Yellow dot - register exists and readable
-    ERROR = "error"  # Black dot - register doesn't exist or read error
-    UNTESTED = "untested"  # Gray dot - not yet tested
+# S7 memory areas: (area code, DB number, first byte, bytes probed at most)
+S7_AREA_PROBES = {
+    'inputs': (S7_AREA_PE, 0, 0, 256),                   # I (Digital Inputs)
+    'outputs': (S7_AREA_PA, 0, 0, 256),                  # Q (Digital Outputs)
+    'markers': (S7_AREA_MK, 0, 0, 1024),                 # M (Merkers)
+    'data_blocks': (S7_AREA_DB, VM_DB_NUMBER, 0, 4096),  # DB1 (LOGO! VM)
+    'analog_inputs': (S7_AREA_PE, 0, 256, 512),          # AI (peripheral inputs from PIW256)
+    'analog_outputs': (S7_AREA_PA, 0, 256, 512),         # AQ (peripheral outputs from PQW256)
+}
 
 
 class RegisterType(Enum):
@@ -28,11 +39,13 @@ class RegisterType(Enum):
 class RegisterScanner:
     """Automatic register scanner for Modbus devices"""
 
-    def __init__(self, host: str, port: int = 502, slave_id: int = 1, timeout: int = 2):
+    def __init__(self, host: str, port: int = 502, slave_id: int = 1, timeout: int = 2,
+                 max_in_flight: int = DEFAULT_MAX_IN_FLIGHT):
         self.host = host
         self.port = port
         self.slave_id = slave_id
         self.timeout = timeout
+        self.max_in_flight = max_in_flight
 
     def scan_all_registers(
         self,
@@ -41,7 +54,7 @@ class RegisterScanner:
         input_range: Tuple[int, int] = (0, 100),
         holding_range: Tuple[int, int] = (0, 100),
         batch_size: int = 10
-    ) -> Dict[RegisterType, Dict[int, RegisterStatus]]:
+    ) -> Dict[RegisterType, RegisterStatusMap]:
         """
         Scan all register types
 
@@ -53,13 +66,13 @@ class RegisterScanner:
             batch_size: Number of registers to read in one request
 
         Returns:
-            Dict mapping RegisterType to {address: status}
+            Dict mapping RegisterType to its RegisterStatusMap
         """
         results = {
-            RegisterType.COIL: {},
-            RegisterType.DISCRETE_INPUT: {},
-            RegisterType.INPUT_REGISTER: {},
-            RegisterType.HOLDING_REGISTER: {}
+            RegisterType.COIL: RegisterStatusMap(),
+            RegisterType.DISCRETE_INPUT: RegisterStatusMap(),
+            RegisterType.INPUT_REGISTER: RegisterStatusMap(),
+            RegisterType.HOLDING_REGISTER: RegisterStatusMap()
         }
 
         logger.info(f"Starting register scan for {self.host}:{self.port}")
@@ -87,151 +100,60 @@ class RegisterScanner:
         )
 
         # Log summary
-        total_available = sum(
-            sum(1 for status in regs.values() if status == RegisterStatus.AVAILABLE)
-            for regs in results.values()
-        )
+        total_available = sum(len(regs.available) for regs in results.values())
         logger.info(f"Register scan complete. Found {total_available} available registers.")
 
         return results
 
-    def _scan_coils(self, start: int, end: int, batch_size: int) -> Dict[int, RegisterStatus]:
+    def _scan_coils(self, start: int, end: int, batch_size: int) -> RegisterStatusMap:
         """Scan coils (FC01)"""
-        try:
-            from pymodbus.client import ModbusTcpClient
-
-            client = ModbusTcpClient(self.host, port=self.port, timeout=self.timeout)
-            if not client.connect():
-                logger.error(f"Failed to connect to {self.host}:{self.port}")
-                return {}
-
-            results = {}
-
-            for addr in range(start, end, batch_size):
-                count = min(batch_size, end - addr)
-                try:
-                    response = client.read_coils(addr, count, slave=self.slave_id)
-                    if not response.isError():
-                        # All registers in this batch are available
-                        for i in range(count):
-                            results[addr + i] = RegisterStatus.AVAILABLE
-                    else:
-                        # Mark all as error
-                        for i in range(count):
-                            results[addr + i] = RegisterStatus.ERROR
-                except Exception as e:
-                    logger.debug(f"Error reading coils at {addr}: {e}")
-                    for i in range(count):
-                        results[addr + i] = RegisterStatus.ERROR
-
-            client.close()
-            return results
-
-        except ImportError:
-            logger.error("pymodbus not available")
-            return {}
-        except Exception as e:
-            logger.error(f"Error scanning coils: {e}")
-            return {}
+        return self._scan_function(READ_COILS, start, end, batch_size)
 
-    def _scan_discrete_inputs(self, start: int, end: int, batch_size: int) -> Dict[int, RegisterStatus]:
+    def _scan_discrete_inputs(self, start: int, end: int, batch_size: int) -> RegisterStatusMap:
         """Scan discrete inputs (FC02)"""
-        try:
-            from pymodbus.client import ModbusTcpClient
-
-            client = ModbusTcpClient(self.host, port=self.port, timeout=self.timeout)
-            if not client.connect():
-                return {}
-
-            results = {}
-
-            for addr in range(start, end, batch_size):
-                count = min(batch_size, end - addr)
-                try:
-                    response = client.read_discrete_inputs(addr, count, slave=self.slave_id)
-                    if not response.isError():
-                        for i in range(count):
-                            results[addr + i] = RegisterStatus.AVAILABLE
-                    else:
-                        for i in range(count):
-                            results[addr + i] = RegisterStatus.ERROR
-                except Exception as e:
-                    logger.debug(f"Error reading discrete inputs at {addr}: {e}")
-                    for i in range(count):
-                        results[addr + i] = RegisterStatus.ERROR
-
-            client.close()
-            return results
-
-        except Exception as e:
-            logger.error(f"Error scanning discrete inputs: {e}")
-            return {}
+        return self._scan_function(READ_DISCRETE_INPUTS, start, end, batch_size)
 
-    def _scan_input_registers(self, start: int, end: int, batch_size: int) -> Dict[int, RegisterStatus]:
+    def _scan_input_registers(self, start: int, end: int, batch_size: int) -> RegisterStatusMap:
         """Scan input registers (FC04)"""
-        try:
-            from pymodbus.client import ModbusTcpClient
-
-            client = ModbusTcpClient(self.host, port=self.port, timeout=self.timeout)
-            if not client.connect():
-                return {}
-
-            results = {}
-
-            for addr in range(start, end, batch_size):
-                count = min(batch_size, end - addr)
-                try:
-                    response = client.read_input_registers(addr, count, slave=self.slave_id)
-                    if not response.isError():
-                        for i in range(count):
-                            results[addr + i] = RegisterStatus.AVAILABLE
-                    else:
-                        for i in range(count):
-                            results[addr + i] = RegisterStatus.ERROR
-                except Exception as e:
-                    logger.debug(f"Error reading input registers at {addr}: {e}")
-                    for i in range(count):
-                        results[addr + i] = RegisterStatus.ERROR
-
-            client.close()
-            return results
-
-        except Exception as e:
-            logger.error(f"Error scanning input registers: {e}")
-            return {}
+        return self._scan_function(READ_INPUT_REGISTERS, start, end, batch_size)
 
-    def _scan_holding_registers(self, start: int, end: int, batch_size: int) -> Dict[int, RegisterStatus]:
+    def _scan_holding_registers(self, start: int, end: int, batch_size: int) -> RegisterStatusMap:
         """Scan holding registers (FC03)"""
-        try:
-            from pymodbus.client import ModbusTcpClient
-
-            client = ModbusTcpClient(self.host, port=self.port, timeout=self.timeout)
-            if not client.connect():
-                return {}
-
-            results = {}
-
-            for addr in range(start, end, batch_size):
-                count = min(batch_size, end - addr)
-                try:
-                    response = client.read_holding_registers(addr, count, slave=self.slave_id)
-                    if not response.isError():
-                        for i in range(count):
-                            results[addr + i] = RegisterStatus.AVAILABLE
-                    else:
-                        for i in range(count):
-                            results[addr + i] = RegisterStatus.ERROR
-                except Exception as e:
-                    logger.debug(f"Error reading holding registers at {addr}: {e}")
-                    for i in range(count):
-                        results[addr + i] = RegisterStatus.ERROR
-
-            client.close()
+        return self._scan_function(READ_HOLDING_REGISTERS, start, end, batch_size)
+
+    def _scan_function(self, function_code: int, start: int, end: int, batch_size: int) -> RegisterStatusMap:
+        """
+        Scan one function code with pipelined batch reads
+
+        Uses the native MBAP codec so several batches are in flight on one
+        connection instead of one request/response round trip per batch.
+        """
+        batch_size = max(1, min(batch_size, function_limit(function_code)))
+        requests = [
+            (function_code, addr, min(batch_size, end - addr))
+            for addr in range(start, end, batch_size)
+        ]
+        results = RegisterStatusMap()
+        if not requests:
             return results
 
+        try:
+            with NativeModbusClient(self.host, self.port, self.timeout, self.slave_id) as client:
+                if client.sock is None:
+                    logger.error(f"Failed to connect to {self.host}:{self.port}")
+                    return results
+                outcomes = client.read_pipelined(requests, max_in_flight=self.max_in_flight)
         except Exception as e:
-            logger.error(f"Error scanning holding registers: {e}")
-            return {}
+            logger.error(f"Error scanning function 0x{function_code:02X}: {e}")
+            return results
+
+        for outcome in outcomes:
+            status = RegisterStatus.AVAILABLE if outcome.data is not None else RegisterStatus.ERROR
+            if outcome.data is None:
+                logger.debug(f"Read 0x{function_code:02X} at {outcome.address} failed "
+                             f"(exception: {outcome.exception_code})")
+            results.set_range(outcome.address, outcome.address + outcome.count, status)
+        return results
 
 
 class S7RegisterScanner:
@@ -243,56 +165,102 @@ class S7RegisterScanner:
         self.tsap_src = tsap_src
         self.tsap_dst = tsap_dst
 
-    def scan_registers(self) -> Dict[str, Dict[str, RegisterStatus]]:
+    def scan_registers(self) -> Dict[str, IntervalSet]:
         """
-        Scan S7 memory areas
+        Map the readable bytes of every S7 memory area
 
         Returns:
-            Dict mapping memory area to {address: status}
+            Dict mapping memory area to an IntervalSet of readable byte offsets
+
+        Raises:
+            ModbusConnectionError: the session was lost during the scan (the
+                maps would otherwise be silently truncated)
         """
-        results = {
-            'inputs': {},  # I (Digital Inputs)
-            'outputs': {},  # Q (Digital Outputs)
-            'markers': {},  # M (Merkers)
-            'data_blocks': {},  # DB (Data Blocks)
-            'analog_inputs': {},  # AI
-            'analog_outputs': {}  # AQ
-        }
+        results = {area: IntervalSet() for area in S7_AREA_PROBES}
+        scanning = False
 
         try:
-            from s7_client import S7Client, SNAP7_AVAILABLE
+            from s7_client import SNAP7_AVAILABLE
+            from s7_session_pool import s7_session_pool
 
             if not SNAP7_AVAILABLE:
                 logger.warning("S7 client not available")
                 return results
 
-            with S7Client(self.host, self.port, self.tsap_src, self.tsap_dst) as client:
-                if not client.connect():
-                    logger.error(f"Failed to connect to S7 device at {self.host}:{self.port}")
-                    return results
-
-                # Scan digital inputs (typical LOGO! range: I1-I24)
-                for i in range(1, 25):
-                    addr = f"V{i}"
-                    try:
-                        value = client.read_vm(addr)
-                        if value is not None:
-                            results['inputs'][addr] = RegisterStatus.AVAILABLE
-                        else:
-                            results['inputs'][addr] = RegisterStatus.ERROR
-                    except Exception:
-                        results['inputs'][addr] = RegisterStatus.ERROR
-
-                logger.info(f"S7 register scan complete for {self.host}")
+            with s7_session_pool.acquire(self.host, self.port, self.tsap_src, self.tsap_dst) as client:
+                scanning = True
+                payload = max(1, client.pdu_size - READ_RESPONSE_OVERHEAD)
+                jobs = 0
+                for area, (area_code, db_number, start, limit) in S7_AREA_PROBES.items():
+                    def read(offset, size):
+                        nonlocal jobs
+                        jobs += 1
+                        if client.read_area(area_code, db_number, offset, size) is not None:
+                            return True
+                        if not client.connected:
+                            # A transport error is not the end of the area
+                            raise ModbusConnectionError(
+                                f'S7 session to {self.host}:{self.port} lost during register scan',
+                                {'host': self.host, 'port': self.port, 'area': area, 'offset': offset}
+                            )
+                        return False
+
+                    results[area] = map_s7_area(read, start, limit, payload)
+
+                sizes = ', '.join(f"{area}={len(found)}" for area, found in results.items())
+                logger.info(f"S7 register scan complete for {self.host} in {jobs} jobs: {sizes}")
 
         except ImportError:
             logger.warning("S7 client not available for scanning")
+        except ModbusConnectionError as e:
+            if scanning:
+                logger.error(str(e))
+                raise
+            logger.error(f"Failed to connect to S7 device at {self.host}:{self.port}: {e}")
         except Exception as e:
             logger.error(f"Error scanning S7 registers: {e}")
 
         return results
 
 
+def map_s7_area(read: Callable[[int, int], bool], start: int, limit: int, payload: int) -> IntervalSet:
+    """
+    Find the readable extent of an S7 area
+
+    S7 areas are contiguous from their first byte, so the area is read in
+    payload-sized jobs until one is rejected; the end inside that job is
+    then found by bisecting its length.
+
+    Args:
+        read: Returns True if bytes offset..offset+size-1 are readable
+        start: First byte to probe
+        limit: Maximum bytes to probe
+        payload: Largest read a single job may carry
+
+    Returns:
+        IntervalSet of readable byte offsets
+    """
+    found = IntervalSet()
+    end = start + limit
+    for chunk_start in range(start, end, payload):
+        size = min(payload, end - chunk_start)
+        if read(chunk_start, size):
+            found.add_range(chunk_start, chunk_start + size)
+            continue
+
+        # Largest readable prefix: lo bytes readable, hi bytes not
+        lo, hi = 0, size
+        while hi - lo > 1:
+            middle = (lo + hi) // 2
+            if read(chunk_start, middle):
+                lo = middle
+            else:
+                hi = middle
+        found.add_range(chunk_start, chunk_start + lo)
+        break
+    return found
+
+
 def format_register_map(results: Dict, show_errors: bool = False) -> str:
     """
     Format register scan results as human-readable string
@@ -307,36 +275,21 @@ def format_register_map(results: Dict, show_errors: bool = False) -> str:
     output = []
 
     for reg_type, registers in results.items():
-        available = [addr for addr, status in registers.items() if status == RegisterStatus.AVAILABLE]
-        errors = [addr for addr, status in registers.items() if status == RegisterStatus.ERROR]
+        if not isinstance(registers, RegisterStatusMap):
+            registers = RegisterStatusMap.from_items(registers.items())
 
         output.append(f"\n{reg_type.value}:")
-        output.append(f"  Available: {len(available)} registers")
-
-        if available:
-            # Group consecutive addresses
-            groups = []
-            start = available[0]
-            end = available[0]
-
-            for addr in available[1:]:
-                if addr == end + 1:
-                    end = addr
-                else:
-                    groups.append((start, end))
-                    start = addr
-                    end = addr
-
-            groups.append((start, end))
+        output.append(f"  Available: {len(registers.available)} registers")
 
+        if registers.available:
             output.append("  Ranges:")
-            for start, end in groups:
-                if start == end:
+            for start, end in registers.available.intervals():
+                if end - start == 1:
                     output.append(f"    {start}")
                 else:
-                    output.append(f"    {start}-{end}")
+                    output.append(f"    {start}-{end - 1}")
 
-        if show_errors and errors:
-            output.append(f"  Errors: {len(errors)} registers")
+        if show_errors and registers.error:
+            output.append(f"  Errors: {len(registers.error)} registers")
 
     return '\n'.join(output)
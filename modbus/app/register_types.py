@@ -0,0 +1,202 @@
+"""
+Register data type inference
+Scores candidate decodings of sampled holding/input register blocks (uint16,
+int16, uint32/int32 and float32 in ABCD or CDAB word order) by range
+plausibility and smoothness, so generated entities get the right data_type,
+size and word swap instead of one uint16 entity per word.
+
+Only 16-bit words with no evidence for anything else stay uint16; static
+pairs are only read as float32 if every sample is a clean decimal value.
+"""
+
+import logging
+from collections import namedtuple
+from typing import Dict, List
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+from register_profiler import RegisterSamples
+
+logger = logging.getLogger(__name__)
+
+# Tables holding 16-bit words
+WORD_TABLES = ('holding_register', 'input_register')
+
+# Plausible float32 magnitudes for process values
+FLOAT_MIN_MAGNITUDE = 1e-6
+FLOAT_MAX_MAGNITUDE = 1e7
+
+# Decimal places a static float32 may have to count as a clean value
+FLOAT_CLEAN_DECIMALS = 3
+
+# Largest relative jump between samples that still counts as a smooth series
+MAX_ROUGHNESS = 0.25
+
+# Signed 16-bit values are only assumed for small magnitudes
+INT16_MAX_MAGNITUDE = 0x4000
+
+# Home Assistant word order setting per candidate order
+SWAP = {'ABCD': None, 'CDAB': 'word'}
+
+TypedRegister = namedtuple('TypedRegister', ['table', 'address', 'data_type', 'count', 'swap', 'evidence'])
+TypedRegister.__doc__ = """Inferred decoding of the register(s) starting at address"""
+
+
+def _roughness(series: "np.ndarray") -> "np.ndarray":
+    """Largest jump between consecutive samples relative to the series magnitude, per column"""
+    if series.shape[0] < 2:
+        return np.zeros(series.shape[1])
+    jumps = np.abs(np.diff(series, axis=0)).max(axis=0)
+    return jumps / (np.abs(series).max(axis=0) + 1.0)
+
+
+def _max_step(series: "np.ndarray") -> "np.ndarray":
+    """Largest absolute jump between consecutive samples, per column"""
+    if series.shape[0] < 2:
+        return np.zeros(series.shape[1])
+    return np.abs(np.diff(series, axis=0)).max(axis=0)
+
+
+def _changes(series: "np.ndarray") -> "np.ndarray":
+    """Columns whose value changed between samples"""
+    if series.shape[0] < 2:
+        return np.zeros(series.shape[1], dtype=bool)
+    return (np.diff(series, axis=0) != 0).any(axis=0)
+
+
+def _float_candidates(words: "np.ndarray"):
+    """
+    float32 plausibility of each (hi, lo) pair
+
+    Args:
+        words: (samples, M) uint32 with the pair already combined (hi << 16 | lo)
+
+    Returns:
+        (accepted, roughness): (M,) arrays; accepted means every sample is a
+        plausible float, not all zero, and the series is smooth or a clean
+        decimal throughout
+    """
+    values = words.astype(np.uint32).view(np.float32)
+    wide = values.astype(np.float64)
+    magnitude = np.abs(wide)
+    with np.errstate(invalid='ignore'):
+        plausible = np.isfinite(wide) & ((wide == 0) | (
+            (magnitude >= FLOAT_MIN_MAGNITUDE) & (magnitude <= FLOAT_MAX_MAGNITUDE)))
+        all_plausible = plausible.all(axis=0) & (wide != 0).any(axis=0)
+        wide = np.where(plausible, wide, 0.0)
+        clean = (np.abs(wide - np.round(wide, FLOAT_CLEAN_DECIMALS))
+                 <= np.spacing(np.abs(values.astype(np.float32))).astype(np.float64)).all(axis=0)
+        roughness = _roughness(wide)
+        smooth = _changes(wide) & (roughness < MAX_ROUGHNESS)
+    return all_plausible & (clean | smooth), roughness
+
+
+def _int32_candidates(hi: "np.ndarray", lo: "np.ndarray"):
+    """
+    32-bit integer evidence of each (hi, lo) pair
+
+    The high word must change (a carry) while the combined value stays
+    smooth, clearly smoother than the low word on its own.
+
+    Returns:
+        (accepted, signed, step): (M,) arrays; step is the largest absolute
+        jump of the combined value, which is smallest for the true word order
+        (the fast-changing word is the low word)
+    """
+    unsigned = (hi.astype(np.int64) << 16) | lo.astype(np.int64)
+    signed = np.where(unsigned >= 1 << 31, unsigned - (1 << 32), unsigned)
+    rough_unsigned = _roughness(unsigned.astype(np.float64))
+    rough_signed = _roughness(signed.astype(np.float64))
+    is_signed = (hi >= 0x8000).any(axis=0) & (rough_signed < rough_unsigned)
+    rough = np.where(is_signed, rough_signed, rough_unsigned)
+    accepted = _changes(hi) & (rough < MAX_ROUGHNESS) & (rough * 4 < _roughness(lo.astype(np.float64)))
+    step = np.where(is_signed, _max_step(signed.astype(np.float64)), _max_step(unsigned.astype(np.float64)))
+    return accepted, is_signed, step
+
+
+def infer_register_types(samples: RegisterSamples) -> List[TypedRegister]:
+    """
+    Infer data types of one word table
+
+    Candidate pairs are scored for all addresses at once; a greedy pass then
+    assigns them left to right (float32 before 32-bit integers before int16,
+    the smoother word order winning when both orders are plausible).
+
+    Returns:
+        TypedRegister per register that is not a plain uint16
+    """
+    if not NUMPY_AVAILABLE:
+        raise RuntimeError("NumPy is required for type inference")
+    if samples.table not in WORD_TABLES or samples.values.size == 0:
+        return []
+
+    values = samples.values
+    addresses = samples.addresses
+    complete = ~np.isnan(values).any(axis=0)
+    words = np.where(np.isnan(values), 0, values).astype(np.uint32)
+    columns = words.shape[1]
+
+    # Pair i covers columns i and i+1
+    # Per word order: (float ok, float roughness, int ok, int signed, int step)
+    pairable = np.zeros(0, dtype=bool)
+    candidates = {}
+    if columns > 1:
+        a, b = words[:, :-1], words[:, 1:]
+        pairable = (addresses[1:] == addresses[:-1] + 1) & complete[:-1] & complete[1:]
+        for order, (hi, lo) in (('ABCD', (a, b)), ('CDAB', (b, a))):
+            candidates[order] = _float_candidates((hi << 16) | lo) + _int32_candidates(hi, lo)
+
+    signed16 = np.where(words >= 0x8000, words.astype(np.int64) - 0x10000, words.astype(np.int64))
+    int16 = complete & (words >= 0x8000).any(axis=0) & (np.abs(signed16).max(axis=0) < INT16_MAX_MAGNITUDE)
+
+    typed = []
+    column = 0
+    while column < columns:
+        address = int(addresses[column])
+        if column < len(pairable) and pairable[column]:
+            floats = [(candidates[order][1][column], order) for order in SWAP if candidates[order][0][column]]
+            ints = [(candidates[order][4][column], order) for order in SWAP if candidates[order][2][column]]
+            match = None
+            if floats:
+                match = ('float32', min(floats)[1], 'plausible float')
+            elif ints:
+                order = min(ints)[1]
+                match = ('int32' if candidates[order][3][column] else 'uint32', order, 'carry')
+            if match:
+                data_type, order, evidence = match
+                typed.append(TypedRegister(samples.table, address, data_type, 2, SWAP[order], evidence))
+                column += 2
+                continue
+        if int16[column]:
+            typed.append(TypedRegister(samples.table, address, 'int16', 1, None, 'signed'))
+        column += 1
+
+    logger.info(f"Inferred {len(typed)} non-uint16 {samples.table} entries")
+    return typed
+
+
+def register_types_report(samples: Dict[str, RegisterSamples]) -> Dict[str, Dict[int, Dict]]:
+    """
+    Inferred types of all word tables for ModbusConfigGenerator
+
+    Returns:
+        {table: {address: {data_type, count, swap, evidence}}}
+    """
+    report = {}
+    for table, table_samples in samples.items():
+        if table not in WORD_TABLES:
+            continue
+        report[table] = {
+            typed.address: {
+                'data_type': typed.data_type,
+                'count': typed.count,
+                'swap': typed.swap,
+                'evidence': typed.evidence
+            }
+            for typed in infer_register_types(table_samples)
+        }
+    return report
@@ -13,9 +13,115 @@ except ImportError:
     Snap7Exception = Exception
 
 import logging
+import re
+import struct
+from collections import namedtuple
+from ctypes import byref, c_ubyte, c_uint16
+from typing import Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# snap7 1.x reports library errors as RuntimeError from check_error
+S7_ERRORS = (Snap7Exception, RuntimeError)
+
+# LOGO! maps the VM area to DB1
+VM_DB_NUMBER = 1
+
+# S7 area codes (snap7 Areas) and the byte transport size
+S7_AREA_PE = 0x81   # process inputs (I, peripheral AI)
+S7_AREA_PA = 0x82   # process outputs (Q, peripheral AQ)
+S7_AREA_MK = 0x83   # markers (M)
+S7_AREA_DB = 0x84   # data blocks
+S7_WORDLEN_BYTE = 0x02
+
+# snap7 error bits of TCP and ISO transport errors; set means the session is gone
+SNAP7_TRANSPORT_ERROR_MASK = 0x000FFFFF
+
+# PDU size LOGO! 0BA7/0BA8 negotiate, used when the negotiated size is unknown
+DEFAULT_PDU_SIZE = 240
+
+# Bytes of a read response PDU not available for data (header, parameter, item header)
+READ_RESPONSE_OVERHEAD = 18
+
+# Unrequested bytes a job may read to join two variables (cheaper than another job)
+DEFAULT_MAX_GAP = 32
+
+# V10 (byte), V10.3 (bit), VW12 (word), VD20 (double word)
+VM_ADDRESS_PATTERN = re.compile(r'^V(?:(?P<byte>\d{1,4})\.(?P<bit>[0-7])|(?P<kind>[WD]?)(?P<start>\d{1,4}))$')
+
+# Bytes per VM variable kind and how the value is decoded (matches Logo.read)
+VM_KINDS = {
+    'bit': (1, None),
+    'byte': (1, struct.Struct('>B')),
+    'word': (2, struct.Struct('>h')),
+    'dword': (4, struct.Struct('>l')),
+}
+
+VmVariable = namedtuple('VmVariable', ['address', 'kind', 'start', 'bit'])
+VmVariable.__doc__ = """Parsed VM address: byte offset in DB1 and bit number for bits"""
+
+ReadJob = namedtuple('ReadJob', ['start', 'size', 'variables'])
+ReadJob.__doc__ = """One db_read of DB1 bytes start..start+size-1 covering variables"""
+
+
+def parse_vm_address(address: str) -> Optional[VmVariable]:
+    """Parse a LOGO! VM address string, None if it is not one"""
+    match = VM_ADDRESS_PATTERN.match(address.strip().upper())
+    if not match:
+        return None
+    if match.group('bit') is not None:
+        return VmVariable(address, 'bit', int(match.group('byte')), int(match.group('bit')))
+    kind = {'': 'byte', 'W': 'word', 'D': 'dword'}[match.group('kind')]
+    return VmVariable(address, kind, int(match.group('start')), None)
+
+
+def plan_vm_reads(addresses: List[str], pdu_size: int = DEFAULT_PDU_SIZE,
+                  max_gap: int = DEFAULT_MAX_GAP) -> Tuple[List[ReadJob], List[str]]:
+    """
+    Merge VM addresses into the fewest DB1 byte range reads
+
+    Variables are joined while the gap to the previous one is at most
+    max_gap bytes and the job still fits one response PDU; a variable is
+    never split across jobs.
+
+    Returns:
+        (jobs, invalid addresses)
+    """
+    payload = max(4, pdu_size - READ_RESPONSE_OVERHEAD)
+    variables = []
+    invalid = []
+    for address in addresses:
+        variable = parse_vm_address(address)
+        if variable is None:
+            invalid.append(address)
+        else:
+            variables.append(variable)
+
+    jobs: List[ReadJob] = []
+    job_start = job_end = None
+    members: List[VmVariable] = []
+    for variable in sorted(variables, key=lambda v: v.start):
+        end = variable.start + VM_KINDS[variable.kind][0]
+        if members and variable.start - job_end <= max_gap and max(job_end, end) - job_start <= payload:
+            members.append(variable)
+            job_end = max(job_end, end)
+            continue
+        if members:
+            jobs.append(ReadJob(job_start, job_end - job_start, members))
+        members = [variable]
+        job_start, job_end = variable.start, end
+    if members:
+        jobs.append(ReadJob(job_start, job_end - job_start, members))
+    return jobs, invalid
+
+
+def slice_vm_value(variable: VmVariable, data: bytes, offset: int) -> int:
+    """Decode a variable from a buffer read starting at byte offset"""
+    position = variable.start - offset
+    if variable.kind == 'bit':
+        return (data[position] >> variable.bit) & 1
+    return VM_KINDS[variable.kind][1].unpack_from(data, position)[0]
+
 
 class S7Client:
     """S7 Protocol client for LOGO! v7/0BA7"""
@@ -42,6 +148,7 @@ class S7Client:
         self.remote_tsap = remote_tsap
         self.client = None
         self.connected = False
+        self.pdu_size = DEFAULT_PDU_SIZE
 
     def connect(self):
         """Connect to LOGO! device via S7 protocol"""
@@ -54,13 +161,23 @@ class S7Client:
                 self.port
             )
             self.connected = True
-            logger.info(f"S7 connection established to {self.host}:{self.port}")
+            self.pdu_size = self._negotiated_pdu_size()
+            logger.info(f"S7 connection established to {self.host}:{self.port} (PDU {self.pdu_size})")
             return True
-        except Snap7Exception as e:
+        except S7_ERRORS as e:
             logger.error(f"S7 connection failed: {e}")
             self.connected = False
             return False
 
+    def _negotiated_pdu_size(self) -> int:
+        """PDU size agreed with the device (Logo has no get_pdu_length wrapper)"""
+        requested, negotiated = c_uint16(), c_uint16()
+        try:
+            code = self.client.library.Cli_GetPduLength(self.client.pointer, byref(requested), byref(negotiated))
+        except AttributeError:
+            return DEFAULT_PDU_SIZE
+        return negotiated.value if code == 0 and negotiated.value else DEFAULT_PDU_SIZE
+
     def disconnect(self):
         """Disconnect from LOGO! device"""
         if self.client:
@@ -90,10 +207,79 @@ class S7Client:
             value = self.client.read(address)
             logger.debug(f"Read {address}: {value}")
             return value
-        except Snap7Exception as e:
+        except S7_ERRORS as e:
             logger.error(f"Error reading {address}: {e}")
+            self._session_lost()
             return None
 
+    def read_area(self, area: int, db_number: int, start: int, size: int) -> Optional[bytearray]:
+        """
+        Read raw bytes of any S7 area (Logo only wraps DB reads)
+
+        Args:
+            area: S7 area code (S7_AREA_*)
+            db_number: Data block number for S7_AREA_DB, else 0
+            start: First byte
+            size: Number of bytes
+
+        Returns:
+            bytearray, or None if the device rejected the read
+        """
+        if not self.connected:
+            logger.error("Not connected to LOGO! device")
+            return None
+
+        data = (c_ubyte * size)()
+        try:
+            code = self.client.library.Cli_ReadArea(self.client.pointer, area, db_number, start, size,
+                                                    S7_WORDLEN_BYTE, byref(data))
+        except (AttributeError, OSError) as e:
+            logger.error(f"Error reading area {area:#x}: {e}")
+            return None
+        if code != 0:
+            if code & SNAP7_TRANSPORT_ERROR_MASK:
+                logger.warning(f"S7 session to {self.host} lost ({code:#x})")
+                self.connected = False
+            else:
+                logger.debug(f"Read of area {area:#x} DB{db_number} {start}+{size} rejected ({code:#x})")
+            return None
+        return bytearray(data)
+
+    def ping(self) -> bool:
+        """
+        Check that the session is still usable with a 1-byte DB1 read
+
+        A read the CPU rejects still proves the session; only transport
+        errors mark the client disconnected.
+        """
+        if not self.connected:
+            return False
+        data = (c_ubyte * 1)()
+        try:
+            code = self.client.library.Cli_ReadArea(self.client.pointer, S7_AREA_DB, VM_DB_NUMBER, 0, 1,
+                                                    S7_WORDLEN_BYTE, byref(data))
+        except (AttributeError, OSError):
+            code = SNAP7_TRANSPORT_ERROR_MASK
+        if code & SNAP7_TRANSPORT_ERROR_MASK:
+            self.connected = False
+        return self.connected
+
+    def _session_lost(self) -> bool:
+        """
+        Check after a failed snap7 call whether the session itself is gone
+
+        Marks the client disconnected (so S7SessionPool reconnects on next
+        use) when snap7 no longer reports a connection.
+        """
+        try:
+            alive = bool(self.client.get_connected())
+        except (AttributeError, OSError) + S7_ERRORS:
+            alive = False
+        if not alive:
+            logger.warning(f"S7 session to {self.host} lost")
+            self.connected = False
+        return not alive
+
     def write_vm(self, address, value):
         """
         Write value to VM address
@@ -113,25 +299,52 @@ class S7Client:
             self.client.write(address, value)
             logger.debug(f"Wrote {address}: {value}")
             return True
-        except Snap7Exception as e:
+        except S7_ERRORS as e:
             logger.error(f"Error writing {address}: {e}")
+            self._session_lost()
             return False
 
-    def read_multiple(self, addresses):
+    def read_multiple(self, addresses, max_gap=DEFAULT_MAX_GAP):
         """
         Read multiple VM addresses
 
+        Addresses are merged into DB1 byte ranges (see plan_vm_reads), so a
+        whole VM region costs one job per PDU instead of one per variable.
+        If a range read fails, its variables are read one by one.
+
         Args:
             addresses: List of VM address strings
+            max_gap: Unrequested bytes a job may read to join variables
 
         Returns:
             dict: Dictionary mapping addresses to values
         """
-        results = {}
-        for addr in addresses:
-            value = self.read_vm(addr)
-            if value is not None:
-                results[addr] = value
+        if not self.connected:
+            logger.error("Not connected to LOGO! device")
+            return {}
+
+        jobs, invalid = plan_vm_reads(addresses, self.pdu_size, max_gap)
+        if invalid:
+            logger.warning(f"Skipping invalid VM addresses: {', '.join(invalid)}")
+
+        results: Dict[str, int] = {}
+        for job in jobs:
+            try:
+                data = self.client.db_read(VM_DB_NUMBER, job.start, job.size)
+            except S7_ERRORS as e:
+                if self._session_lost():
+                    # Single reads would each wait for the timeout on the dead session
+                    break
+                logger.debug(f"Range read V{job.start}+{job.size} failed ({e}), reading variables singly")
+                for variable in job.variables:
+                    value = self.read_vm(variable.address)
+                    if value is not None:
+                        results[variable.address] = value
+                continue
+            for variable in job.variables:
+                results[variable.address] = slice_vm_value(variable, data, job.start)
+
+        logger.debug(f"Read {len(results)} VM variables in {len(jobs)} job(s)")
         return results
 
     def __enter__(self):
@@ -18,13 +18,40 @@ TSAP Structure (2 bytes):
 - Byte 2: Rack (bits 5-7) + Slot (bits 0-4)
 """
 
+import asyncio
+import ipaddress
 import socket
 import struct
 import logging
-from typing import Optional, Dict, Tuple
+from typing import Optional, Dict, List, Tuple
+
+from device_database import get_device_database
 
 logger = logging.getLogger(__name__)
 
+# Initial receive buffer; grows for larger TPKT frames
+TPKT_BUFFER_SIZE = 1024
+
+# Handshakes a network scan keeps in flight on the event loop
+DEFAULT_S7_CONCURRENCY = 256
+
+# Parallel connections a TSAP sweep opens to one host
+DEFAULT_TSAP_PARALLEL = 4
+
+# Sweep candidates in priority order: PG before OP before S7 Basic,
+# CPU slots of S7-300 (2), S7-1200/1500 (1, 0) and S7-400 (3, 4) first
+DEFAULT_SWEEP_COMM_TYPES = (1, 2, 3)
+DEFAULT_SWEEP_RACKS = (0, 1)
+DEFAULT_SWEEP_SLOTS = (2, 1, 0, 3, 4, 5, 6)
+
+# SZL 0x0011: module identification (order number, hardware and firmware version)
+SZL_MODULE_IDENTIFICATION = 0x0011
+SZL_INDEX_MODULE = 0x0001
+SZL_INDEX_FIRMWARE = 0x0007
+
+# Errors meaning the port itself is unusable, so other TSAPs will fail too
+FATAL_SWEEP_ERRORS = ('Connection refused', 'Connection timeout')
+
 
 class S7Scanner:
     """Scanner for S7 protocol devices (LOGO! v7, S7-300, S7-400, etc.)"""
@@ -60,6 +87,7 @@ class S7Scanner:
         self.port = port
         self.timeout = timeout
         self.sock = None
+        self._rx = bytearray(TPKT_BUFFER_SIZE)
 
     def _create_tpkt_header(self, length: int) -> bytes:
         """
@@ -188,20 +216,188 @@ class S7Scanner:
 
         return bytes(s7comm)
 
+    def _create_szl_request(self, szl_id: int, index: int) -> bytes:
+        """
+        Create S7comm Userdata "Read SZL" request
+
+        Format:
+        - Header: 0x32, ROSCTR 0x07 (Userdata), reserved, PDU reference,
+          parameter length (8), data length (8)
+        - Parameter: 00 01 12, length 4, method 0x11 (request),
+          type/group 0x44 (request, CPU functions), subfunction 0x01 (read SZL), sequence 0
+        - Data: return code 0xFF, transport size 0x09 (octet string), length 4,
+          SZL ID, SZL index
+
+        Args:
+            szl_id: System status list ID
+            index: Record index (0 for all records)
+
+        Returns:
+            bytes: S7comm Userdata request
+        """
+        parameter = bytes([0x00, 0x01, 0x12, 0x04, 0x11, 0x44, 0x01, 0x00])
+        data = struct.pack('!BBHHH', 0xFF, 0x09, 4, szl_id, index)
+        header = struct.pack('!BBHHHH', self.S7COMM_PROTOCOL_ID, 0x07, 0x0000, 0x0001,
+                             len(parameter), len(data))
+        return header + parameter + data
+
+    def _parse_szl_response(self, response: bytes) -> Optional[List[bytes]]:
+        """
+        Extract the records of a "Read SZL" response
+
+        Args:
+            response: Full TPKT packet
+
+        Returns:
+            Optional[List[bytes]]: SZL records, None if the device refused the read
+        """
+        s7_data = response[7:]
+        if len(s7_data) < 10 or s7_data[0] != self.S7COMM_PROTOCOL_ID or s7_data[1] != 0x07:
+            return None
+        parameter_length, data_length = struct.unpack('!HH', s7_data[6:10])
+        data = s7_data[10 + parameter_length:10 + parameter_length + data_length]
+        if len(data) < 12 or data[0] != 0xFF:
+            return None
+        record_length, record_count = struct.unpack('!HH', data[8:12])
+        records = data[12:]
+        return [records[i * record_length:(i + 1) * record_length]
+                for i in range(record_count) if (i + 1) * record_length <= len(records)]
+
+    def _cotp_connect_frame(self, src_tsap: int, dst_tsap: int) -> bytes:
+        """Complete TPKT frame carrying the COTP Connect Request"""
+        cotp_cr = self._create_cotp_connect_request(src_tsap, dst_tsap)
+        return self._create_tpkt_header(4 + len(cotp_cr)) + cotp_cr
+
+    def _data_frame(self, s7_pdu: bytes) -> bytes:
+        """Complete TPKT frame carrying an S7comm PDU in a COTP Data TPDU"""
+        s7_packet = bytes([2, self.COTP_DATA, 0x80]) + s7_pdu  # Length=2, DT Data, EOT
+        return self._create_tpkt_header(4 + len(s7_packet)) + s7_packet
+
+    def _check_cotp_confirm(self, response: Optional[bytes]) -> Optional[str]:
+        """Error message unless response is a COTP Connect Confirm"""
+        if not response or len(response) < 7:
+            return 'No COTP response or response too short'
+        cotp_pdu_type = response[5]  # After TPKT header (4 bytes) + length indicator (1 byte)
+        if cotp_pdu_type != self.COTP_CONNECT_CONFIRM:
+            return f'COTP connection rejected (PDU type: 0x{cotp_pdu_type:02X})'
+        return None
+
+    def _parse_setup_response(self, response: Optional[bytes]) -> Tuple[Optional[str], Optional[int]]:
+        """
+        Check an S7comm Setup Communication response
+
+        Returns:
+            (error message or None, negotiated PDU size)
+        """
+        if not response or len(response) < 20:
+            return 'No S7comm response or response too short', None
+
+        # Skip TPKT (4 bytes) + COTP (3 bytes) = 7 bytes
+        s7_data = response[7:]
+        if s7_data[0] != self.S7COMM_PROTOCOL_ID:
+            return f'Invalid S7comm protocol ID: 0x{s7_data[0]:02X}', None
+
+        # Check ROSCTR (should be 0x03 = Ack_Data)
+        rosctr = s7_data[1]
+        if rosctr != 0x03:
+            return f'Unexpected ROSCTR: 0x{rosctr:02X}', None
+
+        # Extract PDU size from response (bytes 18-19 after TPKT+COTP)
+        pdu_size = struct.unpack('!H', s7_data[18:20])[0] if len(s7_data) >= 20 else None
+        return None, pdu_size
+
+    def _module_identity(self, response: Optional[bytes]) -> Dict:
+        """
+        Decode a SZL 0x0011 response
+
+        Each record: index (2), order number (20 ASCII), module type ID (2),
+        version (2 + 2). The firmware record carries 'V' and major, minor,
+        patch in its version bytes.
+
+        Returns:
+            dict: order_number, module_type_id, hardware, firmware (None if unavailable)
+        """
+        identity = {'order_number': None, 'module_type_id': None, 'hardware': None, 'firmware': None}
+        records = self._parse_szl_response(response) if response else None
+        if not records:
+            logger.debug(f"SZL 0x0011 not available on {self.host}:{self.port}")
+            return identity
+
+        for record in records:
+            if len(record) < 28:
+                continue
+            index, module_type, version, revision = struct.unpack('!H20xHHH', record[:28])
+            if index == SZL_INDEX_MODULE:
+                identity['order_number'] = record[2:22].decode('ascii', 'replace').strip(' \x00')
+                identity['module_type_id'] = module_type
+                identity['hardware'] = revision
+            elif index == SZL_INDEX_FIRMWARE and version >> 8 == ord('V'):
+                identity['firmware'] = f"V{version & 0xFF}.{revision >> 8}.{revision & 0xFF}"
+
+        return identity
+
+    def _new_result(self, src_tsap: int, dst_tsap: int) -> Dict:
+        """Detection result skeleton"""
+        return {
+            'success': False,
+            'device_type': None,
+            'port': self.port,
+            'tsap_src': src_tsap,
+            'tsap_dst': dst_tsap,
+            'pdu_size': None,
+            'order_number': None,
+            'firmware': None,
+            'manufacturer': None,
+            'model': None,
+            'error': None
+        }
+
+    def _classify(self, result: Dict, identity: Dict, setup_response: bytes):
+        """Fill device type from the SZL identity (order number beats TSAP/PDU heuristics)"""
+        result.update(identity)
+        if identity['order_number']:
+            manufacturer, model, device_class = get_device_database().identify_device(
+                self.port, order_number=identity['order_number'])
+            result.update({'manufacturer': manufacturer, 'model': model, 'device_class': device_class})
+            result['device_type'] = model
+            logger.info(f"S7 module {identity['order_number']} ({model}, firmware {identity['firmware']})")
+        else:
+            result['device_type'] = self._identify_device_type(result['tsap_dst'], setup_response)
+
+    def _recv_tpkt(self) -> bytes:
+        """Read exactly one TPKT frame: the 4-byte header, then the length it announces"""
+        view = memoryview(self._rx)
+        self._recv_into(view[:4])
+        length = struct.unpack_from('!H', self._rx, 2)[0]
+        if length < 4:
+            raise ConnectionError(f'Invalid TPKT length {length} from {self.host}:{self.port}')
+        if length > len(self._rx):
+            self._rx.extend(bytes(length - len(self._rx)))
+            view = memoryview(self._rx)
+        self._recv_into(view[4:length])
+        return bytes(view[:length])
+
+    def _recv_into(self, view: memoryview):
+        received = 0
+        while received < len(view):
+            n = self.sock.recv_into(view[received:])
+            if n == 0:
+                raise ConnectionError(f'Connection closed by {self.host}:{self.port}')
+            received += n
+
     def _send_receive(self, data: bytes) -> Optional[bytes]:
         """
-        Send data and receive response
+        Send data and receive the response frame
 
         Args:
             data: Data to send
 
         Returns:
-            Optional[bytes]: Response data or None on error
+            Optional[bytes]: Response TPKT frame or None on error
         """
         try:
             self.sock.sendall(data)
-            response = self.sock.recv(4096)
-            return response
+            return self._recv_tpkt()
         except socket.timeout:
             logger.debug(f"Timeout receiving from {self.host}:{self.port}")
             return None
@@ -213,6 +409,9 @@ class S7Scanner:
         """
         Detect S7-compatible device using 3-step connection
 
+        Blocking variant for callers without an event loop; AsyncS7Scanner
+        runs the same handshake on asyncio.
+
         Args:
             src_tsap: Source TSAP (default: 0x0100)
             dst_tsap: Destination TSAP (default: 0x2000)
@@ -220,11 +419,12 @@ class S7Scanner:
         Returns:
             dict: Detection results with keys:
                 - success: bool
-                - device_type: str (e.g., "LOGO! v7", "S7-300", "S7-400", "Unknown S7")
+                - device_type: str (e.g., "LOGO! 0BA7", "S7-300", "Unknown S7")
                 - port: int
                 - tsap_src: int
                 - tsap_dst: int
                 - pdu_size: int (negotiated PDU size)
+                - order_number, firmware, manufacturer, model: from SZL 0x0011 if supported
                 - error: str (if failed)
         """
         if src_tsap is None:
@@ -232,15 +432,7 @@ class S7Scanner:
         if dst_tsap is None:
             dst_tsap = self.DEFAULT_REMOTE_TSAP
 
-        result = {
-            'success': False,
-            'device_type': None,
-            'port': self.port,
-            'tsap_src': src_tsap,
-            'tsap_dst': dst_tsap,
-            'pdu_size': None,
-            'error': None
-        }
+        result = self._new_result(src_tsap, dst_tsap)
 
         try:
             # Step 1: TCP Connect
@@ -250,66 +442,23 @@ class S7Scanner:
             logger.debug(f"TCP connected to {self.host}:{self.port}")
 
             # Step 2: COTP Connect Request
-            cotp_cr = self._create_cotp_connect_request(src_tsap, dst_tsap)
-            tpkt_length = 4 + len(cotp_cr)  # TPKT header + COTP CR
-            tpkt_header = self._create_tpkt_header(tpkt_length)
-            cotp_request = tpkt_header + cotp_cr
-
-            cotp_response = self._send_receive(cotp_request)
-            if not cotp_response or len(cotp_response) < 7:
-                result['error'] = 'No COTP response or response too short'
+            result['error'] = self._check_cotp_confirm(self._send_receive(self._cotp_connect_frame(src_tsap, dst_tsap)))
+            if result['error']:
                 return result
-
-            # Check COTP Connect Confirm (0xD0)
-            cotp_pdu_type = cotp_response[5]  # After TPKT header (4 bytes) + length indicator (1 byte)
-            if cotp_pdu_type != self.COTP_CONNECT_CONFIRM:
-                result['error'] = f'COTP connection rejected (PDU type: 0x{cotp_pdu_type:02X})'
-                return result
-
             logger.debug(f"COTP connection confirmed to {self.host}:{self.port}")
 
             # Step 3: S7comm Setup Communication
-            s7_setup = self._create_s7comm_setup()
-
-            # Wrap in COTP Data packet
-            cotp_data = bytes([2, 0xF0, 0x80])  # Length=2, DT Data, EOT
-            s7_packet = cotp_data + s7_setup
-
-            tpkt_length = 4 + len(s7_packet)
-            tpkt_header = self._create_tpkt_header(tpkt_length)
-            s7_request = tpkt_header + s7_packet
-
-            s7_response = self._send_receive(s7_request)
-            if not s7_response or len(s7_response) < 20:
-                result['error'] = 'No S7comm response or response too short'
-                return result
-
-            # Parse S7comm response
-            # Skip TPKT (4 bytes) + COTP (3 bytes) = 7 bytes
-            s7_data = s7_response[7:]
-
-            # Check S7comm Protocol ID
-            if s7_data[0] != self.S7COMM_PROTOCOL_ID:
-                result['error'] = f'Invalid S7comm protocol ID: 0x{s7_data[0]:02X}'
-                return result
-
-            # Check ROSCTR (should be 0x03 = Ack_Data)
-            rosctr = s7_data[1]
-            if rosctr != 0x03:
-                result['error'] = f'Unexpected ROSCTR: 0x{rosctr:02X}'
+            s7_response = self._send_receive(self._data_frame(self._create_s7comm_setup()))
+            result['error'], result['pdu_size'] = self._parse_setup_response(s7_response)
+            if result['error']:
                 return result
-
-            # Extract PDU size from response (bytes 18-19 after TPKT+COTP)
-            if len(s7_data) >= 20:
-                pdu_size = struct.unpack('!H', s7_data[18:20])[0]
-                result['pdu_size'] = pdu_size
-
             logger.info(f"S7comm connection established to {self.host}:{self.port} (PDU: {result['pdu_size']})")
 
-            # Device type detection based on TSAP and response
             result['success'] = True
-            result['device_type'] = self._identify_device_type(dst_tsap, s7_response)
 
+            # Module identification on the same session
+            szl_request = self._data_frame(self._create_szl_request(SZL_MODULE_IDENTIFICATION, 0x0000))
+            self._classify(result, self._module_identity(self._send_receive(szl_request)), s7_response)
             return result
 
         except socket.timeout:
@@ -354,7 +503,7 @@ class S7Scanner:
                         return "LOGO! v7/v8 (uncertain)"
 
         # S7-300 series (rack/slot based TSAP)
-        rack = (tsap >> 8) & 0x07
+        rack = (tsap >> 5) & 0x07
         slot = tsap & 0x1F
         if rack == 0 and slot > 0:
             return f"S7-300 (Rack {rack}, Slot {slot})"
@@ -370,6 +519,9 @@ class S7Scanner:
         """
         Scan network for S7 devices on port 102
 
+        Blocking wrapper around AsyncS7Scanner.scan_network for callers
+        without an event loop.
+
         Args:
             network: Network range (e.g., "192.168.1.0/24")
             timeout: Timeout per host in seconds
@@ -377,33 +529,37 @@ class S7Scanner:
         Returns:
             list: List of dicts with detected S7 devices
         """
-        import ipaddress
-
-        devices = []
-        network_obj = ipaddress.IPv4Network(network, strict=False)
-
-        logger.info(f"Scanning network {network} for S7 devices...")
-
-        for ip in network_obj.hosts():
-            ip_str = str(ip)
-            logger.debug(f"Checking {ip_str}:102 for S7...")
+        return asyncio.run(AsyncS7Scanner.scan_network(network, timeout=timeout))
 
-            scanner = S7Scanner(ip_str, port=102, timeout=timeout)
-            result = scanner.detect_s7_device()
-
-            if result['success']:
-                devices.append({
-                    'host': ip_str,
-                    'port': 102,
-                    'device_type': result['device_type'],
-                    'pdu_size': result['pdu_size'],
-                    'tsap_src': result['tsap_src'],
-                    'tsap_dst': result['tsap_dst']
-                })
-                logger.info(f"Found S7 device: {ip_str} - {result['device_type']}")
+    @classmethod
+    def tsap_candidates(cls, comm_types=DEFAULT_SWEEP_COMM_TYPES, racks=DEFAULT_SWEEP_RACKS,
+                        slots=DEFAULT_SWEEP_SLOTS) -> List[Dict]:
+        """
+        TSAP pairs a sweep tries, LOGO!'s fixed pair first
 
-        logger.info(f"S7 scan complete. Found {len(devices)} device(s).")
-        return devices
+        Returns:
+            list: Dicts with tsap_src, tsap_dst, comm_type, rack, slot
+        """
+        candidates = [{
+            'tsap_src': cls.DEFAULT_LOCAL_TSAP, 'tsap_dst': cls.DEFAULT_REMOTE_TSAP,
+            'comm_type': None, 'rack': None, 'slot': None
+        }]
+        for comm_type in comm_types:
+            for rack in racks:
+                for slot in slots:
+                    candidates.append({
+                        'tsap_src': cls.DEFAULT_LOCAL_TSAP,
+                        'tsap_dst': cls.create_tsap(comm_type, rack, slot),
+                        'comm_type': comm_type, 'rack': rack, 'slot': slot
+                    })
+        return candidates
+
+    def sweep_tsaps(self, candidates: Optional[List[Dict]] = None,
+                    max_parallel: int = DEFAULT_TSAP_PARALLEL) -> Dict:
+        """
+        Find a working TSAP pair (blocking wrapper around AsyncS7Scanner.sweep_tsaps)
+        """
+        return asyncio.run(AsyncS7Scanner(self.host, self.port, self.timeout).sweep_tsaps(candidates, max_parallel))
 
     @staticmethod
     def create_tsap(comm_type: int, rack: int, slot: int) -> int:
@@ -439,3 +595,204 @@ class S7Scanner:
         byte2 = (rack << 5) | slot
 
         return (byte1 << 8) | byte2
+
+
+class AsyncS7Scanner(S7Scanner):
+    """
+    asyncio S7 handshake engine
+
+    Runs TCP connect, COTP Connect Request, S7 Setup and the SZL read with
+    non-blocking sockets, so one event loop can keep thousands of handshakes
+    in flight. Frames are read with an exact TPKT reader into a reusable
+    per-connection buffer.
+    """
+
+    async def _connect(self):
+        """Open the TCP connection (raises ConnectionRefusedError / asyncio.TimeoutError)"""
+        loop = asyncio.get_running_loop()
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        try:
+            await asyncio.wait_for(loop.sock_connect(sock, (self.host, self.port)), self.timeout)
+        except BaseException:
+            sock.close()
+            raise
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock = sock
+
+    async def _recv_into_async(self, view: memoryview):
+        loop = asyncio.get_running_loop()
+        received = 0
+        while received < len(view):
+            n = await loop.sock_recv_into(self.sock, view[received:])
+            if n == 0:
+                raise ConnectionError(f'Connection closed by {self.host}:{self.port}')
+            received += n
+
+    async def _recv_tpkt_async(self) -> bytes:
+        """Read exactly one TPKT frame: the 4-byte header, then the length it announces"""
+        view = memoryview(self._rx)
+        await self._recv_into_async(view[:4])
+        length = struct.unpack_from('!H', self._rx, 2)[0]
+        if length < 4:
+            raise ConnectionError(f'Invalid TPKT length {length} from {self.host}:{self.port}')
+        if length > len(self._rx):
+            self._rx.extend(bytes(length - len(self._rx)))
+            view = memoryview(self._rx)
+        await self._recv_into_async(view[4:length])
+        return bytes(view[:length])
+
+    async def _exchange(self, data: bytes) -> Optional[bytes]:
+        """Send a frame and read the response frame, None on timeout or error"""
+        try:
+            await asyncio.get_running_loop().sock_sendall(self.sock, data)
+            return await asyncio.wait_for(self._recv_tpkt_async(), self.timeout)
+        except asyncio.TimeoutError:
+            logger.debug(f"Timeout receiving from {self.host}:{self.port}")
+            return None
+        except (OSError, ConnectionError) as e:
+            logger.debug(f"Error communicating with {self.host}:{self.port}: {e}")
+            return None
+
+    async def detect_s7_device(self, src_tsap: Optional[int] = None, dst_tsap: Optional[int] = None,
+                               sock: Optional[socket.socket] = None) -> Dict:
+        """
+        Same handshake and result as S7Scanner.detect_s7_device, on asyncio
+
+        Args:
+            sock: Already connected non-blocking socket to run the handshake
+                on instead of opening a new connection (closed afterwards)
+        """
+        if src_tsap is None:
+            src_tsap = self.DEFAULT_LOCAL_TSAP
+        if dst_tsap is None:
+            dst_tsap = self.DEFAULT_REMOTE_TSAP
+
+        result = self._new_result(src_tsap, dst_tsap)
+
+        try:
+            if sock is None:
+                await self._connect()
+            else:
+                self.sock = sock
+
+            result['error'] = self._check_cotp_confirm(await self._exchange(self._cotp_connect_frame(src_tsap, dst_tsap)))
+            if result['error']:
+                return result
+
+            s7_response = await self._exchange(self._data_frame(self._create_s7comm_setup()))
+            result['error'], result['pdu_size'] = self._parse_setup_response(s7_response)
+            if result['error']:
+                return result
+            logger.info(f"S7comm connection established to {self.host}:{self.port} (PDU: {result['pdu_size']})")
+
+            result['success'] = True
+            szl_request = self._data_frame(self._create_szl_request(SZL_MODULE_IDENTIFICATION, 0x0000))
+            self._classify(result, self._module_identity(await self._exchange(szl_request)), s7_response)
+            return result
+
+        except asyncio.TimeoutError:
+            result['error'] = 'Connection timeout'
+            return result
+        except ConnectionRefusedError:
+            result['error'] = 'Connection refused'
+            return result
+        except Exception as e:
+            result['error'] = str(e)
+            logger.debug(f"S7 detection error for {self.host}:{self.port}: {e}")
+            return result
+        finally:
+            if self.sock:
+                self.sock.close()
+                self.sock = None
+
+    async def sweep_tsaps(self, candidates: Optional[List[Dict]] = None,
+                          max_parallel: int = DEFAULT_TSAP_PARALLEL) -> Dict:
+        """
+        Find a working TSAP pair by trying candidates on parallel connections
+
+        At most max_parallel connections to the host are open at once. The
+        sweep stops at the first completed S7 Setup, or as soon as the port
+        refuses or times out the TCP connection.
+
+        Args:
+            candidates: TSAP pairs (see tsap_candidates), default sweep if None
+            max_parallel: Parallel connections to the host
+
+        Returns:
+            dict: detect_s7_device result of the working pair plus comm_type,
+                rack, slot and attempts (candidates tried)
+        """
+        candidates = candidates or self.tsap_candidates()
+        result = self._new_result(None, None)
+        result['error'] = 'No TSAP combination accepted'
+        result['attempts'] = 0
+        semaphore = asyncio.Semaphore(max(1, max_parallel))
+
+        async def attempt(candidate):
+            async with semaphore:
+                scanner = AsyncS7Scanner(self.host, self.port, self.timeout)
+                return candidate, await scanner.detect_s7_device(candidate['tsap_src'], candidate['tsap_dst'])
+
+        logger.info(f"Sweeping {len(candidates)} TSAP pairs on {self.host}:{self.port} "
+                    f"({max_parallel} parallel)")
+        tasks = [asyncio.ensure_future(attempt(candidate)) for candidate in candidates]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                candidate, detected = await next_done
+                result['attempts'] += 1
+                if detected['success']:
+                    result.update(detected)
+                    result.update({key: candidate[key] for key in ('comm_type', 'rack', 'slot')})
+                    logger.info(f"TSAP sweep on {self.host}: {detected['tsap_src']:#06x}/"
+                                f"{detected['tsap_dst']:#06x} accepted (PDU {detected['pdu_size']})")
+                    break
+                if detected['error'] in FATAL_SWEEP_ERRORS:
+                    result['error'] = detected['error']
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        return result
+
+    @staticmethod
+    async def scan_network(network: str, port: int = 102, timeout: float = 2,
+                           max_concurrency: int = DEFAULT_S7_CONCURRENCY) -> List[Dict]:
+        """
+        Scan network for S7 devices, all handshakes on one event loop
+
+        Args:
+            network: Network range (e.g., "192.168.1.0/24")
+            port: TCP port
+            timeout: Timeout per handshake step in seconds
+            max_concurrency: Handshakes in flight at once
+
+        Returns:
+            list: Detected devices in address order
+        """
+        hosts = [str(ip) for ip in ipaddress.IPv4Network(network, strict=False).hosts()]
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        logger.info(f"Scanning network {network} for S7 devices ({len(hosts)} hosts)...")
+
+        async def detect(host):
+            async with semaphore:
+                return host, await AsyncS7Scanner(host, port, timeout).detect_s7_device()
+
+        devices = []
+        for host, result in await asyncio.gather(*(detect(host) for host in hosts)):
+            if result['success']:
+                devices.append({
+                    'host': host,
+                    'port': port,
+                    'device_type': result['device_type'],
+                    'pdu_size': result['pdu_size'],
+                    'tsap_src': result['tsap_src'],
+                    'tsap_dst': result['tsap_dst'],
+                    'order_number': result['order_number'],
+                    'firmware': result['firmware']
+                })
+                logger.info(f"Found S7 device: {host} - {result['device_type']}")
+
+        logger.info(f"S7 scan complete. Found {len(devices)} device(s).")
+        return devices
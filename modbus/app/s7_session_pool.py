@@ -0,0 +1,137 @@
+"""
+Pooled S7 sessions
+Keeps one established S7 session (TCP + COTP + S7 Setup) per host, port and
+TSAP pair between operations, so interactive reads and repeated scans skip the
+three handshake round trips and LOGO! 0BA7's few connection slots are not
+exhausted. Sessions idle longer than the keep-alive interval are pinged before
+reuse and reconnected if the device dropped them.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Tuple
+
+from s7_client import S7Client
+from modbus_exceptions import ModbusConnectionError
+
+logger = logging.getLogger(__name__)
+
+# Seconds an unused session stays open
+DEFAULT_IDLE_TIMEOUT = 120
+
+# Sessions unused for longer than this are checked before reuse
+DEFAULT_KEEPALIVE_INTERVAL = 10
+
+
+class _PooledSession:
+    """A pooled S7 client and the lock serializing its users"""
+
+    __slots__ = ('client', 'lock', 'last_used')
+
+    def __init__(self, client: S7Client):
+        self.client = client
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+
+
+class S7SessionPool:
+    """Thread-safe pool of S7 sessions keyed by (host, port, local TSAP, remote TSAP)"""
+
+    def __init__(self, idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+                 keepalive_interval: float = DEFAULT_KEEPALIVE_INTERVAL):
+        """
+        Initialize session pool
+
+        Args:
+            idle_timeout: Seconds before an unused session is closed
+            keepalive_interval: Idle seconds after which a session is pinged before reuse
+        """
+        self.idle_timeout = idle_timeout
+        self.keepalive_interval = keepalive_interval
+        self._lock = threading.Lock()
+        self._sessions: Dict[Tuple[str, int, int, int], _PooledSession] = {}
+
+    @contextmanager
+    def acquire(self, host: str, port: int = 102, local_tsap: int = 0x0100,
+                remote_tsap: int = 0x2000) -> Iterator[S7Client]:
+        """
+        Borrow the session to host, establishing or re-establishing it if needed
+
+        Blocks while another caller uses the same session. If the caller
+        raises, the session is closed and rebuilt on next use.
+
+        Raises:
+            ModbusConnectionError: session could not be established
+            ImportError: python-snap7 is not installed
+        """
+        self._evict_idle()
+        key = (host, port, local_tsap, remote_tsap)
+        with self._lock:
+            pooled = self._sessions.get(key)
+            if pooled is None:
+                pooled = _PooledSession(S7Client(host, port, local_tsap, remote_tsap))
+                self._sessions[key] = pooled
+
+        with pooled.lock:
+            client = pooled.client
+            if client.connected and time.monotonic() - pooled.last_used > self.keepalive_interval:
+                if not client.ping():
+                    logger.info(f"S7 session to {host}:{port} lost, reconnecting")
+                    client.disconnect()
+            if not client.connected and not client.connect():
+                raise ModbusConnectionError(f'S7 connection to {host}:{port} failed',
+                                            {'host': host, 'port': port})
+            try:
+                yield client
+            except BaseException:
+                client.disconnect()
+                raise
+            finally:
+                pooled.last_used = time.monotonic()
+
+    def is_connected(self, host: str, port: int = 102) -> bool:
+        """Check for an established session to host:port with any TSAP pair"""
+        with self._lock:
+            return any(pooled.client.connected
+                       for (session_host, session_port, _, _), pooled in self._sessions.items()
+                       if session_host == host and session_port == port)
+
+    def _evict_idle(self):
+        """Close sessions unused for longer than idle_timeout"""
+        now = time.monotonic()
+        with self._lock:
+            for key, pooled in list(self._sessions.items()):
+                if now - pooled.last_used > self.idle_timeout and pooled.lock.acquire(blocking=False):
+                    try:
+                        pooled.client.disconnect()
+                    finally:
+                        pooled.lock.release()
+                    del self._sessions[key]
+                    logger.debug(f"Closed idle S7 session to {key[0]}:{key[1]}")
+
+    def close_all(self):
+        """Close every pooled session"""
+        with self._lock:
+            for pooled in self._sessions.values():
+                with pooled.lock:
+                    pooled.client.disconnect()
+            self._sessions.clear()
+
+    def stats(self) -> Dict[str, Dict]:
+        """Pooled sessions and their idle time"""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                f"{host}:{port} {local_tsap:#06x}/{remote_tsap:#06x}": {
+                    'connected': pooled.client.connected,
+                    'in_use': pooled.lock.locked(),
+                    'idle': round(now - pooled.last_used, 1)
+                }
+                for (host, port, local_tsap, remote_tsap), pooled in self._sessions.items()
+            }
+
+
+# Global S7 session pool
+s7_session_pool = S7SessionPool()
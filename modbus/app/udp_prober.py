@@ -0,0 +1,147 @@
+"""
+Multiplexed UDP prober
+Sends probe datagrams to many targets from one socket at the caller's pace
+and matches replies back to their targets by source address and, where the
+protocol has one, transaction ID. All targets share one reply window that
+starts after the last datagram is sent, so probing a whole network costs a
+single timeout instead of one per target.
+"""
+
+import asyncio
+import logging
+import socket
+from collections import namedtuple
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Receive buffer requested for the shared socket, so reply bursts are not dropped
+UDP_RECEIVE_BUFFER = 1 << 20
+
+UdpTarget = namedtuple('UdpTarget', ['host', 'port', 'payload', 'transaction_id'])
+UdpTarget.__doc__ = """One probe datagram; transaction_id is None for protocols matched by address only"""
+
+
+class _ReplyProtocol(asyncio.DatagramProtocol):
+    """Hands every received datagram to the prober"""
+
+    def __init__(self, on_reply: Callable[[bytes, Tuple], None]):
+        self.on_reply = on_reply
+
+    def datagram_received(self, data: bytes, addr: Tuple):
+        self.on_reply(data, addr)
+
+    def error_received(self, exc: Exception):
+        # ICMP errors on an unconnected socket cannot be attributed to a target
+        logger.debug(f"UDP probe socket error: {exc!r}")
+
+
+class UdpProber:
+    """Probes many UDP targets over a single socket"""
+
+    def __init__(self, timeout: float = 2, pace: Optional[Callable[[], Awaitable]] = None,
+                 reply_id: Optional[Callable[[int, bytes], Optional[int]]] = None):
+        """
+        Initialize prober
+
+        Args:
+            timeout: Seconds to wait for replies after the last datagram is sent
+            pace: Awaited before each datagram (rate limiting), None to send at once
+            reply_id: Extracts the transaction ID from a reply given the
+                source port and payload; needed for targets with a transaction_id
+        """
+        self.timeout = timeout
+        self.pace = pace
+        self.reply_id = reply_id
+        self.sent = 0
+        self.unmatched = 0
+
+    async def probe(self, targets: Iterable[UdpTarget]) -> AsyncIterator[Tuple[UdpTarget, bytes]]:
+        """
+        Send all targets their probe and yield (target, reply) as replies arrive
+
+        Each target yields at most its first matching reply. Replies from
+        unknown addresses or with unknown transaction IDs are dropped.
+        Iteration ends once every target answered or the reply window after
+        the last send has passed.
+        """
+        loop = asyncio.get_running_loop()
+        replies: asyncio.Queue = asyncio.Queue()
+        pending: Dict[Tuple[str, int], Dict[Optional[int], UdpTarget]] = {}
+
+        def on_reply(data: bytes, addr: Tuple):
+            waiting = pending.get(addr[:2])
+            target = None
+            if waiting:
+                target = waiting.pop(None, None)
+                if target is None and self.reply_id is not None:
+                    target = waiting.pop(self.reply_id(addr[1], data), None)
+            if target is None:
+                self.unmatched += 1
+                return
+            if not waiting:
+                del pending[addr[:2]]
+            replies.put_nowait((target, data))
+
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, UDP_RECEIVE_BUFFER)
+        except OSError:
+            pass
+        sock.bind(('', 0))
+        transport, _ = await loop.create_datagram_endpoint(lambda: _ReplyProtocol(on_reply), sock=sock)
+
+        async def send():
+            for target in targets:
+                if self.pace is not None:
+                    await self.pace()
+                pending.setdefault((target.host, target.port), {})[target.transaction_id] = target
+                try:
+                    transport.sendto(target.payload, (target.host, target.port))
+                    self.sent += 1
+                except OSError as e:
+                    logger.debug(f"UDP probe to {target.host}:{target.port} failed: {e!r}")
+                    waiting = pending[(target.host, target.port)]
+                    del waiting[target.transaction_id]
+                    if not waiting:
+                        del pending[(target.host, target.port)]
+
+        sender = asyncio.ensure_future(send())
+        receive = None
+        deadline = None
+        try:
+            while True:
+                if receive is None:
+                    receive = asyncio.ensure_future(replies.get())
+                wait_for = {receive}
+                timeout = None
+                if sender.done():
+                    sender.result()
+                    if not pending and not receive.done() and replies.empty():
+                        break
+                    if deadline is None:
+                        deadline = loop.time() + self.timeout
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                else:
+                    wait_for.add(sender)
+
+                done, _ = await asyncio.wait(wait_for, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if receive in done:
+                    yield receive.result()
+                    receive = None
+
+            if receive is not None and receive.done():
+                yield receive.result()
+                receive = None
+            while not replies.empty():
+                yield replies.get_nowait()
+        finally:
+            sender.cancel()
+            if receive is not None:
+                receive.cancel()
+            transport.close()
+
+        answered = self.sent - sum(len(waiting) for waiting in pending.values())
+        logger.debug(f"UDP probe: {self.sent} sent, {answered} answered, {self.unmatched} unmatched replies")